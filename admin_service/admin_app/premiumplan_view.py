@@ -1,8 +1,9 @@
-import requests
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.conf import settings
+from admin_service.common.http_client import get_upstream
+
+PREMIUM_PLAN_PATH = "/api/v1/user/admin/premium/plan/"
 
 class AdminPremiumPlanProxyView(APIView):
     permission_classes = [IsAuthenticated]
@@ -11,10 +12,8 @@ class AdminPremiumPlanProxyView(APIView):
         """
         Proxy: Get all premium plans (admin)
         """
-        url = f"{settings.USER_SERVICE_URL}/api/v1/user/admin/premium/plan/"
-
-        response = requests.get(
-            url,
+        response = get_upstream("user").get(
+            PREMIUM_PLAN_PATH,
             headers={
                 "Authorization": request.headers.get("Authorization"),
             },
@@ -27,10 +26,8 @@ class AdminPremiumPlanProxyView(APIView):
         """
         Proxy: Create / Update premium plan
         """
-        url = f"{settings.USER_SERVICE_URL}/api/v1/user/admin/premium/plan/"
-
-        response = requests.post(
-            url,
+        response = get_upstream("user").post(
+            PREMIUM_PLAN_PATH,
             json=request.data,
             headers={
                 "Authorization": request.headers.get("Authorization"),
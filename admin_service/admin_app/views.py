@@ -1,5 +1,5 @@
 import requests
-from django.conf import settings
+from admin_service.common.http_client import get_upstream
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -23,8 +23,8 @@ class AdminUserListView(APIView):
             return Response({"detail": "Missing Authorization header"}, status=401)
 
         try:
-            resp = requests.get(
-                f"{settings.AUTH_SERVICE_URL}/api/v1/auth/internal/admin/users/",
+            resp = get_upstream("auth").get(
+                "/api/v1/auth/internal/admin/users/",
                 headers=headers,
                 timeout=5,
             )
@@ -64,8 +64,8 @@ class AdminUserStatusView(APIView):
             )
 
         try:
-            resp = requests.post(
-                f"{settings.AUTH_SERVICE_URL}/api/v1/auth/internal/admin/users/{user_id}/status/",
+            resp = get_upstream("auth").post(
+                f"/api/v1/auth/internal/admin/users/{user_id}/status/",
                 headers=headers,
                 json={"is_active": is_active},
                 timeout=5,
@@ -98,8 +98,8 @@ class AdminTrainerListView(APIView):
             return Response({"detail": "Missing Authorization header"}, status=401)
 
         try:
-            resp = requests.get(
-                f"{settings.AUTH_SERVICE_URL}/api/v1/auth/internal/admin/trainers/",
+            resp = get_upstream("auth").get(
+                "/api/v1/auth/internal/admin/trainers/",
                 headers=headers,
                 timeout=5,
             )
@@ -127,8 +127,8 @@ class AdminTrainerDetailView(APIView):
             )
 
         try:
-            trainer_resp = requests.get(
-                f"{settings.TRAINER_SERVICE_URL}/api/v1/trainer/internal/admin/trainers/{user_id}/profile/",
+            trainer_resp = get_upstream("trainer").get(
+                f"/api/v1/trainer/internal/admin/trainers/{user_id}/profile/",
                 headers=headers,
                 timeout=5,
             )
@@ -181,8 +181,8 @@ class AdminApproveTrainerView(APIView):
             return Response({"detail": "Missing Authorization header"}, status=401)
 
         try:
-            resp = requests.post(
-                f"{settings.AUTH_SERVICE_URL}/api/v1/auth/internal/admin/trainers/{user_id}/approve/",
+            resp = get_upstream("auth").post(
+                f"/api/v1/auth/internal/admin/trainers/{user_id}/approve/",
                 headers=headers,
                 timeout=5,
             )
@@ -1,3 +1,8 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
 from types import SimpleNamespace
 
 from django.conf import settings
@@ -6,6 +11,47 @@ from rest_framework_simplejwt.backends import TokenBackend
 from rest_framework_simplejwt.exceptions import TokenError
 
 
+# verified claims are cached per token so repeat requests skip the HMAC check
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "10000"))
+
+_backend = TokenBackend(
+    algorithm=settings.SIMPLE_JWT.get("ALGORITHM", "HS256"),
+    signing_key=settings.SIMPLE_JWT.get("SIGNING_KEY"),
+)
+_claims_cache = OrderedDict()  # sha256(token) -> (payload, exp)
+_claims_lock = threading.Lock()
+
+
+def decode_token(token):
+    """
+    Verify ``token`` and return its claims. Verified claims stay in a
+    bounded LRU until the token's ``exp``; raises ``TokenError`` like
+    ``TokenBackend.decode`` for invalid or expired tokens.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    now = time.time()
+
+    with _claims_lock:
+        cached = _claims_cache.get(key)
+        if cached is not None:
+            payload, exp = cached
+            if exp > now:
+                _claims_cache.move_to_end(key)
+                return dict(payload)
+            del _claims_cache[key]
+
+    payload = _backend.decode(token, verify=True)
+
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)) and exp > now:
+        with _claims_lock:
+            _claims_cache[key] = (payload, exp)
+            if len(_claims_cache) > JWT_CACHE_SIZE:
+                _claims_cache.popitem(last=False)
+
+    return dict(payload)
+
+
 class SimpleJWTAuth(authentication.BaseAuthentication):
     def authenticate(self, request):
         header = request.META.get("HTTP_AUTHORIZATION", "")
@@ -15,11 +61,7 @@ class SimpleJWTAuth(authentication.BaseAuthentication):
         token = header.split(" ", 1)[1].strip()
 
         try:
-            backend = TokenBackend(
-                algorithm=settings.SIMPLE_JWT["ALGORITHM"],
-                signing_key=settings.SIMPLE_JWT["SIGNING_KEY"],
-            )
-            payload = backend.decode(token, verify=True)
+            payload = decode_token(token)
         except TokenError as e:
             raise exceptions.AuthenticationFailed(str(e))
 
@@ -0,0 +1,205 @@
+"""
+Pooled HTTP client for calls between internal services.
+
+One keep-alive ``requests.Session`` per upstream per process, bounded
+retries with jittered backoff, per-call timeouts and simple in-process
+latency metrics tagged by upstream.
+
+Usage:
+    resp = get_upstream("auth").post("/api/v1/auth/internal/users/bulk/", json=...)
+"""
+
+import logging
+import random
+import threading
+import time
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# upstream name -> settings attribute holding its base URL
+UPSTREAM_URL_SETTINGS = {
+    "auth": "AUTH_SERVICE_URL",
+    "user": "USER_SERVICE_URL",
+    "trainer": "TRAINER_SERVICE_URL",
+    "ai": "AI_SERVICE_BASE_URL",
+}
+
+DEFAULT_TIMEOUT = (2, 5)  # (connect, read) seconds
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.1
+DEFAULT_POOL_SIZE = 20
+
+RETRY_STATUSES = frozenset({502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+class UpstreamMetrics:
+    """Thread-safe request/latency counters keyed by upstream."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def record(self, upstream, outcome, elapsed):
+        with self._lock:
+            entry = self._data.setdefault(
+                upstream,
+                {
+                    "requests": 0,
+                    "errors": 0,
+                    "retries": 0,
+                    "latency_total_ms": 0.0,
+                    "latency_max_ms": 0.0,
+                    "outcomes": {},
+                },
+            )
+            elapsed_ms = elapsed * 1000
+            entry["requests"] += 1
+            entry["latency_total_ms"] += elapsed_ms
+            entry["latency_max_ms"] = max(entry["latency_max_ms"], elapsed_ms)
+            entry["outcomes"][outcome] = entry["outcomes"].get(outcome, 0) + 1
+            if outcome == "error" or str(outcome).startswith("5"):
+                entry["errors"] += 1
+
+    def record_retry(self, upstream):
+        with self._lock:
+            entry = self._data.get(upstream)
+            if entry is not None:
+                entry["retries"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            result = {}
+            for upstream, entry in self._data.items():
+                count = entry["requests"] or 1
+                result[upstream] = {
+                    **entry,
+                    "outcomes": dict(entry["outcomes"]),
+                    "latency_avg_ms": round(entry["latency_total_ms"] / count, 2),
+                }
+            return result
+
+
+metrics = UpstreamMetrics()
+
+
+class UpstreamClient:
+    def __init__(
+        self,
+        name,
+        base_url,
+        *,
+        timeout=DEFAULT_TIMEOUT,
+        retries=DEFAULT_RETRIES,
+        backoff=DEFAULT_BACKOFF,
+        pool_size=DEFAULT_POOL_SIZE,
+    ):
+        self.name = name
+        self.base_url = (base_url or "").rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _url(self, path):
+        if path.startswith(("http://", "https://")):
+            return path
+        return f"{self.base_url}{path}"
+
+    def _sleep_before_retry(self, attempt):
+        # full jitter: spread retries so callers don't stampede a recovering upstream
+        time.sleep(random.uniform(0, self.backoff * (2**attempt)))
+        metrics.record_retry(self.name)
+
+    def request(self, method, path, *, timeout=None, retries=None, idempotent=None, **kwargs):
+        """
+        Send a request to this upstream and return the ``requests.Response``.
+
+        Transport errors are re-raised as the usual ``requests`` exceptions
+        after retries are exhausted. Non-idempotent methods are only retried
+        when the connection could not be established, unless the caller
+        passes ``idempotent=True`` (e.g. read-only bulk POST lookups).
+        """
+        method = method.upper()
+        url = self._url(path)
+        timeout = timeout if timeout is not None else self.timeout
+        retries = self.retries if retries is None else retries
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            try:
+                resp = self.session.request(method, url, timeout=timeout, **kwargs)
+            except requests.RequestException as exc:
+                metrics.record(self.name, "error", time.monotonic() - started)
+                can_retry = isinstance(exc, requests.ConnectTimeout) or (
+                    idempotent
+                    and isinstance(exc, (requests.ConnectionError, requests.Timeout))
+                )
+                if can_retry and attempt < retries:
+                    logger.warning(
+                        "upstream=%s %s %s failed (%s), retrying",
+                        self.name,
+                        method,
+                        path,
+                        exc.__class__.__name__,
+                    )
+                    self._sleep_before_retry(attempt)
+                    attempt += 1
+                    continue
+                raise
+
+            elapsed = time.monotonic() - started
+            metrics.record(self.name, resp.status_code, elapsed)
+            logger.debug(
+                "upstream=%s %s %s status=%s elapsed_ms=%.1f",
+                self.name,
+                method,
+                path,
+                resp.status_code,
+                elapsed * 1000,
+            )
+
+            if resp.status_code in RETRY_STATUSES and idempotent and attempt < retries:
+                resp.close()
+                self._sleep_before_retry(attempt)
+                attempt += 1
+                continue
+
+            return resp
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_upstream(name):
+    """Return the process-wide client for ``name`` (auth/user/trainer/ai)."""
+    client = _clients.get(name)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        client = _clients.get(name)
+        if client is None:
+            setting = UPSTREAM_URL_SETTINGS.get(name)
+            base_url = getattr(settings, setting, None) if setting else None
+            client = UpstreamClient(name, base_url)
+            _clients[name] = client
+        return client
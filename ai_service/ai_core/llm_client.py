@@ -1,11 +1,17 @@
 from django.conf import settings
 from openai import OpenAI
 
+# one client per process so its keep-alive connection pool is reused
+_client = None
+
 
 def get_client():
+    global _client
     if not settings.OPENAI_API_KEY:
         raise RuntimeError("OPENAI_API_KEY is not set")
-    return OpenAI(api_key=settings.OPENAI_API_KEY)
+    if _client is None:
+        _client = OpenAI(api_key=settings.OPENAI_API_KEY)
+    return _client
 
 
 def ask_ai(system_prompt: str, user_prompt: str):
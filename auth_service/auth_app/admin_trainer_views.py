@@ -1,4 +1,5 @@
 # auth_service/admin/admin_trainer_views.py
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from rest_framework import permissions, status
 from rest_framework.response import Response
@@ -7,6 +8,7 @@ from rest_framework.views import APIView
 from .models import User
 from .permission import IsAdmin
 from .serializers import AdminTrainerListSerializer
+from .utils.user_cache import invalidate_users
 
 
 class AdminTrainerListView(APIView):
@@ -35,6 +37,7 @@ class AdminApproveTrainerView(APIView):
 
         trainer.is_approved = True
         trainer.save(update_fields=["is_approved"])
+        transaction.on_commit(lambda: invalidate_users(trainer.id))
 
         return Response(
             {"detail": "Trainer approved successfully"}, status=status.HTTP_200_OK
@@ -1,4 +1,5 @@
 # auth_service/admin/admin_user_views.py
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from rest_framework import permissions, status
 from rest_framework.response import Response
@@ -7,6 +8,8 @@ from rest_framework.views import APIView
 from .models import User
 from .permission import IsAdmin
 from .serializers import AdminUserListSerializer, AdminUserStatusSerializer
+from .utils.outbox import enqueue_user_updated
+from .utils.user_cache import invalidate_users
 
 
 class AdminUserListView(APIView):
@@ -34,8 +37,11 @@ class AdminUserStatusView(APIView):
                 {"detail": "User already in requested state"}, status=status.HTTP_200_OK
             )
 
-        user.is_active = is_active
-        user.save(update_fields=["is_active"])
+        with transaction.atomic():
+            user.is_active = is_active
+            user.save(update_fields=["is_active"])
+            enqueue_user_updated(user)
+            transaction.on_commit(lambda: invalidate_users(user.id))
 
         return Response(
             {"detail": "User status updated", "is_active": user.is_active},
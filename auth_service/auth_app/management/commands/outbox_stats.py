@@ -0,0 +1,12 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from auth_app.utils.outbox import relay_snapshot
+
+
+class Command(BaseCommand):
+    help = "Print outbox backlog, relay lag and batch throughput"
+
+    def handle(self, *args, **options):
+        self.stdout.write(json.dumps(relay_snapshot(), indent=2))
@@ -80,3 +80,37 @@ class RefreshTokenRecord(models.Model):
 
     def is_active(self):
         return (not self.revoked) and (self.expires_at > timezone.now())
+
+
+class OutboxEvent(models.Model):
+    """
+    Domain event written in the same transaction as the change it
+    describes; ``relay_outbox`` publishes pending rows to RabbitMQ.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    message_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    routing_key = models.CharField(max_length=100)
+    payload = models.JSONField()
+    created_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(blank=True, null=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    # set once the row failed OUTBOX_RELAY_MAX_ATTEMPTS times
+    failed_at = models.DateTimeField(blank=True, null=True)
+    # a relay is publishing the row until then
+    locked_until = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # the relay only ever scans pending rows in id order
+            models.Index(
+                fields=["id"],
+                name="outbox_pending_idx",
+                condition=models.Q(sent_at__isnull=True, failed_at__isnull=True),
+            ),
+            models.Index(fields=["sent_at"], name="outbox_sent_at_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.routing_key} {self.message_id}"
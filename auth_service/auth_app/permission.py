@@ -1,3 +1,6 @@
+import hmac
+
+from django.conf import settings
 from rest_framework.permissions import BasePermission
 
 
@@ -8,3 +11,15 @@ class IsAdmin(BasePermission):
             and request.user.is_authenticated
             and request.user.role == "admin"
         )
+
+
+class IsInternalService(BasePermission):
+    """
+    Service-to-service calls that have no end-user token (backfills,
+    reconciliation jobs) authenticate with the shared X-Internal-Token.
+    """
+
+    def has_permission(self, request, view):
+        expected = getattr(settings, "INTERNAL_SERVICE_TOKEN", "")
+        provided = request.headers.get("X-Internal-Token", "")
+        return bool(expected) and hmac.compare_digest(provided, expected)
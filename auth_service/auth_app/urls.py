@@ -4,7 +4,9 @@ from .admin_trainer_views import AdminApproveTrainerView, AdminTrainerListView
 from .admin_user_views import AdminUserListView, AdminUserStatusView
 from .user_trainer_views import (
     ApprovedTrainerListView,
+    BulkUserDirectoryView,
     BulkUserInfoView,
+    UserDirectoryPageView,
     UsersByIdsView,
 )
 from .views import (
@@ -66,4 +68,14 @@ urlpatterns = [
         "internal/users/by-ids/",
         UsersByIdsView.as_view(),
     ),
+    # service url for directory backfills (X-Internal-Token)
+    path(
+        "internal/users/directory/",
+        UserDirectoryPageView.as_view(),
+    ),
+    # cached bulk lookup shared by user / trainer / admin services
+    path(
+        "internal/users/directory/lookup/",
+        BulkUserDirectoryView.as_view(),
+    ),
 ]
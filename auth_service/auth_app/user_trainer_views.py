@@ -1,8 +1,15 @@
+import uuid
+from datetime import datetime
+
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from .models import User
+from .permission import IsInternalService
+from .utils.user_cache import USER_LOOKUP_MAX_IDS, get_users
+
+DIRECTORY_PAGE_MAX = 1000
 
 
 class ApprovedTrainerListView(APIView):
@@ -26,47 +33,135 @@ class ApprovedTrainerListView(APIView):
         )
 
 
-# to see name in booking details
+def _lookup_users(request):
+    """
+    Shared body of the bulk lookup endpoints: validates ``user_ids`` and
+    returns ``(entries, None)`` or ``(None, error_response)``.
+    """
+    user_ids = request.data.get("user_ids")
+
+    if not isinstance(user_ids, list) or not user_ids:
+        return None, Response(
+            {"detail": "user_ids must be a non-empty list"},
+            status=400,
+        )
+
+    if len(user_ids) > USER_LOOKUP_MAX_IDS:
+        return None, Response(
+            {"detail": f"at most {USER_LOOKUP_MAX_IDS} user_ids per call"},
+            status=400,
+        )
+
+    return list(get_users(user_ids).values()), None
+
+
+# bulk user directory lookup (Redis hash per user, DB on miss)
+class BulkUserDirectoryView(APIView):
+    permission_classes = [IsAuthenticated | IsInternalService]
+
+    def post(self, request):
+        entries, error = _lookup_users(request)
+        if error:
+            return error
+
+        return Response(
+            [
+                {
+                    "user_id": u["user_id"],
+                    "name": u["name"],
+                    "email": u["email"],
+                    "role": u["role"],
+                    "is_active": u["is_active"],
+                }
+                for u in entries
+            ]
+        )
+
+
+# to see name in booking details (adapter over the directory lookup)
 class UsersByIdsView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        user_ids = request.data.get("user_ids", [])
+        if not request.data.get("user_ids"):
+            return Response([])
 
-        users = User.objects.filter(id__in=user_ids)
+        entries, error = _lookup_users(request)
+        if error:
+            return error
 
         return Response(
             [
                 {
-                    "user_id": str(u.id),
-                    "name": u.name if u.name else u.email,
+                    "user_id": u["user_id"],
+                    "name": u["name"] if u["name"] else u["email"],
                 }
-                for u in users
+                for u in entries
             ]
         )
 
 
-# to se user name in trainer pending clients view
+# to se user name in trainer pending clients view (adapter over the directory lookup)
 class BulkUserInfoView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        user_ids = request.data.get("user_ids")
-
-        if not isinstance(user_ids, list) or not user_ids:
-            return Response(
-                {"detail": "user_ids must be a non-empty list"},
-                status=400,
-            )
-
-        users = User.objects.filter(id__in=user_ids).only("id", "name")
+        entries, error = _lookup_users(request)
+        if error:
+            return error
 
         data = [
             {
-                "id": str(user.id),
-                "name": user.name,
+                "id": u["user_id"],
+                "name": u["name"],
             }
-            for user in users
+            for u in entries
         ]
 
         return Response(data, status=200)
+
+
+# keyset-paginated user dump for consumer backfills / reconciliation
+class UserDirectoryPageView(APIView):
+    authentication_classes = []
+    permission_classes = [IsInternalService]
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get("limit", 500))
+        except ValueError:
+            return Response({"detail": "limit must be an integer"}, status=400)
+
+        limit = max(1, min(limit, DIRECTORY_PAGE_MAX))
+
+        qs = User.objects.order_by("id")
+
+        after = request.query_params.get("after")
+        if after:
+            try:
+                qs = qs.filter(id__gt=uuid.UUID(after))
+            except ValueError:
+                return Response({"detail": "after must be a UUID"}, status=400)
+
+        role = request.query_params.get("role")
+        if role:
+            qs = qs.filter(role=role)
+
+        # same clock as the events' occurred_at, so consumers can order them
+        read_at = datetime.utcnow().isoformat() + "Z"
+        rows = list(qs.values("id", "email", "name", "role", "is_active")[:limit])
+
+        results = [
+            {
+                "user_id": str(row["id"]),
+                "email": row["email"],
+                "name": row["name"],
+                "role": row["role"],
+                "is_active": row["is_active"],
+                "occurred_at": read_at,
+            }
+            for row in rows
+        ]
+        next_after = results[-1]["user_id"] if len(results) == limit else None
+
+        return Response({"results": results, "next_after": next_after})
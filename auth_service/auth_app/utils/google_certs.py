@@ -0,0 +1,169 @@
+import json
+import logging
+import re
+import threading
+import time
+
+import redis
+from auth_service.common.http_client import get_upstream
+from django.conf import settings
+from google.auth import jwt as google_jwt
+
+logger = logging.getLogger(__name__)
+
+redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+CERTS_KEY = "google:oauth2:certs"
+REFRESH_LOCK_KEY = "google:oauth2:certs:refresh"
+
+DEFAULT_TTL = getattr(settings, "GOOGLE_CERTS_DEFAULT_TTL", 3600)
+MIN_TTL = 60
+# refetch in the background once less than this many seconds are left
+REFRESH_AHEAD = getattr(settings, "GOOGLE_CERTS_REFRESH_AHEAD", 300)
+CLOCK_SKEW = getattr(settings, "GOOGLE_TOKEN_CLOCK_SKEW", 0)
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+# per-process copy: {"certs": {kid: pem}, "expires_at": epoch seconds}
+_local = {"certs": None, "expires_at": 0.0, "fetched_at": 0.0}
+_fetch_lock = threading.Lock()
+_refreshing = threading.Event()
+
+
+def _ttl_from_headers(headers) -> int:
+    match = _MAX_AGE_RE.search(headers.get("Cache-Control", ""))
+    if not match:
+        return DEFAULT_TTL
+    ttl = int(match.group(1))
+    try:
+        ttl -= int(headers.get("Age", 0))
+    except ValueError:
+        pass
+    return max(ttl, MIN_TTL)
+
+
+def _fetch_from_google():
+    resp = get_upstream("google").get(GOOGLE_CERTS_URL, timeout=(2, 5))
+    resp.raise_for_status()
+    certs = resp.json()
+    expires_at = time.time() + _ttl_from_headers(resp.headers)
+    return certs, expires_at
+
+
+def _store(certs, expires_at):
+    _local["certs"] = certs
+    _local["expires_at"] = expires_at
+    try:
+        redis_client.set(
+            CERTS_KEY,
+            json.dumps({"certs": certs, "expires_at": expires_at}),
+            ex=max(int(expires_at - time.time()), 1),
+        )
+    except redis.exceptions.RedisError as e:
+        logger.warning("Redis error storing Google certs: %s", e)
+
+
+def _load_shared():
+    try:
+        raw = redis_client.get(CERTS_KEY)
+    except redis.exceptions.RedisError as e:
+        logger.warning("Redis error reading Google certs: %s", e)
+        return False
+    if not raw:
+        return False
+
+    data = json.loads(raw)
+    if data["expires_at"] <= time.time():
+        return False
+    _local["certs"] = data["certs"]
+    _local["expires_at"] = data["expires_at"]
+    return True
+
+
+def refresh_certs():
+    """Fetch from Google and publish to this process and Redis."""
+    certs, expires_at = _fetch_from_google()
+    _local["fetched_at"] = time.time()
+    _store(certs, expires_at)
+    logger.info(
+        "Google certs refreshed: %d keys, ttl=%ds",
+        len(certs),
+        int(expires_at - time.time()),
+    )
+    return certs
+
+
+def _background_refresh():
+    try:
+        # pick up a copy another worker already refreshed
+        if _load_shared() and _local["expires_at"] - time.time() > REFRESH_AHEAD:
+            return
+        # one worker across the fleet does the refetch
+        try:
+            if not redis_client.set(REFRESH_LOCK_KEY, "1", nx=True, ex=30):
+                return
+        except redis.exceptions.RedisError:
+            pass
+        refresh_certs()
+    except Exception:
+        logger.exception("Background Google certs refresh failed")
+    finally:
+        _refreshing.clear()
+
+
+def _schedule_refresh():
+    if _refreshing.is_set():
+        return
+    _refreshing.set()
+    threading.Thread(
+        target=_background_refresh, name="google-certs-refresh", daemon=True
+    ).start()
+
+
+def get_certs(force=False):
+    """
+    Google's signing certificates keyed by ``kid``. Served from memory,
+    then Redis, then Google; only a cold start (or ``force``) blocks on
+    the outbound fetch.
+    """
+    now = time.time()
+    if not force and _local["certs"] and _local["expires_at"] > now:
+        if _local["expires_at"] - now < REFRESH_AHEAD:
+            _schedule_refresh()
+        return _local["certs"]
+
+    with _fetch_lock:
+        if not force and _local["certs"] and _local["expires_at"] > time.time():
+            return _local["certs"]
+        if not force and _load_shared():
+            return _local["certs"]
+        return refresh_certs()
+
+
+def verify_google_id_token(token, audience):
+    """
+    Same checks as ``google.oauth2.id_token.verify_oauth2_token`` but with
+    cached certificates. Raises ``ValueError`` for an invalid token.
+    """
+    certs = get_certs()
+
+    # Google rotated keys since we cached them: refetch, but at most once a
+    # minute so tokens with made-up kids can't drive outbound fetches
+    kid = google_jwt.decode_header(token).get("kid")
+    if kid and kid not in certs and time.time() - _local["fetched_at"] > MIN_TTL:
+        certs = get_certs(force=True)
+
+    payload = google_jwt.decode(
+        token,
+        certs=certs,
+        audience=audience,
+        clock_skew_in_seconds=CLOCK_SKEW,
+    )
+
+    if payload.get("iss") not in GOOGLE_ISSUERS:
+        raise ValueError(f"Wrong issuer: {payload.get('iss')}")
+
+    return payload
@@ -0,0 +1,229 @@
+"""
+Transactional outbox for auth domain events.
+
+Views write an ``OutboxEvent`` in the same transaction as the user row,
+so an event exists if and only if the change committed. The
+``relay_outbox`` command leases a batch of pending rows in id order (a
+short transaction), publishes them on a confirm-mode channel with no DB
+locks held, and marks the confirmed ones sent with a single UPDATE.
+Delivery is at-least-once: a crash between the broker confirm and that
+UPDATE republishes the batch with the same ``message_id`` once the lease
+runs out.
+
+A row that fails to publish ``RELAY_MAX_ATTEMPTS`` times is parked
+(``failed_at``) so it cannot hold back the events behind it; parked rows
+are counted by ``outbox_stats``.
+"""
+
+import json
+import logging
+import time
+from datetime import timedelta
+
+import redis
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Min, Q
+from django.utils import timezone
+
+from ..models import OutboxEvent
+from .rabbit_producer import (
+    ROUTING_KEY,
+    TRAINER_ROUTING_KEY,
+    USER_UPDATED_ROUTING_KEY,
+    directory_fields,
+)
+from .rabbit_publisher import EXCHANGE, make_properties
+
+try:
+    from pika.exceptions import AMQPError
+except Exception:
+    AMQPError = Exception
+
+logger = logging.getLogger(__name__)
+
+redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+RELAY_BATCH_SIZE = getattr(settings, "OUTBOX_RELAY_BATCH_SIZE", 200)
+RETENTION_DAYS = getattr(settings, "OUTBOX_RETENTION_DAYS", 7)
+RELAY_MAX_ATTEMPTS = getattr(settings, "OUTBOX_RELAY_MAX_ATTEMPTS", 10)
+# must cover publishing one batch; a crashed relay's rows come back after it
+RELAY_LEASE_SECONDS = getattr(settings, "OUTBOX_RELAY_LEASE_SECONDS", 60)
+
+PENDING = Q(sent_at__isnull=True, failed_at__isnull=True)
+
+METRICS_KEY = "outbox:relay"
+LAG_BUCKETS_SECONDS = (1, 5, 30, 120, 600)
+
+
+def enqueue_event(routing_key, payload):
+    """Record an event; call inside the transaction that makes the change."""
+    return OutboxEvent.objects.create(routing_key=routing_key, payload=payload)
+
+
+def _user_payload(user):
+    return {
+        "user_id": str(user.id),
+        "email": user.email,
+        **directory_fields(user),
+    }
+
+
+def enqueue_user_created(user):
+    return enqueue_event(ROUTING_KEY, _user_payload(user))
+
+
+def enqueue_trainer_registered(user):
+    return enqueue_event(TRAINER_ROUTING_KEY, _user_payload(user))
+
+
+def enqueue_user_updated(user):
+    return enqueue_event(USER_UPDATED_ROUTING_KEY, _user_payload(user))
+
+
+def record_batch(published, elapsed_seconds, lag_seconds):
+    bucket = next(
+        (f"lag_le_{b}s" for b in LAG_BUCKETS_SECONDS if lag_seconds <= b),
+        "lag_le_inf",
+    )
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hincrby(METRICS_KEY, "batches", 1)
+        pipe.hincrby(METRICS_KEY, "published", published)
+        pipe.hincrbyfloat(METRICS_KEY, "batch_total_ms", elapsed_seconds * 1000)
+        pipe.hincrby(METRICS_KEY, bucket, 1)
+        pipe.hset(
+            METRICS_KEY,
+            mapping={
+                "last_batch_size": published,
+                "last_batch_ms": round(elapsed_seconds * 1000, 1),
+                "last_lag_s": round(lag_seconds, 3),
+                "last_batch_at": time.time(),
+            },
+        )
+        pipe.execute()
+    except redis.exceptions.RedisError as e:
+        logger.warning("Redis error recording outbox metrics: %s", e)
+
+
+def _lease_batch(batch_size):
+    """Pending rows not leased by another relay, leased to this one."""
+    now = timezone.now()
+    with transaction.atomic():
+        # skip_locked lets several relays share the table without overlap
+        rows = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(PENDING)
+            .filter(Q(locked_until__isnull=True) | Q(locked_until__lt=now))
+            .order_by("id")[:batch_size]
+        )
+        if rows:
+            OutboxEvent.objects.filter(id__in=[row.id for row in rows]).update(
+                locked_until=now + timedelta(seconds=RELAY_LEASE_SECONDS)
+            )
+    return rows
+
+
+def _settle_batch(rows, published, error):
+    now = timezone.now()
+    with transaction.atomic():
+        if published:
+            OutboxEvent.objects.filter(id__in=published).update(
+                sent_at=now, locked_until=None
+            )
+        if error is None:
+            return now
+
+        failed = rows[len(published)]
+        parked = failed.attempts + 1 >= RELAY_MAX_ATTEMPTS
+        OutboxEvent.objects.filter(id=failed.id).update(
+            attempts=F("attempts") + 1,
+            last_error=str(error)[:1000],
+            failed_at=now if parked else None,
+            locked_until=None,
+        )
+        OutboxEvent.objects.filter(
+            id__in=[row.id for row in rows[len(published) + 1 :]]
+        ).update(locked_until=None)
+
+    if parked:
+        logger.error(
+            "Outbox event %s (%s) failed %d times, parked: %s",
+            failed.message_id,
+            failed.routing_key,
+            failed.attempts + 1,
+            error,
+        )
+    return now
+
+
+def relay_batch(channel, batch_size=RELAY_BATCH_SIZE):
+    """
+    Publish up to ``batch_size`` pending events on ``channel`` (which must
+    be in confirm mode) and mark them sent. Returns the number published.
+    On a broker error the confirmed prefix is still marked sent, the
+    failing row records the error (and is parked after
+    ``RELAY_MAX_ATTEMPTS``), the rest of the batch is released, and the
+    exception is re-raised.
+    """
+    started = time.monotonic()
+    rows = _lease_batch(batch_size)
+    if not rows:
+        return 0
+
+    published = []
+    error = None
+    for row in rows:
+        try:
+            channel.basic_publish(
+                exchange=EXCHANGE,
+                routing_key=row.routing_key,
+                body=json.dumps(row.payload, ensure_ascii=False),
+                properties=make_properties(str(row.message_id)),
+            )
+        except AMQPError as exc:
+            error = exc
+            break
+        published.append(row.id)
+
+    now = _settle_batch(rows, published, error)
+
+    lag = (now - rows[0].created_at).total_seconds()
+    record_batch(len(published), time.monotonic() - started, lag)
+
+    if error is not None:
+        raise error
+    return len(published)
+
+
+def purge_sent(days=RETENTION_DAYS):
+    """Delete events sent more than ``days`` ago. Returns the row count."""
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = OutboxEvent.objects.filter(sent_at__lt=cutoff).delete()
+    return deleted
+
+
+def relay_snapshot():
+    """Pending backlog from the DB plus the relay's throughput/lag counters."""
+    pending = OutboxEvent.objects.filter(PENDING)
+    oldest = pending.aggregate(oldest=Min("created_at"))["oldest"]
+
+    data = redis_client.hgetall(METRICS_KEY)
+    batches = int(data.pop("batches", 0))
+    batch_total_ms = float(data.pop("batch_total_ms", 0))
+    published = int(data.pop("published", 0))
+
+    return {
+        "pending": pending.count(),
+        "failed": OutboxEvent.objects.filter(failed_at__isnull=False).count(),
+        "oldest_pending_age_s": (
+            round((timezone.now() - oldest).total_seconds(), 1) if oldest else 0.0
+        ),
+        "published": published,
+        "batches": batches,
+        "avg_batch_ms": round(batch_total_ms / batches, 1) if batches else 0.0,
+        "events_per_second": (
+            round(published / (batch_total_ms / 1000), 1) if batch_total_ms else 0.0
+        ),
+        **data,
+    }
@@ -0,0 +1,172 @@
+"""
+Cache-aside directory of auth users (``user_dir:<id>`` hashes).
+
+Fills race with invalidations: a reader can load a row, the writer
+commits and invalidates, and only then the reader writes its old row
+back. Each user therefore has a generation counter
+(``user_dir_gen:<id>``) that ``invalidate_users`` bumps. Readers note
+the generation before the DB query and the write-back only lands if it
+is unchanged.
+"""
+
+import logging
+import uuid
+
+import redis
+from django.conf import settings
+
+from ..models import User
+
+logger = logging.getLogger(__name__)
+
+redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+USER_CACHE_TTL = getattr(settings, "USER_CACHE_TTL_SECONDS", 3600)
+USER_LOOKUP_MAX_IDS = getattr(settings, "USER_LOOKUP_MAX_IDS", 1000)
+
+# generations only have to outlive a reader's DB query
+GENERATION_TTL = 24 * 3600
+
+# order matters: HMGET returns values in this order
+CACHE_FIELDS = ("email", "name", "role", "is_active", "is_approved")
+BOOL_FIELDS = ("is_active", "is_approved")
+
+
+def _user_key(user_id) -> str:
+    return f"user_dir:{user_id}"
+
+
+def _generation_key(user_id) -> str:
+    return f"user_dir_gen:{user_id}"
+
+
+# KEYS: generation key, entry key
+# ARGV: generation seen before the DB read, ttl, field, value, ...
+_FILL = redis_client.register_script(
+    """
+    if (redis.call('GET', KEYS[1]) or '0') ~= ARGV[1] then
+        return 0
+    end
+    redis.call('HSET', KEYS[2], unpack(ARGV, 3))
+    redis.call('EXPIRE', KEYS[2], ARGV[2])
+    return 1
+    """
+)
+
+
+def _normalize_ids(user_ids):
+    """Dedupe, keep request order and drop anything that is not a UUID."""
+    seen = {}
+    for raw in user_ids or []:
+        try:
+            seen.setdefault(str(uuid.UUID(str(raw))), None)
+        except ValueError:
+            continue
+    return list(seen)
+
+
+def _decode(user_id, values):
+    entry = dict(zip(CACHE_FIELDS, values))
+    entry["name"] = entry["name"] or None
+    for field in BOOL_FIELDS:
+        entry[field] = entry[field] == "1"
+    return {"user_id": user_id, **entry}
+
+
+def _encode(entry):
+    mapping = {field: entry[field] or "" for field in CACHE_FIELDS}
+    for field in BOOL_FIELDS:
+        mapping[field] = "1" if entry[field] else "0"
+    return mapping
+
+
+def _read_cached(user_ids):
+    """``(found, generations)``; generations are read in the same round trip."""
+    pipe = redis_client.pipeline(transaction=False)
+    for user_id in user_ids:
+        pipe.hmget(_user_key(user_id), CACHE_FIELDS)
+        pipe.get(_generation_key(user_id))
+    results = pipe.execute()
+
+    found, generations = {}, {}
+    for user_id, values, generation in zip(user_ids, results[::2], results[1::2]):
+        # email is never empty, so a missing email means a cache miss
+        if values[0] is not None:
+            found[user_id] = _decode(user_id, values)
+        generations[user_id] = generation or "0"
+    return found, generations
+
+
+def _write_cached(entries, generations):
+    """Write back DB rows, skipping users invalidated since ``generations``."""
+    pipe = redis_client.pipeline(transaction=False)
+    for user_id, entry in entries.items():
+        args = [generations[user_id], USER_CACHE_TTL]
+        for field, value in _encode(entry).items():
+            args += [field, value]
+        _FILL(
+            keys=[_generation_key(user_id), _user_key(user_id)],
+            args=args,
+            client=pipe,
+        )
+    pipe.execute()
+
+
+def get_users(user_ids):
+    """
+    ``{user_id: {user_id, email, name, role, is_active, is_approved}}`` for
+    the given ids, in request order. One pipelined round trip to Redis for
+    the whole list, one ``id__in`` query for the misses, which are then
+    written back. Unknown ids are simply absent from the result.
+    """
+    ids = _normalize_ids(user_ids)
+    if not ids:
+        return {}
+
+    cache_ok = True
+    try:
+        found, generations = _read_cached(ids)
+    except redis.exceptions.RedisError as e:
+        logger.warning("Redis error reading user cache, using DB: %s", e)
+        found, generations = {}, {}
+        cache_ok = False
+
+    missing = [user_id for user_id in ids if user_id not in found]
+    if missing:
+        rows = User.objects.filter(id__in=missing).values("id", *CACHE_FIELDS)
+        loaded = {
+            str(row["id"]): {
+                "user_id": str(row["id"]),
+                **{field: row[field] for field in CACHE_FIELDS},
+            }
+            for row in rows
+        }
+        for entry in loaded.values():
+            entry["name"] = entry["name"] or None
+        found.update(loaded)
+
+        if cache_ok and loaded:
+            try:
+                _write_cached(loaded, generations)
+            except redis.exceptions.RedisError as e:
+                logger.warning("Redis error filling user cache: %s", e)
+
+    return {user_id: found[user_id] for user_id in ids if user_id in found}
+
+
+def invalidate_users(*user_ids):
+    """
+    Drop cached entries and bump their generations so fills already in
+    flight are discarded; call from ``transaction.on_commit`` after a write.
+    """
+    if not user_ids:
+        return
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for user_id in user_ids:
+            pipe.incr(_generation_key(user_id))
+            pipe.expire(_generation_key(user_id), GENERATION_TTL)
+        pipe.delete(*(_user_key(user_id) for user_id in user_ids))
+        pipe.execute()
+    except redis.exceptions.RedisError:
+        logger.exception("Redis error invalidating user cache for %s", user_ids)
@@ -2,8 +2,6 @@ from django.conf import settings
 from django.contrib.auth import authenticate
 from django.db import IntegrityError, transaction
 from django.utils import timezone
-from google.auth.transport import requests as google_requests
-from google.oauth2 import id_token
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -22,6 +20,7 @@ from .serializers import (
 )
 from .tasks import send_otp_email_task
 from .tokens import get_token_pair
+from .utils.google_certs import verify_google_id_token
 from .utils.otp import (
     can_request_otp,
     delete_otp,
@@ -32,7 +31,12 @@ from .utils.otp import (
     store_otp,
     verify_otp,
 )
-from .utils.rabbit_producer import publish_trainer_registered, publish_user_created
+from .utils.outbox import (
+    enqueue_trainer_registered,
+    enqueue_user_created,
+    enqueue_user_updated,
+)
+from .utils.user_cache import invalidate_users
 
 
 class RequestOtpView(APIView):
@@ -102,7 +106,8 @@ class UserRegisterView(APIView):
                 user.is_verified = True
                 user.save(update_fields=["is_verified"])
 
-                transaction.on_commit(lambda: publish_user_created(user.id, user.email))
+                # same transaction as the user row: no commit, no event
+                enqueue_user_created(user)
         except IntegrityError:
             # email uniqueness race handled gracefully
             return Response(
@@ -167,9 +172,7 @@ class TrainerRegisterView(APIView):
                     update_fields=["is_verified"]
                 )  # is_approved already set on create
 
-                transaction.on_commit(
-                    lambda: publish_trainer_registered(user.id, user.email)
-                )
+                enqueue_trainer_registered(user)
         except IntegrityError:
             return Response(
                 {"email": "Email is already registered."},
@@ -256,9 +259,8 @@ class GoogleLoginView(APIView):
 
         # Verify token with Google
         try:
-            payload = id_token.verify_oauth2_token(
-                google_token, google_requests.Request(), settings.GOOGLE_CLIENT_ID
-            )
+            # certs come from the shared cache, not a fetch per login
+            payload = verify_google_id_token(google_token, settings.GOOGLE_CLIENT_ID)
         except ValueError:
             return Response(
                 {"detail": "Invalid Google token"}, status=status.HTTP_400_BAD_REQUEST
@@ -320,6 +322,8 @@ class GoogleLoginView(APIView):
                             ]
                         )
                         linked = True
+                        transaction.on_commit(lambda u=user: invalidate_users(u.id))
+                        enqueue_user_updated(user)
 
                 except User.DoesNotExist:
                     user = User.objects.create(
@@ -337,11 +341,7 @@ class GoogleLoginView(APIView):
                     created = True
 
             if created:
-                uid = str(user.id)
-                uemail = user.email
-                transaction.on_commit(
-                    lambda uid=uid, email=uemail: publish_user_created(uid, email)
-                )
+                enqueue_user_created(user)
 
         # ISSUE TOKENS USING THE HELPER (this replaces RefreshToken.for_user)
         tokens = get_token_pair(user)
@@ -378,6 +378,12 @@ class ProfileEditView(generics.RetrieveUpdateAPIView):
     def get_object(self):
         return self.request.user
 
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            user = serializer.save()
+            enqueue_user_updated(user)
+            transaction.on_commit(lambda: invalidate_users(user.id))
+
 
 class ForgotPasswordRequestView(APIView):
     permission_classes = [permissions.AllowAny]
@@ -157,6 +157,16 @@ OTP_TTL_SECONDS = 300
 OTP_RATE_LIMIT_TTL = 60
 OTP_LENGTH = 6
 
+# internal bulk user lookup (Redis hash per user)
+USER_CACHE_TTL_SECONDS = config("USER_CACHE_TTL_SECONDS", default=3600, cast=int)
+USER_LOOKUP_MAX_IDS = 1000
+
+# transactional outbox relay (auth_app.utils.outbox)
+OUTBOX_RELAY_BATCH_SIZE = config("OUTBOX_RELAY_BATCH_SIZE", default=200, cast=int)
+OUTBOX_RETENTION_DAYS = config("OUTBOX_RETENTION_DAYS", default=7, cast=int)
+OUTBOX_RELAY_MAX_ATTEMPTS = config("OUTBOX_RELAY_MAX_ATTEMPTS", default=10, cast=int)
+OUTBOX_RELAY_LEASE_SECONDS = config("OUTBOX_RELAY_LEASE_SECONDS", default=60, cast=int)
+
 
 # Email - dev settings using Gmail SMTP
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
@@ -186,6 +196,9 @@ REST_FRAMEWORK = {
 
 GOOGLE_CLIENT_ID = config("GOOGLE_CLIENT_ID", default="")
 
+# shared secret for service-to-service calls without an end-user token
+INTERNAL_SERVICE_TOKEN = config("INTERNAL_SERVICE_TOKEN", default="")
+
 CELERY_TASK_ALWAYS_EAGER = False
 
 # preferred: restrict CORS to dev origins (keeps behavior same as allow-all but safer)
@@ -37,10 +37,35 @@ case "${SERVICE_ROLE:-web}" in
     python manage.py run_rabbit_trainer_consumer
     ;;
 
+  directory_consumer)
+    wait_for "rabbitmq" "5672" "RabbitMQ"
+    echo "Starting TRAINER directory RabbitMQ consumer..."
+    python manage.py run_user_directory_consumer
+    ;;
+
+  booking_consumer)
+    wait_for "rabbitmq" "5672" "RabbitMQ"
+    echo "Starting TRAINER booking RabbitMQ consumer..."
+    python manage.py run_booking_consumer
+    ;;
+
+  outbox_relay)
+    wait_for "rabbitmq" "5672" "RabbitMQ"
+    echo "Starting TRAINER booking outbox relay..."
+    python manage.py relay_outbox
+    ;;
+
   celery_worker)
     wait_for "rabbitmq" "5672" "RabbitMQ"
     echo "Starting TRAINER Celery worker..."
-    celery -A trainer_service.celery worker -l info --pool=solo
+    celery -A trainer_service.celery worker -l info \
+      --pool=prefork --concurrency="${CELERY_CONCURRENCY:-2}"
+    ;;
+
+  celery_beat)
+    wait_for "rabbitmq" "5672" "RabbitMQ"
+    echo "Starting TRAINER Celery beat..."
+    celery -A trainer_service.celery beat -l info --schedule /tmp/celerybeat-schedule
     ;;
 
   *)
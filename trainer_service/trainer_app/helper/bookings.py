@@ -0,0 +1,237 @@
+"""
+The trainer's client roster (``TrainerClient``) and the trainer's decisions.
+
+user_service publishes ``booking.created`` / ``booking.cancelled``
+snapshots (with the client's name and goal) on the ``booking_events``
+topic exchange. A trainer decision is published from here as one
+``booking.decided`` event carrying the booking data, which user_service
+applies without any other lookup; it is written to the outbox
+(helper/outbox.py) in the transaction that records the decision. ``run_booking_consumer`` applies all
+three to the roster with ``apply_booking_event``, so pending / approved
+client lists are local queries. ``reconcile_clients`` runs periodically
+and repairs the roster from user_service's bookings.
+"""
+
+import os
+import uuid
+from datetime import datetime
+
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+from trainer_service.common.http_client import get_upstream, internal_headers
+
+from ..models import TrainerClient
+from .outbox import enqueue_event
+from .user_directory import lookup_names
+
+BOOKING_EXCHANGE = os.getenv("RABBIT_BOOKING_EXCHANGE", "booking_events")
+
+BOOKING_CREATED = "booking.created"
+BOOKING_CANCELLED = "booking.cancelled"
+BOOKING_DECIDED = "booking.decided"
+
+BOOKINGS_PATH = "/api/v1/user/internal/bookings/"
+
+DECISION_STATUS = {
+    "approve": TrainerClient.STATUS_APPROVED,
+    "reject": TrainerClient.STATUS_REJECTED,
+}
+
+
+def _client_values(payload):
+    values = {
+        "user_id": uuid.UUID(str(payload["user_id"])),
+        "trainer_user_id": uuid.UUID(str(payload["trainer_user_id"])),
+    }
+    if payload.get("action") in DECISION_STATUS:
+        values["status"] = DECISION_STATUS[payload["action"]]
+        values["decided_at"] = parse_datetime(payload.get("occurred_at") or "")
+    elif payload.get("status"):
+        values["status"] = payload["status"]
+
+    if payload.get("version") is not None:
+        values["source_version"] = int(payload["version"])
+
+    created_at = parse_datetime(str(payload.get("created_at") or ""))
+    if created_at is not None:
+        values["created_at"] = created_at
+    for field in ("name", "goal"):
+        if payload.get(field):
+            values[field] = payload[field]
+    return values
+
+
+def _with_local_name(values):
+    # older publishers sent no name: fall back to the local user directory
+    if not values.get("name"):
+        name = lookup_names([values["user_id"]]).get(str(values["user_id"]))
+        if name:
+            values["name"] = name
+    return values
+
+
+def _snapshot_filter(qs, values):
+    """
+    Rows a user_service snapshot may overwrite: older versions only, and
+    a pending snapshot never undoes a decision already taken here.
+    """
+    qs = qs.filter(source_version__lt=values["source_version"])
+    if values.get("status") == TrainerClient.STATUS_PENDING:
+        qs = qs.filter(status=TrainerClient.STATUS_PENDING)
+    return qs
+
+
+def apply_booking_event(routing_key, payload):
+    """
+    Upsert one roster row. user_service snapshots carry the booking's
+    ``version`` and only overwrite an older one. ``booking.decided`` (our
+    own event) only moves a pending row, so a cancel always wins over a
+    decision whichever arrives first.
+
+    Returns True if a row was created or changed.
+    Raises ValueError / KeyError for a malformed payload.
+    """
+    raw_booking_id = payload.get("booking_id")
+    if not raw_booking_id:
+        raise ValueError("booking_id missing")
+    booking_id = uuid.UUID(str(raw_booking_id))
+
+    values = _client_values(payload)
+    qs = TrainerClient.objects.filter(id=booking_id)
+
+    if routing_key == BOOKING_DECIDED:
+        qs = qs.filter(status=TrainerClient.STATUS_PENDING)
+    elif "source_version" in values:
+        qs = _snapshot_filter(qs, values)
+    elif routing_key == BOOKING_CREATED:
+        # unversioned (older publisher): insert only
+        qs = None
+
+    if qs is not None and qs.update(**values):
+        return True
+
+    _, created = TrainerClient.objects.get_or_create(
+        id=booking_id, defaults=_with_local_name(values)
+    )
+    return created
+
+
+def sync_client_page(rows):
+    """
+    Apply a page of user_service bookings (backfill / reconcile): missing
+    rows are inserted, rows behind the booking's version are overwritten.
+    Returns ``(created, updated)``.
+    """
+    by_id = {uuid.UUID(str(r["booking_id"])): r for r in rows}
+    if not by_id:
+        return 0, 0
+
+    existing = {
+        client.id: client
+        for client in TrainerClient.objects.filter(id__in=by_id.keys()).only(
+            "id", "status", "source_version"
+        )
+    }
+
+    to_create, updated = [], 0
+    for booking_id, row in by_id.items():
+        values = _client_values(row)
+        client = existing.get(booking_id)
+        if client is None:
+            to_create.append(TrainerClient(id=booking_id, **values))
+        elif values.get("source_version", 0) > client.source_version:
+            qs = _snapshot_filter(TrainerClient.objects.filter(id=booking_id), values)
+            updated += qs.update(**values)
+
+    TrainerClient.objects.bulk_create(to_create, ignore_conflicts=True)
+    return len(to_create), updated
+
+
+def reconcile_clients(updated_after=None, statuses=None, page_size=500):
+    """
+    Re-read user_service bookings (all, or those changed since
+    ``updated_after``) and repair the roster with ``sync_client_page``.
+    Repairs events that never arrived. Returns ``(scanned, created, updated)``.
+    """
+    client = get_upstream("user")
+    after = None
+    scanned = created = updated = 0
+
+    while True:
+        params = {"limit": page_size}
+        if after:
+            params["after"] = after
+        if statuses:
+            params["status"] = statuses
+        if updated_after is not None:
+            params["updated_after"] = updated_after.isoformat()
+
+        resp = client.get(
+            BOOKINGS_PATH,
+            params=params,
+            headers=internal_headers(),
+            timeout=(2, 30),
+        )
+        resp.raise_for_status()
+
+        data = resp.json()
+        page_created, page_updated = sync_client_page(data["results"])
+        scanned += len(data["results"])
+        created += page_created
+        updated += page_updated
+
+        after = data.get("next_after")
+        if not after:
+            break
+
+    return scanned, created, updated
+
+
+def fetch_booking(booking_id, auth_header):
+    """
+    Read-through for bookings the consumer has not seen yet (an event
+    still in flight): one call to user_service, stored locally.
+    Returns ``(client, status_code)``.
+    """
+    resp = get_upstream("user").get(
+        f"/api/v1/user/training/bookings/{booking_id}/",
+        headers={"Authorization": auth_header},
+        timeout=5,
+    )
+    if resp.status_code != 200:
+        return None, resp.status_code
+
+    data = resp.json()
+    client, _ = TrainerClient.objects.get_or_create(
+        id=uuid.UUID(str(data["booking_id"])),
+        defaults=_with_local_name(_client_values(data)),
+    )
+    return client, 200
+
+
+def decide_booking(client, action):
+    """
+    Record the trainer's decision in the roster and queue
+    ``booking.decided`` in the outbox, in one transaction.
+    Returns False if the booking is no longer pending.
+    """
+    occurred_at = datetime.utcnow().isoformat() + "Z"
+    with transaction.atomic():
+        updated = TrainerClient.objects.filter(
+            id=client.id, status=TrainerClient.STATUS_PENDING
+        ).update(
+            status=DECISION_STATUS[action], decided_at=parse_datetime(occurred_at)
+        )
+        if not updated:
+            return False
+
+        payload = {
+            "event": "BOOKING_DECIDED",
+            "booking_id": str(client.id),
+            "user_id": str(client.user_id),
+            "trainer_user_id": str(client.trainer_user_id),
+            "action": action,
+            "occurred_at": occurred_at,
+        }
+        enqueue_event(BOOKING_DECIDED, payload)
+    return True
@@ -1,8 +1,5 @@
-import requests
-from django.conf import settings
 from rest_framework.response import Response
-
-USER_SERVICE_URL = settings.USER_SERVICE_URL
+from trainer_service.common.http_client import get_upstream
 
 
 def forward_request(request, method, path, *, data=None, files=None, params=None):
@@ -10,8 +7,6 @@ def forward_request(request, method, path, *, data=None, files=None, params=None
         "Authorization": request.headers.get("Authorization"),
     }
 
-    url = f"{USER_SERVICE_URL}{path}"
-
     prepared_files = None
     if files:
         prepared_files = {}
@@ -23,9 +18,9 @@ def forward_request(request, method, path, *, data=None, files=None, params=None
                 uploaded_file.content_type,
             )
 
-    resp = requests.request(
-        method=method,
-        url=url,
+    resp = get_upstream("user").request(
+        method,
+        path,
         headers=headers,
         data=data,
         files=prepared_files,
@@ -0,0 +1,82 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from trainer_service.common.http_client import get_upstream, internal_headers
+
+from trainer_app.management.commands.run_rabbit_trainer_consumer import (
+    bulk_create_trainers,
+)
+from trainer_app.models import TrainerProfile
+
+DIRECTORY_PATH = "/api/v1/auth/internal/users/directory/"
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the TrainerProfile rows missing for auth_service users "
+        "(keyset-paginated, one lookup and one bulk insert per page)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-size", type=int, default=1000)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="only count the missing profiles",
+        )
+
+    def handle(self, *args, **options):
+        client = get_upstream("auth")
+        after = None
+        pages = scanned = missing = created = 0
+        started = time.monotonic()
+
+        while True:
+            params = {"limit": options["page_size"], "role": "trainer"}
+            if after:
+                params["after"] = after
+
+            resp = client.get(
+                DIRECTORY_PATH,
+                params=params,
+                headers=internal_headers(),
+                timeout=(2, 30),
+            )
+            if resp.status_code != 200:
+                raise CommandError(
+                    f"auth_service returned {resp.status_code}: {resp.text[:200]}"
+                )
+
+            data = resp.json()
+            user_ids = {row["user_id"] for row in data["results"]}
+
+            existing = {
+                str(user_id)
+                for user_id in TrainerProfile.objects.filter(
+                    user_id__in=[uuid.UUID(u) for u in user_ids]
+                ).values_list("user_id", flat=True)
+            }
+            to_create = user_ids - existing
+
+            if to_create and not options["dry_run"]:
+                with transaction.atomic():
+                    bulk_create_trainers(to_create)
+                created += len(to_create)
+
+            pages += 1
+            scanned += len(user_ids)
+            missing += len(to_create)
+
+            after = data.get("next_after")
+            if not after:
+                break
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Trainer profile backfill done: pages={pages} scanned={scanned} "
+                f"missing={missing} created={created} "
+                f"in {time.monotonic() - started:.1f}s"
+            )
+        )
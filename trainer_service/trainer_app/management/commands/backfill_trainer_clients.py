@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from requests.exceptions import RequestException
+
+from trainer_app.helper.bookings import reconcile_clients
+
+
+class Command(BaseCommand):
+    help = (
+        "Backfill / repair the trainer client roster from user_service bookings "
+        "(keyset-paginated, one bulk insert per page)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-size", type=int, default=500)
+        parser.add_argument(
+            "--status",
+            default="pending,approved",
+            help="comma-separated booking statuses to sync ('' for all)",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+
+        try:
+            scanned, created, updated = reconcile_clients(
+                statuses=options["status"] or None,
+                page_size=options["page_size"],
+            )
+        except RequestException as e:
+            raise CommandError(f"user_service bookings fetch failed: {e}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Client roster backfill done: scanned={scanned} "
+                f"created={created} updated={updated} "
+                f"in {time.monotonic() - started:.1f}s"
+            )
+        )
@@ -0,0 +1,117 @@
+# trainer_app/management/commands/relay_outbox.py
+import logging
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections
+
+try:
+    import pika
+    from pika.exceptions import AMQPError
+except Exception:
+    pika = None
+    AMQPError = Exception
+
+from trainer_app.helper.bookings import BOOKING_EXCHANGE
+from trainer_app.helper.outbox import RELAY_BATCH_SIZE, purge_sent, relay_batch
+from trainer_service.common.rabbit_publisher import connect
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+PURGE_INTERVAL = 3600
+
+stop_requested = False
+
+
+def handle_signal(signum, frame):
+    global stop_requested
+    logger.info("Signal %s received, stopping outbox relay...", signum)
+    stop_requested = True
+
+
+class Command(BaseCommand):
+    help = "Publish pending booking events from the outbox in ordered, confirmed batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=RELAY_BATCH_SIZE)
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=0.5,
+            help="Seconds to wait when the outbox is drained",
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Drain the outbox and exit"
+        )
+
+    def handle(self, *args, **options):
+        if pika is None:
+            logger.error("pika not installed, cannot start outbox relay")
+            return
+
+        signal.signal(signal.SIGINT, handle_signal)
+        signal.signal(signal.SIGTERM, handle_signal)
+
+        batch_size = max(1, options["batch_size"])
+        poll_interval = options["poll_interval"]
+        attempt = 0
+        last_purge = 0.0
+
+        while not stop_requested:
+            conn = None
+            try:
+                conn = connect()
+                ch = conn.channel()
+                ch.exchange_declare(
+                    exchange=BOOKING_EXCHANGE, exchange_type="topic", durable=True
+                )
+                ch.confirm_delivery()
+                logger.info("Outbox relay connected, batch_size=%d", batch_size)
+                attempt = 0
+
+                while not stop_requested:
+                    close_old_connections()
+                    sent = relay_batch(ch, BOOKING_EXCHANGE, batch_size=batch_size)
+                    if sent:
+                        logger.debug("Relayed %d outbox events", sent)
+                    if sent >= batch_size:
+                        continue  # backlog: go straight to the next batch
+
+                    if options["once"]:
+                        return
+
+                    if time.monotonic() - last_purge > PURGE_INTERVAL:
+                        purged = purge_sent()
+                        last_purge = time.monotonic()
+                        if purged:
+                            logger.info("Purged %d sent outbox events", purged)
+
+                    # also services heartbeats while idle
+                    conn.process_data_events(time_limit=poll_interval)
+
+            except AMQPError as exc:
+                attempt += 1
+                delay = min(2**attempt, 30)
+                logger.warning(
+                    "Outbox relay lost RabbitMQ (attempt %d), retrying in %ds: %s",
+                    attempt,
+                    delay,
+                    exc,
+                )
+                time.sleep(delay)
+
+            except DatabaseError as exc:
+                logger.exception("Outbox relay DB error, retrying in 5s: %s", exc)
+                close_old_connections()
+                time.sleep(5)
+
+            finally:
+                try:
+                    if conn and conn.is_open:
+                        conn.close()
+                except Exception:
+                    pass
+
+        logger.info("Outbox relay shut down cleanly")
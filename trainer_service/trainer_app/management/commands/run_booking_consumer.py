@@ -0,0 +1,47 @@
+import logging
+import os
+
+import django
+from django.core.management.base import BaseCommand
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "trainer_service.settings")
+django.setup()
+
+from trainer_app.helper.bookings import (
+    BOOKING_CANCELLED,
+    BOOKING_CREATED,
+    BOOKING_DECIDED,
+    BOOKING_EXCHANGE,
+    apply_booking_event,
+)
+from trainer_service.common.consumer_runtime import ConsumerRuntime, Reject
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+QUEUE = os.getenv("RABBIT_QUEUE_BOOKINGS", "trainer_service.bookings")
+PREFETCH = int(os.getenv("BOOKING_PREFETCH_COUNT", "50"))
+
+runtime = ConsumerRuntime(QUEUE, exchange=BOOKING_EXCHANGE, prefetch=PREFETCH)
+
+
+@runtime.handler(BOOKING_CREATED, BOOKING_DECIDED, BOOKING_CANCELLED)
+def on_booking_event(delivery):
+    try:
+        changed = apply_booking_event(delivery.routing_key, delivery.payload)
+    except (KeyError, TypeError) as exc:
+        raise Reject(f"invalid booking event: {exc}")
+
+    logger.debug(
+        "Booking event %s booking_id=%s changed=%s",
+        delivery.routing_key,
+        delivery.payload.get("booking_id"),
+        changed,
+    )
+
+
+class Command(BaseCommand):
+    help = "RabbitMQ consumer: keeps the trainer client roster in sync with bookings"
+
+    def handle(self, *args, **options):
+        runtime.run()
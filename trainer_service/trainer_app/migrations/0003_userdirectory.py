@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-19 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trainer_app", "0002_remove_trainerprofile_is_verified"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserDirectory",
+            fields=[
+                ("user_id", models.UUIDField(primary_key=True, serialize=False)),
+                ("name", models.CharField(blank=True, max_length=150)),
+                ("email", models.EmailField(blank=True, max_length=254)),
+                ("role", models.CharField(blank=True, max_length=20)),
+                ("is_active", models.BooleanField(default=True)),
+                (
+                    "source_updated_at",
+                    models.DateTimeField(blank=True, null=True),
+                ),
+                ("synced_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "user_directory",
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trainer_app", "0003_userdirectory"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TrainerBooking",
+            fields=[
+                ("id", models.UUIDField(primary_key=True, serialize=False)),
+                ("user_id", models.UUIDField()),
+                ("trainer_user_id", models.UUIDField()),
+                (
+                    "status",
+                    models.CharField(default="pending", max_length=20),
+                ),
+                ("created_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "source_updated_at",
+                    models.DateTimeField(blank=True, null=True),
+                ),
+                ("synced_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "trainer_booking_replica",
+                "indexes": [
+                    models.Index(
+                        fields=["trainer_user_id", "status"],
+                        name="trainer_booking_status_idx",
+                    )
+                ],
+            },
+        ),
+    ]
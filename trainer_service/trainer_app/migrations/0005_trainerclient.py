@@ -0,0 +1,57 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trainer_app", "0004_trainerbooking"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="trainerbooking",
+            name="trainer_booking_status_idx",
+        ),
+        migrations.RenameModel(
+            old_name="TrainerBooking",
+            new_name="TrainerClient",
+        ),
+        migrations.AlterModelTable(
+            name="trainerclient",
+            table="trainer_client",
+        ),
+        migrations.AddField(
+            model_name="trainerclient",
+            name="name",
+            field=models.CharField(blank=True, max_length=150),
+        ),
+        migrations.AddField(
+            model_name="trainerclient",
+            name="goal",
+            field=models.CharField(blank=True, max_length=32),
+        ),
+        migrations.AddField(
+            model_name="trainerclient",
+            name="decided_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="trainerclient",
+            name="created_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name="trainerclient",
+            index=models.Index(
+                fields=["trainer_user_id", "status", "-created_at"],
+                name="trainer_client_roster_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="trainerclient",
+            index=models.Index(fields=["user_id"], name="trainer_client_user_idx"),
+        ),
+    ]
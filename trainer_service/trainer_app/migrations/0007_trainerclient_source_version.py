@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-19 17:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trainer_app", "0006_outboxevent"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="trainerclient",
+            name="source_updated_at",
+        ),
+        migrations.AddField(
+            model_name="trainerclient",
+            name="source_version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
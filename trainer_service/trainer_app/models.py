@@ -2,6 +2,7 @@ import uuid
 
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.utils import timezone
 
 
 class TrainerProfile(models.Model):
@@ -40,3 +41,104 @@ class TrainerCertificate(models.Model):
 
     def __str__(self):
         return f"Certificate({self.trainer.user_id}, {self.id})"
+
+
+# Local read model of auth_service users, fed by user.created /
+# trainer.registered / user.updated events (see helper/user_directory.py)
+
+
+class UserDirectory(models.Model):
+    user_id = models.UUIDField(primary_key=True)
+    name = models.CharField(max_length=150, blank=True)
+    email = models.EmailField(max_length=254, blank=True)
+    role = models.CharField(max_length=20, blank=True)
+    is_active = models.BooleanField(default=True)
+
+    # auth-side time of the snapshot; older events never overwrite newer ones
+    source_updated_at = models.DateTimeField(null=True, blank=True)
+    synced_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "user_directory"
+
+    def __str__(self):
+        return f"UserDirectory({self.user_id}, {self.role})"
+
+    @property
+    def display_name(self):
+        return self.name or self.email
+
+
+# Trainer's client roster: local read model of user_service's TrainerBooking,
+# fed by booking.created / booking.decided / booking.cancelled events
+# (see helper/bookings.py)
+
+
+class TrainerClient(models.Model):
+    STATUS_PENDING = "pending"
+    STATUS_APPROVED = "approved"
+    STATUS_REJECTED = "rejected"
+    STATUS_CANCELLED = "cancelled"
+
+    # same id as the user_service booking
+    id = models.UUIDField(primary_key=True)
+    trainer_user_id = models.UUIDField()
+    user_id = models.UUIDField()
+    status = models.CharField(max_length=20, default=STATUS_PENDING)
+    name = models.CharField(max_length=150, blank=True)
+    goal = models.CharField(max_length=32, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    decided_at = models.DateTimeField(null=True, blank=True)
+
+    # user_service's TrainerBooking.version of the last snapshot applied;
+    # older snapshots never overwrite newer ones
+    source_version = models.PositiveIntegerField(default=0)
+    synced_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "trainer_client"
+        indexes = [
+            # roster pages: WHERE trainer_user_id, status ORDER BY created_at DESC
+            models.Index(
+                fields=["trainer_user_id", "status", "-created_at"],
+                name="trainer_client_roster_idx",
+            ),
+            # name refreshes from user.updated
+            models.Index(fields=["user_id"], name="trainer_client_user_idx"),
+        ]
+
+    def __str__(self):
+        return f"TrainerClient({self.trainer_user_id}, {self.user_id}, {self.status})"
+
+
+# Domain events written in the same transaction as the change they describe
+# (see helper/outbox.py); ``relay_outbox`` publishes pending rows
+
+
+class OutboxEvent(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    message_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    routing_key = models.CharField(max_length=100)
+    payload = models.JSONField()
+    created_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(blank=True, null=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    # set once the row failed OUTBOX_RELAY_MAX_ATTEMPTS times
+    failed_at = models.DateTimeField(blank=True, null=True)
+    # a relay is publishing the row until then
+    locked_until = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # the relay only ever scans pending rows in id order
+            models.Index(
+                fields=["id"],
+                name="outbox_pending_idx",
+                condition=models.Q(sent_at__isnull=True, failed_at__isnull=True),
+            ),
+            models.Index(fields=["sent_at"], name="outbox_sent_at_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.routing_key} {self.message_id}"
@@ -0,0 +1,9 @@
+from rest_framework.pagination import CursorPagination
+
+
+class TrainerClientCursorPagination(CursorPagination):
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = "page_size"
+    ordering = "-created_at"  # newest bookings first (trainer_client_roster_idx)
+    cursor_query_param = "cursor"
@@ -1,7 +1,7 @@
 from django.conf import settings
 from rest_framework import serializers
 
-from .models import TrainerCertificate, TrainerProfile
+from .models import TrainerCertificate, TrainerClient, TrainerProfile
 
 # Configurable defaults (override in settings if you want)
 DEFAULT_MAX_CERT_SIZE = getattr(settings, "MAX_CERT_FILE_SIZE", 10 * 1024 * 1024)
@@ -113,3 +113,30 @@ class CertificateUploadSerializer(serializers.Serializer):
 
         attrs["files"] = validated_files
         return attrs
+
+
+class TrainerClientSerializer(serializers.ModelSerializer):
+    booking_id = serializers.UUIDField(source="id", read_only=True)
+    user_name = serializers.CharField(source="name", read_only=True)
+
+    class Meta:
+        model = TrainerClient
+        fields = [
+            "booking_id",
+            "user_id",
+            "user_name",
+            "goal",
+            "status",
+            "created_at",
+        ]
+
+
+class ApprovedClientSerializer(TrainerClientSerializer):
+    # approval time; bookings approved before the roster existed fall back to created_at
+    approved_at = serializers.SerializerMethodField()
+
+    class Meta(TrainerClientSerializer.Meta):
+        fields = ["booking_id", "user_id", "user_name", "goal", "approved_at"]
+
+    def get_approved_at(self, obj):
+        return obj.decided_at or obj.created_at
@@ -1,10 +1,27 @@
-from celery import current_app, shared_task
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from .helper.bookings import BOOKING_DECIDED, reconcile_clients
+from .helper.outbox import enqueue_event
 
 
 @shared_task
 def publish_booking_decision(payload):
-    current_app.send_task(
-        "user_app.tasks.handle_booking_decision",
-        args=[payload],
-        queue="user_tasks",
+    # DecideBookingView queues booking.decided itself now; this task
+    # only forwards decisions queued before the switch
+    enqueue_event(BOOKING_DECIDED, payload)
+
+
+@shared_task(ignore_result=True)
+def reconcile_trainer_clients():
+    # repairs roster rows whose booking event never arrived; the window
+    # overlaps the previous run, and re-applying a snapshot is a no-op
+    window = timedelta(seconds=settings.TRAINER_CLIENT_RECONCILE_WINDOW_SECONDS)
+    scanned, created, updated = reconcile_clients(
+        updated_after=timezone.now() - window
     )
+    if created or updated:
+        return f"{scanned} bookings checked, {created} created, {updated} updated"
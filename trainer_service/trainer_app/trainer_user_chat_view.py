@@ -12,6 +12,7 @@ class TrainerChatRoomListProxyView(APIView):
             request,
             method="GET",
             path="/api/chat/rooms/",
+            params=request.query_params,
         )
 
 
@@ -1,9 +1,9 @@
 import requests
 
-from django.conf import settings
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from trainer_service.common.http_client import get_upstream
 
 from .permissions import IsTrainer
 
@@ -17,7 +17,7 @@ class TrainerUserOverviewProxyView(APIView):
 
     def get(self, request, user_id):
         # 🔗 user_service endpoint
-        url = f"{settings.USER_SERVICE_URL}/api/v1/user/trainer/users/{user_id}/overview/"
+        path = f"/api/v1/user/trainer/users/{user_id}/overview/"
 
         # 🔐 Forward auth header
         headers = {
@@ -25,7 +25,7 @@ class TrainerUserOverviewProxyView(APIView):
         }
 
         try:
-            response = requests.get(url, headers=headers, timeout=5)
+            response = get_upstream("user").get(path, headers=headers, timeout=5)
         except requests.RequestException:
             return Response(
                 {"detail": "User service unavailable"},
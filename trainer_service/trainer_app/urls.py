@@ -1,7 +1,7 @@
 from django.urls import path
 
 from .admin_trainer_views import AdminTrainerProfileView
-from .user_trainer_views import TrainerProfilesByUserIdsView
+from .user_trainer_views import TrainerProfileListView, TrainerProfilesByUserIdsView
 from .views import (
     ApprovedUsersView,
     DecideBookingView,
@@ -30,6 +30,10 @@ urlpatterns = [
         "internal/admin/trainers/<uuid:user_id>/profile/",
         AdminTrainerProfileView.as_view(),
     ),
+    path(
+        "internal/trainers/",
+        TrainerProfileListView.as_view(),
+    ),
     path(
         "internal/trainers/by-user-ids/",
         TrainerProfilesByUserIdsView.as_view(),
@@ -1,3 +1,5 @@
+import uuid
+
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -6,6 +8,9 @@ from rest_framework.views import APIView
 from .models import TrainerProfile
 from .serializers import TrainerProfileSerializer
 
+# rows per response; user_service asks for the rest by id
+TRAINER_PROFILE_LIST_MAX = 500
+
 
 class TrainerProfilesByUserIdsView(APIView):
     permission_classes = [IsAuthenticated]
@@ -18,8 +23,58 @@ class TrainerProfilesByUserIdsView(APIView):
                 {"detail": "user_ids list required"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        if len(user_ids) > TRAINER_PROFILE_LIST_MAX:
+            return Response(
+                {"detail": f"at most {TRAINER_PROFILE_LIST_MAX} user_ids"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
         profiles = TrainerProfile.objects.filter(user_id__in=user_ids)
 
         serializer = TrainerProfileSerializer(profiles, many=True)
         return Response(serializer.data)
+
+
+class TrainerProfileListView(APIView):
+    """
+    Card fields of trainer profiles, so user_service can fetch them in
+    parallel with the approved-trainer list instead of after it.
+    ``?user_ids=a,b`` narrows the list to those trainers. At most
+    TRAINER_PROFILE_LIST_MAX rows are returned, newest first, and
+    ``X-Truncated: 1`` marks a response that left rows out.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        profiles = TrainerProfile.objects.all()
+
+        raw_ids = request.query_params.get("user_ids")
+        if raw_ids:
+            try:
+                user_ids = [uuid.UUID(u) for u in raw_ids.split(",") if u]
+            except ValueError:
+                return Response(
+                    {"detail": "user_ids must be UUIDs"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            profiles = profiles.filter(user_id__in=user_ids)
+
+        rows = list(
+            profiles.order_by("-created_at").values(
+                "user_id",
+                "bio",
+                "specialties",
+                "experience_years",
+            )[: TRAINER_PROFILE_LIST_MAX + 1]
+        )
+
+        response = Response(
+            [
+                {**p, "user_id": str(p["user_id"])}
+                for p in rows[:TRAINER_PROFILE_LIST_MAX]
+            ]
+        )
+        if len(rows) > TRAINER_PROFILE_LIST_MAX:
+            response["X-Truncated"] = "1"
+        return response
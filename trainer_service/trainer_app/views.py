@@ -1,21 +1,23 @@
-import requests
-from django.conf import settings
 from django.db import transaction
 from requests.exceptions import ConnectionError, Timeout
 from rest_framework import permissions, status
+from rest_framework.generics import ListAPIView
 from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import TrainerCertificate, TrainerProfile
+from .helper.bookings import decide_booking, fetch_booking
+from .models import TrainerCertificate, TrainerClient, TrainerProfile
+from .pagination import TrainerClientCursorPagination
 from .permissions import IsTrainerOwner
 from .serializers import (
+    ApprovedClientSerializer,
     CertificateUploadSerializer,
     TrainerCertificateModelSerializer,
+    TrainerClientSerializer,
     TrainerProfileSerializer,
 )
-from .tasks import publish_booking_decision
 
 
 class TrainerProfileView(APIView):
@@ -106,62 +108,19 @@ class TrainerProfileView(APIView):
         )
 
 
-class PendingClientsView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def get(self, request):
-        auth_header = request.headers.get("Authorization")
-        headers = {"Authorization": auth_header}
-
-        try:
-            resp = requests.get(
-                f"{settings.USER_SERVICE_URL}/api/v1/user/training/pending/",
-                headers=headers,
-                timeout=3,
-            )
-        except (ConnectionError, Timeout):
-            return Response(
-                {"detail": "User service temporarily unavailable. Try again."},
-                status=503,
-            )
+class PendingClientsView(ListAPIView):
+    """Pending booking requests for this trainer, one local query per page."""
 
-        if resp.status_code != 200:
-            return Response(
-                {"detail": "Failed to fetch pending clients"},
-                status=resp.status_code,
-            )
-
-        bookings = resp.json()
-
-        if not bookings:
-            return Response([], status=200)
-
-        # collect user_ids
-        user_ids = list({b["user_id"] for b in bookings})
+    serializer_class = TrainerClientSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = TrainerClientCursorPagination
 
-        # bulk fetch user names
-        users_resp = requests.post(
-            f"{settings.AUTH_SERVICE_URL}/api/v1/auth/internal/users/bulk/",
-            json={"user_ids": user_ids},
-            headers=headers,
-            timeout=5,
+    def get_queryset(self):
+        return TrainerClient.objects.filter(
+            trainer_user_id=self.request.user.id,
+            status=TrainerClient.STATUS_PENDING,
         )
 
-        users = users_resp.json() if users_resp.status_code == 200 else []
-        user_map = {u.get("id"): u.get("name") for u in users}
-
-        # merge
-        result = []
-        for b in bookings:
-            result.append(
-                {
-                    **b,
-                    "user_name": user_map.get(b["user_id"]),
-                }
-            )
-
-        return Response(result, status=200)
-
 
 class DecideBookingView(APIView):
     permission_classes = [IsAuthenticated, IsTrainerOwner]
@@ -172,49 +131,37 @@ class DecideBookingView(APIView):
         if action not in ["approve", "reject"]:
             return Response({"detail": "Invalid action"}, status=400)
 
-        auth_header = request.headers.get("Authorization")
-
-        # 🔹 1. Ask USER SERVICE for booking details
-        try:
-            booking_resp = requests.get(
-                f"{settings.USER_SERVICE_URL}/api/v1/user/training/bookings/{booking_id}/",
-                headers={"Authorization": auth_header},
-                timeout=5,
-            )
-        except (ConnectionError, Timeout):
-            return Response(
-                {"detail": "User service unavailable"},
-                status=503,
-            )
-
-        if booking_resp.status_code != 200:
-            return Response(
-                {"detail": "Failed to fetch booking"},
-                status=booking_resp.status_code,
-            )
-
-        booking = booking_resp.json()
-
-        user_id = booking.get("user_id")
-        trainer_user_id = booking.get("trainer_user_id")
+        # 🔹 1. Local client roster; user_service only for unseen bookings
+        booking = TrainerClient.objects.filter(id=booking_id).first()
+        if booking is None:
+            try:
+                booking, status_code = fetch_booking(
+                    booking_id, request.headers.get("Authorization")
+                )
+            except (ConnectionError, Timeout):
+                return Response(
+                    {"detail": "User service unavailable"},
+                    status=503,
+                )
+            if booking is None:
+                return Response(
+                    {"detail": "Failed to fetch booking"},
+                    status=status_code,
+                )
 
         # 🔐 Safety check
-        if trainer_user_id != str(request.user.id):
+        if str(booking.trainer_user_id) != str(request.user.id):
             return Response(
                 {"detail": "Not authorized for this booking"},
                 status=403,
             )
 
-        # 🔹 2. Publish COMPLETE event
-        publish_booking_decision.delay(
-            {
-                "event": "BOOKING_DECIDED",
-                "booking_id": str(booking_id),
-                "user_id": user_id,                     # ✅ REQUIRED
-                "trainer_user_id": str(request.user.id),
-                "action": action,
-            }
-        )
+        # 🔹 2. Publish one booking.decided event with the booking data
+        if not decide_booking(booking, action):
+            return Response(
+                {"detail": "Booking is no longer pending"},
+                status=409,
+            )
 
         return Response(
             {"detail": "Decision queued"},
@@ -222,60 +169,15 @@ class DecideBookingView(APIView):
         )
 
 
-class ApprovedUsersView(APIView):
-    permission_classes = [IsAuthenticated, IsTrainerOwner]
-
-    def get(self, request):
-        auth_header = request.headers.get("Authorization")
+class ApprovedUsersView(ListAPIView):
+    """This trainer's approved clients, one local query per page."""
 
-        # 1. Get approved bookings from user service
-        bookings_resp = requests.get(
-            f"{settings.USER_SERVICE_URL}/api/v1/user/training/bookings/approved/",
-            headers={"Authorization": auth_header},
-            timeout=5,
-        )
-
-        if bookings_resp.status_code != 200:
-            return Response(
-                {"detail": "Failed to fetch approved users"},
-                status=bookings_resp.status_code,
-            )
-
-        bookings = bookings_resp.json()
-
-        if not bookings:
-            return Response([], status=200)
-
-        # 2. Extract user_ids
-        user_ids = list({b["user_id"] for b in bookings})
+    serializer_class = ApprovedClientSerializer
+    permission_classes = [IsAuthenticated, IsTrainerOwner]
+    pagination_class = TrainerClientCursorPagination
 
-        # 3. Fetch user names from auth service (BULK)
-        users_resp = requests.post(
-            f"{settings.AUTH_SERVICE_URL}/api/v1/auth/internal/users/bulk/",
-            json={"user_ids": user_ids},
-            headers={"Authorization": auth_header},
-            timeout=5,
+    def get_queryset(self):
+        return TrainerClient.objects.filter(
+            trainer_user_id=self.request.user.id,
+            status=TrainerClient.STATUS_APPROVED,
         )
-
-        if users_resp.status_code != 200:
-            return Response(
-                {"detail": "Failed to fetch user details"},
-                status=users_resp.status_code,
-            )
-
-        users = users_resp.json()
-        user_map = {u["id"]: u["name"] for u in users}
-
-        # 4. Merge data
-        result = []
-        for b in bookings:
-            result.append(
-                {
-                    "booking_id": b["booking_id"],
-                    "user_id": b["user_id"],
-                    "user_name": user_map.get(b["user_id"]),
-                    "approved_at": b["approved_at"],
-                }
-            )
-
-        return Response(result, status=200)
@@ -0,0 +1,173 @@
+"""
+Metrics for a consumer process, served in the Prometheus text format.
+
+``ConsumerRuntime`` records into one ``ConsumerMetrics`` and, when
+``CONSUMER_METRICS_PORT`` is set (non-zero), serves it from a tiny
+asyncio HTTP server on that port:
+
+    curl http://user-consumer:9100/metrics
+
+Counters are per queue; handler latency is a histogram per routing key;
+queue depth is sampled by the runtime with a passive ``queue_declare``.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CONSUMER_METRICS_PORT = int(os.getenv("CONSUMER_METRICS_PORT", "9100"))
+
+LATENCY_BUCKETS_SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+COUNTERS = {
+    "received": "Deliveries received from the broker",
+    "acked": "Deliveries handled and acked",
+    "requeued": "Deliveries nacked back onto the queue",
+    "retried": "Deliveries parked in a delay queue",
+    "dead_lettered": "Deliveries moved to the dead-letter queue",
+    "duplicates": "Deliveries skipped as already processed",
+    "reconnects": "Broker connection attempts that failed or were lost",
+}
+
+
+class ConsumerMetrics:
+    def __init__(self, queue):
+        self.queue = queue
+        self._lock = threading.Lock()
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.dropped = {}  # reason -> count
+        self.latency = {}  # routing key -> [bucket counts..., +Inf], sum, count
+        self.in_flight = 0
+        self.queue_depth = {}  # queue name -> (messages, consumers)
+        self.started_at = time.time()
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def drop(self, reason):
+        with self._lock:
+            self.dropped[reason] = self.dropped.get(reason, 0) + 1
+
+    def observe(self, routing_key, seconds):
+        with self._lock:
+            entry = self.latency.setdefault(
+                routing_key,
+                {"buckets": [0] * (len(LATENCY_BUCKETS_SECONDS) + 1), "sum": 0.0, "count": 0},
+            )
+            index = next(
+                (i for i, b in enumerate(LATENCY_BUCKETS_SECONDS) if seconds <= b),
+                len(LATENCY_BUCKETS_SECONDS),
+            )
+            entry["buckets"][index] += 1
+            entry["sum"] += seconds
+            entry["count"] += 1
+
+    def set_queue_depth(self, queue, messages, consumers):
+        with self._lock:
+            self.queue_depth[queue] = (messages, consumers)
+
+    def render(self):
+        """Prometheus text exposition of everything recorded so far."""
+        q = self.queue
+        lines = []
+
+        with self._lock:
+            for name, help_text in COUNTERS.items():
+                metric = f"consumer_{name}_total"
+                lines += [
+                    f"# HELP {metric} {help_text}",
+                    f"# TYPE {metric} counter",
+                    f'{metric}{{queue="{q}"}} {self.counters[name]}',
+                ]
+
+            lines += [
+                "# HELP consumer_dropped_total Deliveries acked without being handled",
+                "# TYPE consumer_dropped_total counter",
+            ]
+            for reason, value in sorted(self.dropped.items()):
+                lines.append(
+                    f'consumer_dropped_total{{queue="{q}",reason="{reason}"}} {value}'
+                )
+
+            lines += [
+                "# HELP consumer_handler_seconds Handler run time",
+                "# TYPE consumer_handler_seconds histogram",
+            ]
+            for routing_key, entry in sorted(self.latency.items()):
+                labels = f'queue="{q}",routing_key="{routing_key}"'
+                cumulative = 0
+                for bound, count in zip(
+                    (*LATENCY_BUCKETS_SECONDS, "+Inf"), entry["buckets"]
+                ):
+                    cumulative += count
+                    lines.append(
+                        f'consumer_handler_seconds_bucket{{{labels},le="{bound}"}} {cumulative}'
+                    )
+                lines.append(f"consumer_handler_seconds_sum{{{labels}}} {entry['sum']:.6f}")
+                lines.append(f"consumer_handler_seconds_count{{{labels}}} {entry['count']}")
+
+            lines += [
+                "# HELP consumer_in_flight Handlers running or waiting for a slot",
+                "# TYPE consumer_in_flight gauge",
+                f'consumer_in_flight{{queue="{q}"}} {self.in_flight}',
+                "# HELP consumer_queue_messages Ready messages (passive queue_declare)",
+                "# TYPE consumer_queue_messages gauge",
+            ]
+            for name, (messages, _) in sorted(self.queue_depth.items()):
+                lines.append(f'consumer_queue_messages{{queue="{name}"}} {messages}')
+            lines += [
+                "# HELP consumer_queue_consumers Consumers attached to the queue",
+                "# TYPE consumer_queue_consumers gauge",
+            ]
+            for name, (_, consumers) in sorted(self.queue_depth.items()):
+                lines.append(f'consumer_queue_consumers{{queue="{name}"}} {consumers}')
+
+            lines += [
+                "# TYPE consumer_uptime_seconds gauge",
+                f'consumer_uptime_seconds{{queue="{q}"}} {time.time() - self.started_at:.0f}',
+            ]
+
+        return "\n".join(lines) + "\n"
+
+
+async def serve_metrics(metrics, port=CONSUMER_METRICS_PORT):
+    """Start the /metrics HTTP server; returns the asyncio server (or None)."""
+    if not port:
+        return None
+
+    async def handle(reader, writer):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 5)
+            # drain the request headers
+            while (await asyncio.wait_for(reader.readline(), 5)) not in (b"\r\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1] == "/metrics":
+                status, body = "200 OK", metrics.render().encode()
+            else:
+                status, body = "404 Not Found", b"not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    try:
+        server = await asyncio.start_server(handle, host="0.0.0.0", port=port)
+    except OSError as e:
+        logger.warning("Metrics server could not bind port %s: %s", port, e)
+        return None
+    logger.info("Consumer metrics on :%s/metrics", port)
+    return server
@@ -154,8 +154,31 @@ CORS_ALLOW_CREDENTIALS = True
 AUTH_SERVICE_URL = os.getenv("AUTH_SERVICE_URL")
 USER_SERVICE_URL = os.getenv("USER_SERVICE_URL")
 TRAINER_SERVICE_URL = os.getenv("TRAINER_SERVICE_URL")
+INTERNAL_SERVICE_TOKEN = os.getenv("INTERNAL_SERVICE_TOKEN", "")
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+
+# consumer message_id dedupe (common/dedupe.py)
+DEDUPE_WINDOW_SECONDS = int(os.getenv("DEDUPE_WINDOW_SECONDS", str(24 * 3600)))
+DEDUPE_BLOOM_CAPACITY = int(os.getenv("DEDUPE_BLOOM_CAPACITY", "100000"))
 
 
 CELERY_BROKER_URL = os.getenv("RABBIT_URL")
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
+
+# roster reconcile against user_service bookings (trainer_app.tasks)
+TRAINER_CLIENT_RECONCILE_SECONDS = int(
+    os.getenv("TRAINER_CLIENT_RECONCILE_SECONDS", "900")
+)
+# how far back each run looks; longer than the interval so runs overlap
+TRAINER_CLIENT_RECONCILE_WINDOW_SECONDS = int(
+    os.getenv("TRAINER_CLIENT_RECONCILE_WINDOW_SECONDS", "3600")
+)
+
+CELERY_BEAT_SCHEDULE = {
+    "reconcile-trainer-clients": {
+        "task": "trainer_app.tasks.reconcile_trainer_clients",
+        "schedule": timedelta(seconds=TRAINER_CLIENT_RECONCILE_SECONDS),
+    },
+}
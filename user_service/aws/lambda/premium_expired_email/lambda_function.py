@@ -4,42 +4,63 @@ import os
 
 ses = boto3.client("ses")
 
+def send_expiry_email(email):
+    ses.send_email(
+        Source=os.environ["FROM_EMAIL"],
+        Destination={"ToAddresses": [email]},
+        Message={
+            "Subject": {
+                "Data": "Your Premium Plan Has Expired",
+                "Charset": "UTF-8",
+            },
+            "Body": {
+                "Text": {
+                    "Data": (
+                        "Hi,\n\n"
+                        "Your premium subscription has expired.\n"
+                        "Please renew to continue premium features.\n\n"
+                        "— Team"
+                    ),
+                    "Charset": "UTF-8",
+                }
+            },
+        },
+    )
+
+
 def lambda_handler(event, context):
     """
     Triggered by SQS
     Message format:
     {
+        "user_id": "<uuid>",
         "email": "user@gmail.com"
     }
+
+    Returns an SQS partial batch response: only the records listed in
+    batchItemFailures are redelivered (the event source mapping must have
+    ReportBatchItemFailures enabled).
     """
 
+    failures = []
+
     for record in event["Records"]:
-        body = json.loads(record["body"])
+        try:
+            body = json.loads(record["body"])
+        except (TypeError, ValueError):
+            # malformed, a retry won't fix it
+            print(f"Dropping malformed message {record['messageId']}")
+            continue
+
         email = body.get("email")
 
         if not email:
             continue
 
-        ses.send_email(
-            Source=os.environ["FROM_EMAIL"],
-            Destination={"ToAddresses": [email]},
-            Message={
-                "Subject": {
-                    "Data": "Your Premium Plan Has Expired",
-                    "Charset": "UTF-8",
-                },
-                "Body": {
-                    "Text": {
-                        "Data": (
-                            "Hi,\n\n"
-                            "Your premium subscription has expired.\n"
-                            "Please renew to continue premium features.\n\n"
-                            "— Team"
-                        ),
-                        "Charset": "UTF-8",
-                    }
-                },
-            },
-        )
+        try:
+            send_expiry_email(email)
+        except Exception as exc:
+            print(f"Failed to send expiry email for {record['messageId']}: {exc}")
+            failures.append({"itemIdentifier": record["messageId"]})
 
-    return {"statusCode": 200}
\ No newline at end of file
+    return {"batchItemFailures": failures}
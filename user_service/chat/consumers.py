@@ -1,6 +1,8 @@
 import json
 from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
+from django.core.exceptions import ValidationError
+from .helper.read_state import mark_read
 from .models import ChatRoom
 
 
@@ -19,13 +21,26 @@ class ChatConsumer(AsyncWebsocketConsumer):
             await self.close()
             return
 
+        self.user_id = user.id
+
         await self.channel_layer.group_add(self.group_name, self.channel_name)
         await self.accept()
 
     async def disconnect(self, close_code):
         await self.channel_layer.group_discard(self.group_name, self.channel_name)
 
-    # WS is receive-only. No receive().
+    # Messages are sent over REST; the only client event is
+    # {"type": "read", "message_id": <optional>} advancing the read watermark.
+    async def receive(self, text_data=None, bytes_data=None):
+        try:
+            content = json.loads(text_data or "")
+        except ValueError:
+            return
+
+        if not isinstance(content, dict) or content.get("type") != "read":
+            return
+
+        await self._mark_read(content.get("message_id"))
 
     async def chat_message(self, event):
         await self.send(
@@ -37,6 +52,27 @@ class ChatConsumer(AsyncWebsocketConsumer):
             )
         )
 
+    async def chat_read(self, event):
+        await self.send(
+            text_data=json.dumps(
+                {
+                    "type": "read",
+                    "payload": event["payload"],
+                }
+            )
+        )
+
+    @database_sync_to_async
+    def _mark_read(self, message_id):
+        room = ChatRoom.objects.filter(id=self.room_id).first()
+        if room is None:
+            return None
+        try:
+            return mark_read(room, self.user_id, message_id)
+        except (ValueError, ValidationError):
+            # malformed message_id from the client
+            return None
+
     @database_sync_to_async
     def _is_user_allowed(self, user_id):
         return (
@@ -108,6 +144,10 @@ class UserCallConsumer(AsyncJsonWebsocketConsumer):
 
         await self.send_json(payload)
 
+    # plan / nutrition status pushes (chat.ws_notify.notify_user_event)
+    async def user_event(self, event):
+        await self.send_json(event["payload"])
+
 
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 import logging
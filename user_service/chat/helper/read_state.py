@@ -0,0 +1,121 @@
+"""
+Read watermarks and unread counters per (room, participant).
+
+Sending a message is one counter bump for the recipient; reading is one
+watermark update for the reader. Nothing scans or rewrites messages.
+
+    record_message(room, msg)        # after Message.objects.create(...)
+    mark_read(room, user_id)         # history fetch or WS "read" event
+    soft_delete_message(room, msg)   # instead of setting is_deleted by hand
+"""
+
+from django.db.models import F, Q
+
+from ..models import ChatParticipant, Message
+from ..ws_notify import notify_read
+
+
+def ensure_participants(room):
+    ChatParticipant.objects.bulk_create(
+        [
+            ChatParticipant(room=room, user_id=room.user_id),
+            ChatParticipant(room=room, user_id=room.trainer_user_id),
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def record_message(room, message):
+    """
+    Bookkeeping for a new message: bump the recipient's unread counter,
+    move the sender's watermark to their own message (never backwards:
+    concurrent sends commit in any order) and touch the room's
+    ``last_message_at``.
+    """
+    recipient_id = room.other_participant_id(message.sender_user_id)
+
+    bumped = ChatParticipant.objects.filter(room=room, user_id=recipient_id).update(
+        unread_count=F("unread_count") + 1
+    )
+    if not bumped:
+        # room created before its participant rows existed
+        ensure_participants(room)
+        ChatParticipant.objects.filter(room=room, user_id=recipient_id).update(
+            unread_count=F("unread_count") + 1
+        )
+
+    ChatParticipant.objects.filter(room=room, user_id=message.sender_user_id).filter(
+        Q(last_read_at__isnull=True) | Q(last_read_at__lt=message.created_at)
+    ).update(
+        last_read_at=message.created_at,
+        last_read_message=message,
+        unread_count=0,
+    )
+
+    room.last_message_at = message.created_at
+    room.save(update_fields=["last_message_at"])
+
+
+def mark_read(room, user_id, message_id=None):
+    """
+    Advance ``user_id``'s watermark to ``message_id`` (default: the newest
+    message) and reset the unread counter. The watermark never moves
+    backwards. On a change the other participant gets a ``read`` receipt
+    over the room's socket.
+
+    Returns the message the watermark moved to, or None if nothing changed.
+    """
+    messages = Message.objects.filter(room=room, is_deleted=False)
+    if message_id:
+        target = messages.filter(id=message_id).first()
+    else:
+        target = messages.order_by("-created_at").first()
+    if target is None:
+        return None
+
+    # messages from the other side still after the watermark (usually none)
+    unread = (
+        messages.filter(created_at__gt=target.created_at)
+        .exclude(sender_user_id=user_id)
+        .count()
+        if message_id
+        else 0
+    )
+
+    updated = (
+        ChatParticipant.objects.filter(room=room, user_id=user_id)
+        .filter(Q(last_read_at__isnull=True) | Q(last_read_at__lt=target.created_at))
+        .update(
+            last_read_at=target.created_at,
+            last_read_message=target,
+            unread_count=unread,
+        )
+    )
+    if not updated:
+        return None
+
+    notify_read(room.id, user_id, target)
+    return target
+
+
+def soft_delete_message(room, message):
+    """
+    Mark ``message`` deleted. If the recipient had not read it yet, their
+    unread counter drops by one (never below zero).
+
+    Returns False if the message was already deleted.
+    """
+    deleted = Message.objects.filter(id=message.id, is_deleted=False).update(
+        is_deleted=True
+    )
+    if not deleted:
+        return False
+    message.is_deleted = True
+
+    recipient_id = room.other_participant_id(message.sender_user_id)
+    ChatParticipant.objects.filter(
+        room=room, user_id=recipient_id, unread_count__gt=0
+    ).filter(
+        Q(last_read_at__isnull=True) | Q(last_read_at__lt=message.created_at)
+    ).update(unread_count=F("unread_count") - 1)
+    return True
@@ -1,19 +1,13 @@
 from types import SimpleNamespace
 from urllib.parse import parse_qs
-from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
-from channels.db import database_sync_to_async
-from rest_framework_simplejwt.backends import TokenBackend
 from rest_framework_simplejwt.exceptions import TokenError
+from user_service.common.auth import decode_token
 import uuid
 
 class JWTAuthMiddleware:
     def __init__(self, inner):
         self.inner = inner
-        self.backend = TokenBackend(
-            algorithm=settings.SIMPLE_JWT.get("ALGORITHM", "HS256"),
-            signing_key=settings.SIMPLE_JWT.get("SIGNING_KEY"),
-        )
 
     async def __call__(self, scope, receive, send):
         scope["user"] = AnonymousUser()
@@ -23,16 +17,16 @@ class JWTAuthMiddleware:
         token_list = params.get("token")
 
         if token_list:
-            user = await self._get_user_from_token(token_list[0])
+            # pure CPU (and usually a cache hit), so no thread hop
+            user = self._get_user_from_token(token_list[0])
             if user:
                 scope["user"] = user
 
         return await self.inner(scope, receive, send)
 
-    @database_sync_to_async
     def _get_user_from_token(self, token):
         try:
-            payload = self.backend.decode(token, verify=True)
+            payload = decode_token(token)
 
             raw_user_id = payload.get("sub") or payload.get("user_id") or payload.get("id")
             if not raw_user_id:
@@ -0,0 +1,107 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+
+
+def create_participants(apps, schema_editor):
+    """
+    One read-state row per room participant. Unread counts and watermarks
+    come from the legacy per-message read_at column.
+    """
+    ChatRoom = apps.get_model("chat", "ChatRoom")
+    Message = apps.get_model("chat", "Message")
+    ChatParticipant = apps.get_model("chat", "ChatParticipant")
+
+    # {(room_id, reader_id): (unread, last_read_at)}; a message is read by
+    # whoever did not send it
+    stats = {}
+    rows = (
+        Message.objects.filter(is_deleted=False)
+        .values("room_id", "sender_user_id")
+        .annotate(
+            unread=Count("id", filter=Q(read_at__isnull=True)),
+            last_read_at=Max("read_at"),
+        )
+    )
+    for row in rows.iterator():
+        stats[(row["room_id"], row["sender_user_id"])] = (
+            row["unread"],
+            row["last_read_at"],
+        )
+
+    batch = []
+    for room in ChatRoom.objects.only("id", "user_id", "trainer_user_id").iterator():
+        for reader, sender in (
+            (room.user_id, room.trainer_user_id),
+            (room.trainer_user_id, room.user_id),
+        ):
+            unread, last_read_at = stats.get((room.id, sender), (0, None))
+            batch.append(
+                ChatParticipant(
+                    room_id=room.id,
+                    user_id=reader,
+                    unread_count=unread,
+                    last_read_at=last_read_at,
+                )
+            )
+        if len(batch) >= 1000:
+            ChatParticipant.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    ChatParticipant.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0004_alter_message_type_call"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChatParticipant",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("user_id", models.UUIDField()),
+                ("last_read_at", models.DateTimeField(blank=True, null=True)),
+                ("unread_count", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "last_read_message",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="chat.message",
+                    ),
+                ),
+                (
+                    "room",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="participants",
+                        to="chat.chatroom",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("room", "user_id"),
+                        name="unique_chat_participant",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(create_participants, migrations.RunPython.noop),
+    ]
@@ -110,6 +110,44 @@ class Message(models.Model):
         return f"Message({self.type}) in {self.room_id}"
 
 
+class ChatParticipant(models.Model):
+    """
+    Per-(room, participant) read state: a watermark on the last message
+    read plus a denormalized unread counter, bumped on send and reset on
+    read (see helper/read_state.py).
+    """
+
+    room = models.ForeignKey(
+        ChatRoom,
+        on_delete=models.CASCADE,
+        related_name="participants",
+    )
+    user_id = models.UUIDField()
+
+    last_read_at = models.DateTimeField(null=True, blank=True)
+    last_read_message = models.ForeignKey(
+        Message,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    unread_count = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["room", "user_id"],
+                name="unique_chat_participant",
+            )
+        ]
+
+    def __str__(self):
+        return f"ChatParticipant({self.user_id} in {self.room_id}, unread={self.unread_count})"
+
+
 
 class Call(models.Model):
     STATUS_RINGING = "ringing"
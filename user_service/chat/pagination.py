@@ -5,3 +5,11 @@ class ChatMessageCursorPagination(CursorPagination):
     page_size = 20
     ordering = "-created_at"  # newest first
     cursor_query_param = "cursor"
+
+
+class ChatRoomCursorPagination(CursorPagination):
+    page_size = 30
+    max_page_size = 100
+    page_size_query_param = "page_size"
+    ordering = "-activity_at"  # annotated: last message time, else room creation
+    cursor_query_param = "cursor"
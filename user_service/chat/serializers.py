@@ -1,5 +1,5 @@
 # chat/serializers.py
-from chat.models import Message
+from chat.models import ChatRoom, Message
 from rest_framework import serializers
 
 
@@ -34,6 +34,7 @@ class UserMessageCreateSerializer(serializers.Serializer):
 
 class MessageSerializer(serializers.ModelSerializer):
     file = serializers.SerializerMethodField()
+    read_at = serializers.SerializerMethodField()
 
     class Meta:
         model = Message
@@ -50,6 +51,20 @@ class MessageSerializer(serializers.ModelSerializer):
             "created_at",
         ]
 
+    def get_read_at(self, obj):
+        # read once the recipient's watermark reaches the message; the
+        # per-message column is only set on legacy rows
+        read_at = obj.read_at
+        watermarks = self.context.get("last_read_at")
+        if watermarks:
+            recipient_last_read_at = next(
+                (at for uid, at in watermarks.items() if uid != str(obj.sender_user_id)),
+                None,
+            )
+            if recipient_last_read_at and obj.created_at <= recipient_last_read_at:
+                read_at = read_at or recipient_last_read_at
+        return serializers.DateTimeField().to_representation(read_at) if read_at else None
+
     def get_file(self, obj):
         if not obj.file:
             return None
@@ -57,3 +72,29 @@ class MessageSerializer(serializers.ModelSerializer):
         request = self.context.get("request")
         return request.build_absolute_uri(obj.file.url) if request else obj.file.url
 
+
+class ChatRoomListSerializer(serializers.ModelSerializer):
+    """Room list row; every extra field is an annotation from one query."""
+
+    has_unread = serializers.BooleanField(read_only=True)
+    unread_count = serializers.IntegerField(read_only=True)
+    last_read_message_id = serializers.UUIDField(read_only=True, allow_null=True)
+    last_message_type = serializers.CharField(read_only=True, allow_null=True)
+    last_message_text = serializers.CharField(read_only=True, allow_null=True)
+    last_message_sender_id = serializers.UUIDField(read_only=True, allow_null=True)
+
+    class Meta:
+        model = ChatRoom
+        fields = [
+            "id",
+            "user_id",
+            "trainer_user_id",
+            "last_message_at",
+            "created_at",
+            "has_unread",
+            "unread_count",
+            "last_read_message_id",
+            "last_message_type",
+            "last_message_text",
+            "last_message_sender_id",
+        ]
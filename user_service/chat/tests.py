@@ -1,3 +1,156 @@
+import uuid
+from datetime import timedelta
+from types import SimpleNamespace
+
 from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from .helper.read_state import ensure_participants, record_message, soft_delete_message
+from .models import ChatParticipant, ChatRoom, Message
+from .views import UserChatRoomListView
+
+
+class ChatRoomListQueryCountTests(TestCase):
+    """The room list costs the same number of queries for 1 room or many."""
+
+    def setUp(self):
+        self.user_id = uuid.uuid4()
+        self.factory = APIRequestFactory()
+
+    def make_room(self, unread=0, deleted_last=False):
+        trainer_id = uuid.uuid4()
+        room = ChatRoom.objects.create(user_id=self.user_id, trainer_user_id=trainer_id)
+
+        first = Message.objects.create(
+            room=room,
+            sender_user_id=self.user_id,
+            sender_role=Message.SENDER_USER,
+            type=Message.TEXT,
+            text="hello",
+        )
+        for i in range(unread):
+            Message.objects.create(
+                room=room,
+                sender_user_id=trainer_id,
+                sender_role=Message.SENDER_TRAINER,
+                type=Message.TEXT,
+                text=f"reply {i}",
+            )
+        if deleted_last:
+            Message.objects.create(
+                room=room,
+                sender_user_id=trainer_id,
+                sender_role=Message.SENDER_TRAINER,
+                type=Message.TEXT,
+                text="deleted",
+                is_deleted=True,
+            )
+
+        ChatParticipant.objects.create(
+            room=room,
+            user_id=self.user_id,
+            last_read_at=first.created_at,
+            last_read_message=first,
+            unread_count=unread,
+        )
+        ChatParticipant.objects.create(room=room, user_id=trainer_id)
+        return room
+
+    def list_rooms(self):
+        request = self.factory.get("/api/v1/chat/rooms/")
+        force_authenticate(
+            request, user=SimpleNamespace(id=self.user_id, is_authenticated=True)
+        )
+        response = UserChatRoomListView.as_view()(request)
+        response.render()
+        self.assertEqual(response.status_code, 200)
+        return response.data["results"]
+
+    def test_query_count_does_not_grow_with_rooms(self):
+        self.make_room(unread=1)
+        with self.assertNumQueries(1):
+            rows = self.list_rooms()
+        self.assertEqual(len(rows), 1)
+
+        for i in range(9):
+            self.make_room(unread=i % 3, deleted_last=i % 2 == 0)
+        with self.assertNumQueries(1):
+            rows = self.list_rooms()
+        self.assertEqual(len(rows), 10)
+
+    def test_unread_and_deleted_messages(self):
+        room = self.make_room(unread=2, deleted_last=True)
+
+        (row,) = self.list_rooms()
+        self.assertEqual(row["id"], str(room.id))
+        self.assertTrue(row["has_unread"])
+        self.assertEqual(row["unread_count"], 2)
+        # the deleted message is never the preview
+        self.assertEqual(row["last_message_text"], "reply 1")
+
+
+class ReadStateTests(TestCase):
+    def setUp(self):
+        self.user_id = uuid.uuid4()
+        self.trainer_id = uuid.uuid4()
+        self.room = ChatRoom.objects.create(
+            user_id=self.user_id, trainer_user_id=self.trainer_id
+        )
+        ensure_participants(self.room)
+
+    def send(self, sender_id, text="hi"):
+        message = Message.objects.create(
+            room=self.room,
+            sender_user_id=sender_id,
+            sender_role=(
+                Message.SENDER_USER
+                if sender_id == self.user_id
+                else Message.SENDER_TRAINER
+            ),
+            type=Message.TEXT,
+            text=text,
+        )
+        record_message(self.room, message)
+        return message
+
+    def participant(self, user_id):
+        return ChatParticipant.objects.get(room=self.room, user_id=user_id)
+
+    def test_sender_watermark_never_moves_back(self):
+        newer = self.send(self.user_id, "newer")
+        older = Message.objects.create(
+            room=self.room,
+            sender_user_id=self.user_id,
+            sender_role=Message.SENDER_USER,
+            type=Message.TEXT,
+            text="older",
+        )
+        Message.objects.filter(id=older.id).update(
+            created_at=newer.created_at - timedelta(seconds=1)
+        )
+        older.refresh_from_db()
+
+        # the older send commits last
+        record_message(self.room, older)
+        self.assertEqual(self.participant(self.user_id).last_read_message_id, newer.id)
+
+    def test_soft_delete_of_unread_message_drops_counter(self):
+        first = self.send(self.trainer_id, "one")
+        self.send(self.trainer_id, "two")
+        self.assertEqual(self.participant(self.user_id).unread_count, 2)
+
+        self.assertTrue(soft_delete_message(self.room, first))
+        self.assertEqual(self.participant(self.user_id).unread_count, 1)
+
+        # deleting twice changes nothing
+        self.assertFalse(soft_delete_message(self.room, first))
+        self.assertEqual(self.participant(self.user_id).unread_count, 1)
+
+    def test_soft_delete_of_read_message_keeps_counter(self):
+        read = self.send(self.trainer_id, "read")
+        ChatParticipant.objects.filter(room=self.room, user_id=self.user_id).update(
+            last_read_at=read.created_at, last_read_message=read, unread_count=0
+        )
 
-# Create your tests here.
+        self.assertTrue(soft_delete_message(self.room, read))
+        self.assertEqual(self.participant(self.user_id).unread_count, 0)
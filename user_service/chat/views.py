@@ -4,53 +4,76 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.generics import ListAPIView
 from django.shortcuts import get_object_or_404
-from django.utils.timezone import now
-from chat.models import ChatRoom, Message
-from chat.serializers import UserMessageCreateSerializer, MessageSerializer
-from chat.pagination import ChatMessageCursorPagination
+from chat.models import ChatParticipant, ChatRoom, Message
+from chat.serializers import (
+    ChatRoomListSerializer,
+    MessageSerializer,
+    UserMessageCreateSerializer,
+)
+from chat.pagination import ChatMessageCursorPagination, ChatRoomCursorPagination
 from chat.ws_notify import notify_new_message
 import uuid 
 from .helper.message_normalizer import normalize_for_ws
-from django.db.models import Q
+from .helper.read_state import mark_read, record_message
+from django.db.models import BooleanField, ExpressionWrapper, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Substr
 from django.db import transaction
 
 
 # -------------------------------------------------
 # USER CHAT ROOM LIST (with has_unread)
 # -------------------------------------------------
-class UserChatRoomListView(APIView):
-    permission_classes = [IsAuthenticated]
+ROOM_SNIPPET_LENGTH = 80
+
+
+def room_list_queryset(user_id):
+    """
+    The caller's active rooms with unread state (from their read watermark)
+    and a last-message preview, all as annotations: one query however many
+    rooms there are.
+    """
+    # the caller's read state: one row per (room, participant)
+    read_state = ChatParticipant.objects.filter(room=OuterRef("pk"), user_id=user_id)
 
-    def get(self, request):
-        user_id = str(request.user.id)
+    last_message = Message.objects.filter(
+        room=OuterRef("pk"),
+        is_deleted=False,
+    ).order_by("-created_at")
 
-        rooms = ChatRoom.objects.filter(
+    return (
+        ChatRoom.objects.filter(
             Q(user_id=user_id) | Q(trainer_user_id=user_id),
             is_active=True,
-        ).order_by("-last_message_at", "-created_at")
-
-        data = []
-
-        for room in rooms:
-            has_unread = Message.objects.filter(
-                room=room,
-                read_at__isnull=True,
-            ).exclude(
-                sender_user_id=user_id
-            ).exists()
-
-            data.append(
-                {
-                    "id": room.id,
-                    "user_id": room.user_id,
-                    "trainer_user_id": room.trainer_user_id,
-                    "last_message_at": room.last_message_at,
-                    "created_at": room.created_at,
-                    "has_unread": has_unread,
-                }
-            )
+        )
+        .annotate(
+            activity_at=Coalesce("last_message_at", "created_at"),
+            unread_count=Coalesce(Subquery(read_state.values("unread_count")[:1]), 0),
+            has_unread=ExpressionWrapper(
+                Q(unread_count__gt=0), output_field=BooleanField()
+            ),
+            last_read_message_id=Subquery(
+                read_state.values("last_read_message_id")[:1]
+            ),
+            last_message_type=Subquery(last_message.values("type")[:1]),
+            last_message_text=Subquery(
+                last_message.annotate(
+                    snippet=Substr("text", 1, ROOM_SNIPPET_LENGTH)
+                ).values("snippet")[:1]
+            ),
+            last_message_sender_id=Subquery(
+                last_message.values("sender_user_id")[:1]
+            ),
+        )
+    )
+
+
+class UserChatRoomListView(ListAPIView):
+    serializer_class = ChatRoomListSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = ChatRoomCursorPagination
 
-        return Response(data)
+    def get_queryset(self):
+        return room_list_queryset(str(self.request.user.id))
 
 
 # -------------------------------------------------
@@ -61,6 +84,19 @@ class ChatHistoryView(ListAPIView):
     permission_classes = [IsAuthenticated]
     pagination_class = ChatMessageCursorPagination
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        # both participants' watermarks, for each message's read_at
+        room = getattr(self, "room", None)
+        if room is not None:
+            context["last_read_at"] = {
+                str(user_id): last_read_at
+                for user_id, last_read_at in ChatParticipant.objects.filter(
+                    room=room
+                ).values_list("user_id", "last_read_at")
+            }
+        return context
+
     def get_queryset(self):
         room = get_object_or_404(
             ChatRoom,
@@ -73,13 +109,10 @@ class ChatHistoryView(ListAPIView):
         if user_id not in (str(room.user_id), str(room.trainer_user_id)):
             return Message.objects.none()
 
-        # ✅ AUTO MARK AS READ
-        Message.objects.filter(
-            room=room,
-            read_at__isnull=True,
-        ).exclude(
-            sender_user_id=user_id
-        ).update(read_at=now())
+        self.room = room
+
+        # ✅ AUTO MARK AS READ (one watermark row, no message rewrite)
+        mark_read(room, user_id)
 
         return Message.objects.filter(
             room=room,
@@ -138,8 +171,7 @@ class SendTextMessageView(APIView):
             text=text,
         )
 
-        room.last_message_at = msg.created_at
-        room.save(update_fields=["last_message_at"])
+        record_message(room, msg)
 
         # ✅ SEND ORM INSTANCE TO WS
         notify_new_message(room.id, msg)
@@ -201,8 +233,7 @@ class SendMediaMessageView(APIView):
             mime_type=file.content_type if file else "",
         )
 
-        room.last_message_at = msg.created_at
-        room.save(update_fields=["last_message_at"])
+        record_message(room, msg)
 
         # ✅ CRITICAL FIX: notify AFTER commit, send ORM instance
         transaction.on_commit(
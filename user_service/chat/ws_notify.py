@@ -1,3 +1,5 @@
+import logging
+
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 from django.db import transaction
@@ -5,6 +7,8 @@ from django.db import transaction
 from .serializers import MessageSerializer
 from .helper.message_normalizer import normalize_for_ws
 
+logger = logging.getLogger(__name__)
+
 def notify_new_message(room_id, message):
     """
     message MUST be a Message ORM instance
@@ -26,3 +30,57 @@ def notify_new_message(room_id, message):
 
     # send only after DB commit
     transaction.on_commit(_send)
+
+
+def notify_read(room_id, user_id, message):
+    """
+    "Seen" receipt: tell the room that ``user_id`` has read up to
+    ``message``, once the surrounding transaction commits.
+    """
+
+    def _send():
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+
+        async_to_sync(channel_layer.group_send)(
+            f"chat_{room_id}",
+            {
+                "type": "chat_read",
+                "payload": {
+                    "room_id": str(room_id),
+                    "user_id": str(user_id),
+                    "last_read_message_id": str(message.id),
+                    "last_read_at": message.created_at.isoformat(),
+                },
+            },
+        )
+
+    transaction.on_commit(_send)
+
+
+def notify_user_event(user_id, event_type, **data):
+    """
+    Push ``{"type": event_type, ...data}`` to the user's personal socket
+    (``user_{id}`` group joined by UserCallConsumer) once the surrounding
+    transaction commits. Best effort: a missing socket or channel layer
+    never fails the caller.
+    """
+
+    def _send():
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+
+        try:
+            async_to_sync(channel_layer.group_send)(
+                f"user_{user_id}",
+                {
+                    "type": "user_event",
+                    "payload": {"type": event_type, **data},
+                },
+            )
+        except Exception:
+            logger.exception("user event %s for %s failed", event_type, user_id)
+
+    transaction.on_commit(_send)
@@ -46,10 +46,45 @@ case "${SERVICE_ROLE:-web}" in
     python manage.py run_rabbit_trainer_consumer
     ;;
 
+  directory_consumer)
+    wait_for "rabbitmq" "5672" "RabbitMQ"
+    echo "Starting USER directory RabbitMQ consumer..."
+    python manage.py run_user_directory_consumer
+    ;;
+
+  booking_consumer)
+    wait_for "rabbitmq" "5672" "RabbitMQ"
+    echo "Starting USER booking decision RabbitMQ consumer..."
+    python manage.py run_booking_consumer
+    ;;
+
+  outbox_relay)
+    wait_for "rabbitmq" "5672" "RabbitMQ"
+    echo "Starting USER booking outbox relay..."
+    python manage.py relay_outbox
+    ;;
+
   celery_worker)
+    # premium jobs and other short DB tasks
+    wait_for "rabbitmq" "5672" "RabbitMQ"
+    echo "Starting Celery worker (user_tasks, prefork)..."
+    celery -A user_service.celery worker -l info -Q user_tasks \
+      --pool=prefork --concurrency="${CELERY_CONCURRENCY:-4}" -n "user_tasks@%h"
+    ;;
+
+  celery_ai_worker)
+    # diet / workout / nutrition: I/O bound on the AI service, so threads
+    wait_for "rabbitmq" "5672" "RabbitMQ"
+    # user_ai is the pre-priority queue, only drained until it is empty
+    echo "Starting Celery AI worker (user_ai_p + legacy user_ai, threads)..."
+    celery -A user_service.celery worker -l info -Q user_ai_p,user_ai \
+      --pool=threads --concurrency="${AI_WORKER_CONCURRENCY:-32}" -n "user_ai@%h"
+    ;;
+
+  celery_beat)
     wait_for "rabbitmq" "5672" "RabbitMQ"
-    echo "Starting Celery worker..."
-    celery -A user_service.celery worker -l info -Q user_tasks
+    echo "Starting Celery beat..."
+    celery -A user_service.celery beat -l info --schedule /tmp/celerybeat-schedule
     ;;
 
   *)
@@ -0,0 +1,23 @@
+# user_app/bench_tasks.py
+# Queue latency benchmark tasks (manage.py bench_task_latency). Workers only
+# register them when started with CELERY_BENCH_TASKS=1 (see settings.py).
+import time
+
+import redis
+from celery import shared_task
+from django.conf import settings
+
+BENCH_RESULTS_KEY = "bench:task_latency"
+
+
+@shared_task(ignore_result=True)
+def bench_io_task(seconds):
+    # stands in for an LLM call: the worker just waits on I/O
+    time.sleep(seconds)
+
+
+@shared_task(ignore_result=True)
+def bench_ping_task(enqueued_at):
+    # default queue, like the booking tasks (user_tasks)
+    client = redis.from_url(settings.REDIS_URL)
+    client.rpush(BENCH_RESULTS_KEY, time.time() - enqueued_at)
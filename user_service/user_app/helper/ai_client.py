@@ -1,5 +1,5 @@
 import requests
-from django.conf import settings
+from user_service.common.http_client import get_upstream
 
 
 class AIServiceError(Exception):
@@ -7,13 +7,13 @@ class AIServiceError(Exception):
 
 
 def generate_diet_plan(profile_data: dict):
-    url = f"{settings.AI_SERVICE_BASE_URL}/api/v1/diet/generate/"
-
     try:
-        response = requests.post(
-            url,
+        # LLM calls are expensive; retries are left to the Celery task
+        response = get_upstream("ai").post(
+            "/api/v1/diet/generate/",
             json=profile_data,
-            timeout=20,
+            timeout=(2, 20),
+            retries=0,
         )
     except requests.RequestException:
         raise AIServiceError("AI service unreachable")
@@ -33,13 +33,12 @@ def estimate_nutrition(food_text: str) -> dict:
     if not food_text or not food_text.strip():
         raise ValueError("food_text cannot be empty")
 
-    url = f"{settings.AI_SERVICE_BASE_URL}/api/v1/diet/estimate-nutrition/"
-
     try:
-        response = requests.post(
-            url,
+        response = get_upstream("ai").post(
+            "/api/v1/diet/estimate-nutrition/",
             json={"food_text": food_text},
-            timeout=10,  # never block user service
+            timeout=(2, 10),  # never block user service
+            retries=0,
         )
     except requests.RequestException as e:
         raise AIServiceError("AI service not reachable") from e
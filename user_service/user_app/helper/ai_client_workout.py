@@ -1,20 +1,18 @@
 import sys
 
-import requests
-from django.conf import settings
+from user_service.common.http_client import get_upstream
 
 
 def request_ai_workout(payload: dict) -> dict:
-    url = f"{settings.AI_SERVICE_BASE_URL}/api/v1/workout/generate/"
-
     sys.stderr.write("\n🔥🔥🔥 WORKOUT AI PAYLOAD SENT 🔥🔥🔥\n")
     sys.stderr.write(str(payload) + "\n")
     sys.stderr.flush()
 
-    response = requests.post(
-        url,
+    response = get_upstream("ai").post(
+        "/api/v1/workout/generate/",
         json=payload,
-        timeout=60,
+        timeout=(2, 60),
+        retries=0,
     )
 
     if response.status_code != 200:
@@ -0,0 +1,313 @@
+"""
+Priority-aware dispatch for AI generation tasks.
+
+The ``user_ai_p`` queue is a RabbitMQ priority queue. Each job's priority
+comes from the user's premium entitlement and whether someone is waiting
+on it (interactive) or it was started by a schedule. A per-user cap on
+in-flight jobs demotes a user's extra jobs to the lowest priority, so one
+user can't crowd everyone else out, and the wait between enqueue and
+start is recorded per priority class.
+
+Jobs can be deduplicated on a ``(kind, user, week, inputs)`` key, where
+``inputs`` is a hash of the task's arguments plus anything else the
+caller says the result depends on: the first dispatch takes a Redis lease
+holding its task id, and a second dispatch with the same inputs while
+that lease is held joins the running job instead of starting another LLM
+call. Every attempt (including autoretries) renews the lease when it
+starts, so a retried job that outlives JOB_LEASE_TTL keeps it. The lease
+(and the user's in-flight slot) is released when the job finishes,
+whether it succeeded or failed for good, or when it is revoked or
+expires before running.
+
+    dispatch_ai_task(
+        generate_diet_plan_task, [plan.id],
+        user_id=request.user.id,
+        dedup=("diet", plan.week_start, (profile.weight_kg, profile.goal)),
+    )
+"""
+
+import hashlib
+import json
+import logging
+import time
+import uuid
+
+import redis
+from celery.signals import task_postrun, task_prerun, task_revoked
+from django.conf import settings
+
+from .entitlements import is_premium_user
+
+logger = logging.getLogger(__name__)
+
+redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+MAX_INFLIGHT_PER_USER = getattr(settings, "AI_MAX_INFLIGHT_PER_USER", 3)
+INFLIGHT_TTL = 3600  # safety net if a worker dies before decrementing
+
+# class name -> broker priority (0..AI_QUEUE_MAX_PRIORITY, higher runs first)
+PRIORITY_CLASSES = {
+    "premium_interactive": 9,
+    "interactive": 6,
+    "premium_scheduled": 4,
+    "scheduled": 2,
+    "throttled": 0,
+}
+
+WAIT_BUCKETS_SECONDS = (1, 5, 30, 120, 600)
+
+# must outlast one attempt; each attempt renews it when it starts
+JOB_LEASE_TTL = getattr(settings, "AI_JOB_LEASE_TTL", 900)
+DEDUP_STATS_KEY = "ai_job_dedup:suppressed"
+
+_RELEASE_LEASE = redis_client.register_script(
+    """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('DEL', KEYS[1])
+    end
+    return 0
+    """
+)
+
+_RENEW_LEASE = redis_client.register_script(
+    """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('EXPIRE', KEYS[1], ARGV[2])
+    end
+    return 0
+    """
+)
+
+AI_TASK_NAMES = frozenset(
+    {
+        "user_app.tasks.generate_diet_plan_task",
+        "user_app.tasks.generate_weekly_workout_task",
+        "user_app.tasks.estimate_nutrition_task",
+    }
+)
+
+
+def _inflight_key(user_id):
+    return f"ai_inflight:{user_id}"
+
+
+def _wait_key(priority_class):
+    return f"ai_queue_wait:{priority_class}"
+
+
+def priority_class_for(user_id, interactive=True):
+    premium = is_premium_user(user_id)
+    if interactive:
+        return "premium_interactive" if premium else "interactive"
+    return "premium_scheduled" if premium else "scheduled"
+
+
+def _acquire_slot(user_id):
+    """Count one more in-flight job; False when the user is over the cap."""
+    key = _inflight_key(user_id)
+    try:
+        pipe = redis_client.pipeline()
+        pipe.incr(key)
+        pipe.expire(key, INFLIGHT_TTL)
+        inflight, _ = pipe.execute()
+    except redis.exceptions.RedisError as e:
+        logger.warning("Redis error counting AI jobs for %s: %s", user_id, e)
+        return True
+    return inflight <= MAX_INFLIGHT_PER_USER
+
+
+def _inputs_hash(task_name, args, inputs=None):
+    raw = json.dumps([task_name, args, inputs], default=str, sort_keys=True)
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+def _lease_key(kind, user_id, week, inputs_hash):
+    return f"ai_job:{kind}:{user_id}:{week}:{inputs_hash}"
+
+
+def _acquire_lease(lease_key, task_id):
+    """
+    Returns ``None`` when the lease was taken for ``task_id``, otherwise
+    the id of the job already holding it.
+    """
+    try:
+        if redis_client.set(lease_key, task_id, nx=True, ex=JOB_LEASE_TTL):
+            return None
+        holder = redis_client.get(lease_key)
+    except redis.exceptions.RedisError as e:
+        logger.warning("Redis error taking job lease %s: %s", lease_key, e)
+        return None
+    # released between SET and GET: treat as free
+    return holder
+
+
+def _renew_lease(lease_key, task_id):
+    try:
+        _RENEW_LEASE(keys=[lease_key], args=[task_id, JOB_LEASE_TTL])
+    except redis.exceptions.RedisError as e:
+        logger.warning("Redis error renewing job lease %s: %s", lease_key, e)
+
+
+def _release_lease(lease_key, task_id):
+    try:
+        _RELEASE_LEASE(keys=[lease_key], args=[task_id])
+    except redis.exceptions.RedisError as e:
+        logger.warning("Redis error releasing job lease %s: %s", lease_key, e)
+
+
+def _count_suppressed(kind):
+    try:
+        redis_client.hincrby(DEDUP_STATS_KEY, kind, 1)
+    except redis.exceptions.RedisError:
+        pass
+
+
+def dedup_snapshot():
+    """``{kind: suppressed duplicate dispatches}``."""
+    return {k: int(v) for k, v in redis_client.hgetall(DEDUP_STATS_KEY).items()}
+
+
+def _release_slot(user_id):
+    key = _inflight_key(user_id)
+    try:
+        if redis_client.decr(key) <= 0:
+            redis_client.delete(key)
+    except redis.exceptions.RedisError as e:
+        logger.warning("Redis error releasing AI job slot for %s: %s", user_id, e)
+
+
+def dispatch_ai_task(task, args, *, user_id, interactive=True, dedup=None):
+    """
+    Enqueue ``task`` on the AI queue with a priority for ``user_id``.
+
+    ``dedup=(kind, week)`` or ``(kind, week, inputs)`` coalesces repeated
+    requests: if a job for the same kind/user/week with the same arguments
+    (and ``inputs``, e.g. the profile fields the plan is built from) is still in
+    flight, nothing is enqueued and the existing job's ``AsyncResult`` is
+    returned.
+    """
+    task_id = str(uuid.uuid4())
+    headers = {
+        "ai_user_id": str(user_id),
+        "ai_enqueued_at": time.time(),
+    }
+
+    if dedup is not None:
+        kind, week, *inputs = dedup
+        lease_key = _lease_key(
+            kind, user_id, week, _inputs_hash(task.name, args, inputs)
+        )
+        holder = _acquire_lease(lease_key, task_id)
+        if holder is not None:
+            _count_suppressed(kind)
+            logger.info("Joined in-flight %s job %s for %s", kind, holder, user_id)
+            return task.AsyncResult(holder)
+        headers["ai_lease_key"] = lease_key
+
+    priority_class = priority_class_for(user_id, interactive=interactive)
+    if not _acquire_slot(user_id):
+        logger.info("AI job cap reached for %s, demoting %s", user_id, task.name)
+        priority_class = "throttled"
+    headers["ai_priority_class"] = priority_class
+
+    try:
+        return task.apply_async(
+            args=args,
+            task_id=task_id,
+            priority=PRIORITY_CLASSES[priority_class],
+            headers=headers,
+        )
+    except Exception:
+        # nothing was queued: don't leave the user blocked until the TTLs expire
+        _release_slot(user_id)
+        if "ai_lease_key" in headers:
+            _release_lease(headers["ai_lease_key"], task_id)
+        raise
+
+
+def _header(request, name):
+    value = getattr(request, name, None)
+    if value is None:
+        value = (getattr(request, "headers", None) or {}).get(name)
+    return value
+
+
+def record_queue_wait(priority_class, wait_seconds):
+    key = _wait_key(priority_class)
+    bucket = next(
+        (f"le_{b}s" for b in WAIT_BUCKETS_SECONDS if wait_seconds <= b), "le_inf"
+    )
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hincrby(key, "count", 1)
+        pipe.hincrbyfloat(key, "total_ms", wait_seconds * 1000)
+        pipe.hincrby(key, bucket, 1)
+        pipe.execute()
+    except redis.exceptions.RedisError as e:
+        logger.warning("Redis error recording AI queue wait: %s", e)
+
+
+def queue_wait_snapshot():
+    """``{priority_class: {count, avg_ms, le_*s...}}`` for dashboards."""
+    snapshot = {}
+    for priority_class in PRIORITY_CLASSES:
+        data = redis_client.hgetall(_wait_key(priority_class))
+        if not data:
+            continue
+        count = int(data.pop("count", 0)) or 1
+        total_ms = float(data.pop("total_ms", 0))
+        snapshot[priority_class] = {
+            "count": count,
+            "avg_ms": round(total_ms / count, 1),
+            **{k: int(v) for k, v in data.items()},
+        }
+    return snapshot
+
+
+@task_prerun.connect
+def _on_ai_task_start(sender=None, task=None, **kwargs):
+    if task is None or task.name not in AI_TASK_NAMES:
+        return
+    # every attempt may run up to JOB_LEASE_TTL: renew the lease it holds
+    lease_key = _header(task.request, "ai_lease_key")
+    if lease_key:
+        _renew_lease(lease_key, task.request.id)
+    # only the first attempt measures queue wait; retries re-enter the queue
+    if task.request.retries:
+        return
+    enqueued_at = _header(task.request, "ai_enqueued_at")
+    priority_class = _header(task.request, "ai_priority_class")
+    if enqueued_at is None or priority_class is None:
+        return
+    wait = max(0.0, time.time() - float(enqueued_at))
+    record_queue_wait(priority_class, wait)
+    logger.info("%s waited %.2fs in class %s", task.name, wait, priority_class)
+
+
+@task_postrun.connect
+def _on_ai_task_done(sender=None, task=None, state=None, **kwargs):
+    if task is None or task.name not in AI_TASK_NAMES:
+        return
+    # a retry is still the same job, keep its slot and lease
+    if state == "RETRY":
+        return
+    user_id = _header(task.request, "ai_user_id")
+    if user_id:
+        _release_slot(user_id)
+    lease_key = _header(task.request, "ai_lease_key")
+    if lease_key:
+        _release_lease(lease_key, task.request.id)
+
+
+@task_revoked.connect
+def _on_ai_task_revoked(sender=None, request=None, **kwargs):
+    # revoked or expired jobs never reach postrun
+    if request is None or getattr(request, "task_name", None) not in AI_TASK_NAMES:
+        return
+    headers = getattr(request, "request_dict", None) or {}
+    user_id = headers.get("ai_user_id")
+    if user_id:
+        _release_slot(user_id)
+    lease_key = headers.get("ai_lease_key")
+    if lease_key:
+        _release_lease(lease_key, request.id)
@@ -0,0 +1,143 @@
+"""
+Booking events exchanged with trainer_service over the ``booking_events``
+topic exchange.
+
+user_service owns ``TrainerBooking`` and publishes ``booking.created`` /
+``booking.cancelled`` snapshots (with the client's name and goal) so
+trainer_service can keep its ``TrainerClient`` roster. The snapshots go
+through the outbox (helper/outbox.py), so they are never lost once the
+booking change commits. trainer_service publishes ``booking.decided``
+(approve / reject), which ``run_booking_consumer`` applies here with
+``apply_booking_decision``.
+"""
+
+import os
+from datetime import datetime
+
+from chat.helper.read_state import ensure_participants
+from chat.models import ChatRoom
+from django.db import transaction
+
+from ..models import TrainerBooking, UserProfile
+from .outbox import enqueue_event
+from .user_directory import lookup_names
+
+BOOKING_EXCHANGE = os.getenv("RABBIT_BOOKING_EXCHANGE", "booking_events")
+
+BOOKING_CREATED = "booking.created"
+BOOKING_CANCELLED = "booking.cancelled"
+BOOKING_DECIDED = "booking.decided"
+
+
+def booking_payloads(bookings):
+    """
+    Snapshots for a list of bookings, with the client's name (local user
+    directory) and goal (profile) looked up in one query each.
+    """
+    user_ids = list({str(b.user_id) for b in bookings})
+    names = lookup_names(user_ids)
+    goals = {
+        str(user_id): goal
+        for user_id, goal in UserProfile.objects.filter(
+            user_id__in=user_ids
+        ).values_list("user_id", "goal")
+    }
+    occurred_at = datetime.utcnow().isoformat() + "Z"
+
+    return [
+        {
+            "booking_id": str(b.id),
+            "user_id": str(b.user_id),
+            "trainer_user_id": str(b.trainer_user_id),
+            "status": b.status,
+            "name": names.get(str(b.user_id), ""),
+            "goal": goals.get(str(b.user_id), ""),
+            "created_at": b.created_at.isoformat() if b.created_at else None,
+            "version": b.version,
+            "occurred_at": occurred_at,
+        }
+        for b in bookings
+    ]
+
+
+def publish_booking_event(routing_key, booking):
+    """
+    Queue a booking snapshot in the outbox; call inside the transaction
+    that changes the booking.
+    """
+    enqueue_event(routing_key, booking_payloads([booking])[0])
+
+
+def apply_booking_decision(payload):
+    """
+    Apply a trainer's approve / reject to a pending booking. Decisions for
+    bookings that are missing or no longer pending are ignored, so a
+    redelivered event is harmless. On approve the pair's chat room is
+    (re)activated.
+
+    Returns the new status, or None if nothing changed.
+    Raises ValueError for an incomplete payload.
+    """
+    booking_id = payload.get("booking_id")
+    trainer_user_id = payload.get("trainer_user_id")
+    user_id = payload.get("user_id")
+    action = (payload.get("action") or "").lower()
+
+    if not booking_id or not trainer_user_id or not user_id:
+        raise ValueError("Invalid booking decision payload")
+
+    if action not in ("approve", "reject"):
+        return None
+
+    with transaction.atomic():
+        booking = (
+            TrainerBooking.objects
+            .select_for_update()
+            .filter(
+                id=booking_id,
+                trainer_user_id=trainer_user_id,
+            )
+            .first()
+        )
+
+        if not booking:
+            return None
+
+        if booking.status != TrainerBooking.STATUS_PENDING:
+            return None
+
+        booking.version += 1
+
+        if action == "approve":
+            booking.status = TrainerBooking.STATUS_APPROVED
+            booking.save(update_fields=["status", "version", "updated_at"])
+
+            # 🔒 Ensure only one active room
+            ChatRoom.objects.filter(
+                user_id=user_id,
+                trainer_user_id=trainer_user_id,
+                is_active=True,
+            ).update(is_active=False)
+
+            room = ChatRoom.objects.filter(
+                user_id=user_id,
+                trainer_user_id=trainer_user_id,
+                is_active=False,
+            ).first()
+
+            if room:
+                room.is_active = True
+                room.save(update_fields=["is_active"])
+            else:
+                room = ChatRoom.objects.create(
+                    user_id=user_id,
+                    trainer_user_id=trainer_user_id,
+                    is_active=True,
+                )
+            ensure_participants(room)
+
+        elif action == "reject":
+            booking.status = TrainerBooking.STATUS_REJECTED
+            booking.save(update_fields=["status", "version", "updated_at"])
+
+    return booking.status
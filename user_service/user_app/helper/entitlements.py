@@ -0,0 +1,179 @@
+"""
+Premium entitlement store.
+
+Each user's premium expiry lives in Redis (``premium:<user_id>`` ->
+epoch seconds, ``0`` for "not premium") with a short in-process layer in
+front, so ``IsPremiumUser`` normally answers without touching the DB.
+"Not premium" answers stay in-process for ``LOCAL_NEGATIVE_TTL`` only:
+a payment is recorded by one worker, and every other worker must see it
+on the user's next request.
+Writers (payment verification, the expiry job) update it directly and
+``reconcile_entitlements`` corrects any drift against ``UserProfile``.
+"""
+
+import logging
+import threading
+import time
+
+import redis
+from django.conf import settings
+
+from ..models import UserProfile
+
+logger = logging.getLogger(__name__)
+
+redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+LOCAL_TTL = getattr(settings, "ENTITLEMENT_LOCAL_TTL", 30)
+LOCAL_MAX_ENTRIES = getattr(settings, "ENTITLEMENT_LOCAL_MAX_ENTRIES", 50000)
+LOCAL_NEGATIVE_TTL = getattr(settings, "ENTITLEMENT_LOCAL_NEGATIVE_TTL", 1)
+# how long a "not premium" answer is kept in Redis
+NEGATIVE_TTL = getattr(settings, "ENTITLEMENT_NEGATIVE_TTL", 600)
+# premium keys outlive the expiry a little so the expiry job can still see them
+EXPIRY_GRACE = 24 * 3600
+
+NOT_PREMIUM = 0.0
+
+_local = {}  # user_id -> (expires_at epoch, cached_until monotonic)
+_local_lock = threading.Lock()
+
+
+def _key(user_id):
+    return f"premium:{user_id}"
+
+
+def _to_epoch(expires_at):
+    return expires_at.timestamp() if expires_at else NOT_PREMIUM
+
+
+def _profile_expiry(is_premium, premium_expires_at):
+    return _to_epoch(premium_expires_at) if is_premium else NOT_PREMIUM
+
+
+def _redis_ttl(expires_epoch):
+    if expires_epoch <= time.time():
+        return NEGATIVE_TTL
+    return int(expires_epoch - time.time()) + EXPIRY_GRACE
+
+
+def _remember(user_id, expires_epoch):
+    ttl = LOCAL_TTL if expires_epoch > time.time() else LOCAL_NEGATIVE_TTL
+    with _local_lock:
+        if len(_local) >= LOCAL_MAX_ENTRIES:
+            _local.clear()
+        _local[user_id] = (expires_epoch, time.monotonic() + ttl)
+
+
+def _load_from_db(user_id):
+    row = (
+        UserProfile.objects.filter(user_id=user_id)
+        .values_list("is_premium", "premium_expires_at")
+        .first()
+    )
+    return _profile_expiry(*row) if row else NOT_PREMIUM
+
+
+def get_premium_expiry(user_id):
+    """Premium expiry as epoch seconds (``0`` when not premium)."""
+    user_id = str(user_id)
+
+    cached = _local.get(user_id)
+    if cached is not None and cached[1] > time.monotonic():
+        return cached[0]
+
+    try:
+        raw = redis_client.get(_key(user_id))
+    except redis.exceptions.RedisError as e:
+        logger.warning("Redis error reading entitlement, using DB: %s", e)
+        raw = None
+
+    if raw is not None:
+        expires_epoch = float(raw)
+    else:
+        expires_epoch = _load_from_db(user_id)
+        # NX: a payment written while we read the DB must not be overwritten
+        _write(user_id, expires_epoch, nx=True)
+
+    _remember(user_id, expires_epoch)
+    return expires_epoch
+
+
+def is_premium_user(user_id):
+    return get_premium_expiry(user_id) > time.time()
+
+
+def _write(user_id, expires_epoch, pipe=None, nx=False):
+    target = pipe or redis_client
+    try:
+        target.set(
+            _key(user_id), expires_epoch, ex=_redis_ttl(expires_epoch), nx=nx
+        )
+    except redis.exceptions.RedisError as e:
+        logger.warning("Redis error writing entitlement for %s: %s", user_id, e)
+
+
+def set_entitlement(user_id, premium_expires_at):
+    """Record a user's premium expiry (``None`` revokes premium)."""
+    user_id = str(user_id)
+    expires_epoch = _to_epoch(premium_expires_at)
+    _write(user_id, expires_epoch)
+    _remember(user_id, expires_epoch)
+
+
+def revoke_entitlements(user_ids):
+    """Mark many users as not premium in one pipelined round trip."""
+    user_ids = [str(user_id) for user_id in user_ids]
+    if not user_ids:
+        return
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for user_id in user_ids:
+            pipe.set(_key(user_id), NOT_PREMIUM, ex=NEGATIVE_TTL)
+        pipe.execute()
+    except redis.exceptions.RedisError as e:
+        logger.warning("Redis error revoking %d entitlements: %s", len(user_ids), e)
+    with _local_lock:
+        for user_id in user_ids:
+            _local.pop(user_id, None)
+
+
+def reconcile_entitlements(batch_size=500):
+    """
+    Compare every cached entitlement with ``UserProfile`` and rewrite the
+    ones that drifted. Returns ``(checked, corrected)``.
+    """
+    checked = corrected = 0
+    batch = []
+
+    def flush(keys):
+        nonlocal checked, corrected
+        values = redis_client.mget(keys)
+        user_ids = [key.split(":", 1)[1] for key in keys]
+        truth = {
+            str(user_id): _profile_expiry(is_premium, expires_at)
+            for user_id, is_premium, expires_at in UserProfile.objects.filter(
+                user_id__in=user_ids
+            ).values_list("user_id", "is_premium", "premium_expires_at")
+        }
+
+        pipe = redis_client.pipeline(transaction=False)
+        for user_id, raw in zip(user_ids, values):
+            if raw is None:
+                continue
+            checked += 1
+            expected = truth.get(user_id, NOT_PREMIUM)
+            if abs(float(raw) - expected) > 1:
+                corrected += 1
+                _write(user_id, expected, pipe=pipe)
+        pipe.execute()
+
+    for key in redis_client.scan_iter(match="premium:*", count=batch_size):
+        batch.append(key)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    return checked, corrected
+
@@ -0,0 +1,180 @@
+"""
+Premium expiry timer wheel.
+
+Every premium user is a member of the ``premium_expiry:due`` sorted set
+scored by their expiry (epoch seconds). Scheduling is a ZADD, and the
+short-interval beat task only claims members whose score is already due,
+so each expiry costs O(log n) instead of a ``UserProfile`` table scan.
+
+Claiming works like a visibility timeout: a due member is re-scored to
+now + CLAIM_LEASE rather than removed, and only removed once it has been
+processed. A worker that dies mid-batch leaves its members to come due
+again. Each claim counts an attempt; a user whose expiry mail keeps
+failing is retried every RETRY_DELAY seconds and dropped from the wheel
+after MAX_ATTEMPTS (the daily sweep still picks them up).
+"""
+
+import logging
+import time
+
+import boto3
+import redis
+from django.conf import settings
+from django.utils import timezone
+
+from ..models import UserProfile
+from .premium_expiry import (
+    NOTIFICATION_PENDING,
+    downgrade_profiles,
+    notify_expired,
+)
+
+logger = logging.getLogger(__name__)
+
+redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+DUE_KEY = "premium_expiry:due"
+ATTEMPTS_KEY = "premium_expiry:attempts"
+POP_BATCH = getattr(settings, "PREMIUM_EXPIRY_POP_BATCH", 500)
+# a claimed member comes due again after this many seconds if not processed
+CLAIM_LEASE = getattr(settings, "PREMIUM_EXPIRY_CLAIM_LEASE", 300)
+MAX_ATTEMPTS = getattr(settings, "PREMIUM_EXPIRY_MAX_ATTEMPTS", 5)
+# a deferred notification is retried after this many seconds
+RETRY_DELAY = 60
+
+# claim up to ARGV[2] members due by ARGV[1]: re-score them to ARGV[3] so
+# no other tick takes them, and give up on those past ARGV[4] attempts.
+# Returns {claimed, given_up}.
+_CLAIM_DUE = redis_client.register_script(
+    """
+    local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+    local claimed, given_up = {}, {}
+    for _, member in ipairs(due) do
+        if redis.call('HINCRBY', KEYS[2], member, 1) > tonumber(ARGV[4]) then
+            redis.call('ZREM', KEYS[1], member)
+            redis.call('HDEL', KEYS[2], member)
+            table.insert(given_up, member)
+        else
+            redis.call('ZADD', KEYS[1], ARGV[3], member)
+            table.insert(claimed, member)
+        end
+    end
+    return {claimed, given_up}
+    """
+)
+
+# for members still holding claim ARGV[1] (not rescheduled by a renewal
+# meanwhile): remove them, or re-score them to ARGV[2] when it is not 0
+_SETTLE_CLAIMED = redis_client.register_script(
+    """
+    local settled = 0
+    for i = 3, #ARGV do
+        local score = redis.call('ZSCORE', KEYS[1], ARGV[i])
+        if score and tonumber(score) == tonumber(ARGV[1]) then
+            if ARGV[2] == '0' then
+                redis.call('ZREM', KEYS[1], ARGV[i])
+                redis.call('HDEL', KEYS[2], ARGV[i])
+            else
+                redis.call('ZADD', KEYS[1], ARGV[2], ARGV[i])
+            end
+            settled = settled + 1
+        end
+    end
+    return settled
+    """
+)
+
+
+def schedule_expiry(user_id, premium_expires_at):
+    """(Re)schedule a user's expiry; a renewal just moves the score."""
+    if premium_expires_at is None:
+        unschedule_expiry(user_id)
+        return
+    try:
+        redis_client.zadd(DUE_KEY, {str(user_id): premium_expires_at.timestamp()})
+    except redis.exceptions.RedisError:
+        logger.exception("Redis error scheduling premium expiry for %s", user_id)
+
+
+def unschedule_expiry(user_id):
+    try:
+        redis_client.zrem(DUE_KEY, str(user_id))
+        redis_client.hdel(ATTEMPTS_KEY, str(user_id))
+    except redis.exceptions.RedisError:
+        logger.exception("Redis error unscheduling premium expiry for %s", user_id)
+
+
+def schedule_all(chunk_size=1000):
+    """Seed the wheel from every current premium profile. Returns the count."""
+    qs = UserProfile.objects.filter(
+        is_premium=True, premium_expires_at__isnull=False
+    ).values_list("user_id", "premium_expires_at")
+
+    total = 0
+    mapping = {}
+    for user_id, expires_at in qs.iterator(chunk_size=chunk_size):
+        mapping[str(user_id)] = expires_at.timestamp()
+        if len(mapping) >= chunk_size:
+            redis_client.zadd(DUE_KEY, mapping)
+            total += len(mapping)
+            mapping = {}
+    if mapping:
+        redis_client.zadd(DUE_KEY, mapping)
+        total += len(mapping)
+    return total
+
+
+def _settle(members, claim_until, retry_at=0):
+    if members:
+        _SETTLE_CLAIMED(
+            keys=[DUE_KEY, ATTEMPTS_KEY], args=[claim_until, retry_at, *members]
+        )
+
+
+def expire_due(limit=POP_BATCH):
+    """
+    Claim the members that are due, downgrade them in one batch and retry
+    the expiry mail of earlier claims whose mail could not be queued.
+    Returns ``(claimed, downgraded)``.
+    """
+    claim_until = int(time.time()) + CLAIM_LEASE
+    claimed, given_up = _CLAIM_DUE(
+        keys=[DUE_KEY, ATTEMPTS_KEY],
+        args=[time.time(), limit, claim_until, MAX_ATTEMPTS],
+    )
+    if given_up:
+        logger.error(
+            "Premium expiry gave up on %d users after %d attempts: %s",
+            len(given_up),
+            MAX_ATTEMPTS,
+            given_up[:20],
+        )
+    if not claimed:
+        return 0, 0
+
+    # the DB is the source of truth: skip users who renewed after the claim
+    due = UserProfile.objects.filter(
+        user_id__in=claimed, premium_expires_at__lte=timezone.now()
+    )
+    rows = list(due.filter(is_premium=True).values_list("id", "user_id"))
+    unnotified = [
+        str(user_id)
+        for user_id in due.filter(NOTIFICATION_PENDING).values_list(
+            "user_id", flat=True
+        )
+    ]
+
+    downgraded, deferred = 0, []
+    if rows or unnotified:
+        sqs = boto3.client("sqs", region_name=settings.AWS_REGION)
+        if rows:
+            result = downgrade_profiles(sqs, rows)
+            downgraded, deferred = result["downgraded"], result["deferred"]
+        if unnotified:
+            deferred += notify_expired(sqs, unnotified)[1]
+
+    deferred = set(deferred)
+    _settle([uid for uid in claimed if uid not in deferred], claim_until)
+    _settle(list(deferred), claim_until, retry_at=int(time.time()) + RETRY_DELAY)
+
+    return len(claimed), downgraded
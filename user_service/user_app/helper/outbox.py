@@ -0,0 +1,138 @@
+"""
+Transactional outbox for the booking events this service emits (same
+design as auth_service's outbox).
+
+``enqueue_event`` writes an ``OutboxEvent`` in the same transaction as the
+booking change, so an event exists if and only if the change committed.
+The ``relay_outbox`` command leases a batch of pending rows in id order,
+publishes them on a confirm-mode channel with no DB locks held and marks
+the confirmed ones sent with a single UPDATE. Delivery is at-least-once:
+a crash between the broker confirm and that UPDATE republishes the batch
+with the same ``message_id`` once the lease runs out, which consumers
+dedupe. A row that fails ``RELAY_MAX_ATTEMPTS`` times is parked
+(``failed_at``) instead of holding back the rows behind it.
+"""
+
+import json
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from user_service.common.rabbit_publisher import make_properties
+
+from ..models import OutboxEvent
+
+try:
+    from pika.exceptions import AMQPError
+except Exception:
+    AMQPError = Exception
+
+logger = logging.getLogger(__name__)
+
+RELAY_BATCH_SIZE = getattr(settings, "OUTBOX_RELAY_BATCH_SIZE", 200)
+RETENTION_DAYS = getattr(settings, "OUTBOX_RETENTION_DAYS", 7)
+RELAY_MAX_ATTEMPTS = getattr(settings, "OUTBOX_RELAY_MAX_ATTEMPTS", 10)
+# must cover publishing one batch; a crashed relay's rows come back after it
+RELAY_LEASE_SECONDS = getattr(settings, "OUTBOX_RELAY_LEASE_SECONDS", 60)
+
+PENDING = Q(sent_at__isnull=True, failed_at__isnull=True)
+
+
+def enqueue_event(routing_key, payload):
+    """Record an event; call inside the transaction that makes the change."""
+    return OutboxEvent.objects.create(routing_key=routing_key, payload=payload)
+
+
+def _lease_batch(batch_size):
+    """Pending rows not leased by another relay, leased to this one."""
+    now = timezone.now()
+    with transaction.atomic():
+        # skip_locked lets several relays share the table without overlap
+        rows = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(PENDING)
+            .filter(Q(locked_until__isnull=True) | Q(locked_until__lt=now))
+            .order_by("id")[:batch_size]
+        )
+        if rows:
+            OutboxEvent.objects.filter(id__in=[row.id for row in rows]).update(
+                locked_until=now + timedelta(seconds=RELAY_LEASE_SECONDS)
+            )
+    return rows
+
+
+def _settle_batch(rows, published, error):
+    now = timezone.now()
+    with transaction.atomic():
+        if published:
+            OutboxEvent.objects.filter(id__in=published).update(
+                sent_at=now, locked_until=None
+            )
+        if error is None:
+            return
+
+        failed = rows[len(published)]
+        parked = failed.attempts + 1 >= RELAY_MAX_ATTEMPTS
+        OutboxEvent.objects.filter(id=failed.id).update(
+            attempts=F("attempts") + 1,
+            last_error=str(error)[:1000],
+            failed_at=now if parked else None,
+            locked_until=None,
+        )
+        OutboxEvent.objects.filter(
+            id__in=[row.id for row in rows[len(published) + 1 :]]
+        ).update(locked_until=None)
+
+    if parked:
+        logger.error(
+            "Outbox event %s (%s) failed %d times, parked: %s",
+            failed.message_id,
+            failed.routing_key,
+            failed.attempts + 1,
+            error,
+        )
+
+
+def relay_batch(channel, exchange, batch_size=RELAY_BATCH_SIZE):
+    """
+    Publish up to ``batch_size`` pending events to ``exchange`` on
+    ``channel`` (which must be in confirm mode) and mark them sent.
+    Returns the number published. On a broker error the confirmed prefix
+    is still marked sent, the failing row records the error (and is
+    parked after ``RELAY_MAX_ATTEMPTS``), the rest of the batch is
+    released, and the exception is re-raised.
+    """
+    rows = _lease_batch(batch_size)
+    if not rows:
+        return 0
+
+    published = []
+    error = None
+    for row in rows:
+        try:
+            channel.basic_publish(
+                exchange=exchange,
+                routing_key=row.routing_key,
+                body=json.dumps(row.payload, ensure_ascii=False),
+                properties=make_properties(str(row.message_id)),
+            )
+        except AMQPError as exc:
+            error = exc
+            break
+        published.append(row.id)
+
+    _settle_batch(rows, published, error)
+
+    if error is not None:
+        raise error
+    return len(published)
+
+
+def purge_sent(days=RETENTION_DAYS):
+    """Delete events sent more than ``days`` ago. Returns the row count."""
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = OutboxEvent.objects.filter(sent_at__lt=cutoff).delete()
+    return deleted
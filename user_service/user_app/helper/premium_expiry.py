@@ -0,0 +1,277 @@
+"""
+Chunked premium expiry.
+
+Walks expired premium profiles in primary-key order, CHUNK_SIZE at a time:
+the chunk is downgraded with a single ``update()`` and its entitlements
+revoked, then emails are resolved in bulk (local user directory, then one
+auth_service call for the misses) and notifications go to SQS 10 per
+``send_message_batch`` call. The position is saved in Redis after every
+chunk so a retried or crashed run resumes where it stopped.
+
+Notifying is a separate step: a profile is stamped with
+``premium_expiry_notified_at`` once its mail is queued, and
+``notify_pending_expiries`` retries the ones that are still unstamped.
+A failed SQS call never keeps anyone premium.
+"""
+
+import json
+import logging
+import time
+from datetime import timedelta
+
+import boto3
+import redis
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from requests.exceptions import RequestException
+from user_service.common.http_client import get_upstream, internal_headers
+
+from ..models import UserDirectory, UserProfile
+from .entitlements import revoke_entitlements
+
+logger = logging.getLogger(__name__)
+
+redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+CHUNK_SIZE = getattr(settings, "PREMIUM_EXPIRY_CHUNK_SIZE", 500)
+SQS_BATCH_SIZE = 10  # SQS hard limit per send_message_batch
+CURSOR_KEY = "premium_expiry:cursor"
+CURSOR_TTL = 24 * 3600
+# expiries older than this are no longer worth a mail
+NOTIFY_WINDOW = timedelta(
+    days=getattr(settings, "PREMIUM_EXPIRY_NOTIFY_WINDOW_DAYS", 7)
+)
+
+USER_LOOKUP_PATH = "/api/v1/auth/internal/users/directory/lookup/"
+
+# downgraded, but the mail for the current expiry has not been queued
+NOTIFICATION_PENDING = Q(is_premium=False) & (
+    Q(premium_expiry_notified_at__isnull=True)
+    | Q(premium_expiry_notified_at__lt=F("premium_expires_at"))
+)
+
+
+def _load_cursor():
+    try:
+        raw = redis_client.get(CURSOR_KEY)
+    except redis.exceptions.RedisError as e:
+        logger.warning("Redis error reading expiry cursor, starting over: %s", e)
+        return None
+    return json.loads(raw) if raw else None
+
+
+def _save_cursor(cursor):
+    try:
+        redis_client.set(CURSOR_KEY, json.dumps(cursor), ex=CURSOR_TTL)
+    except redis.exceptions.RedisError as e:
+        logger.warning("Redis error saving expiry cursor: %s", e)
+
+
+def _clear_cursor():
+    try:
+        redis_client.delete(CURSOR_KEY)
+    except redis.exceptions.RedisError:
+        pass
+
+
+def resolve_emails(user_ids):
+    """``{str(user_id): email}`` from the local directory, auth for misses."""
+    emails = {
+        str(user_id): email
+        for user_id, email in UserDirectory.objects.filter(
+            user_id__in=user_ids
+        ).values_list("user_id", "email")
+        if email
+    }
+
+    missing = [str(user_id) for user_id in user_ids if str(user_id) not in emails]
+    if not missing:
+        return emails
+
+    try:
+        resp = get_upstream("auth").post(
+            USER_LOOKUP_PATH,
+            json={"user_ids": missing},
+            headers=internal_headers(),
+            timeout=(2, 10),
+            idempotent=True,
+        )
+    except RequestException as e:
+        logger.warning("auth lookup for %d emails failed: %s", len(missing), e)
+        return emails
+
+    if resp.status_code == 200:
+        emails.update({u["user_id"]: u["email"] for u in resp.json()})
+    else:
+        logger.warning("auth lookup for emails returned %s", resp.status_code)
+
+    return emails
+
+
+def send_expiry_notifications(sqs, recipients):
+    """
+    ``recipients`` is ``[(user_id, email)]``. Returns the set of user ids
+    whose message SQS accepted.
+    """
+    sent = set()
+    for start in range(0, len(recipients), SQS_BATCH_SIZE):
+        batch = recipients[start : start + SQS_BATCH_SIZE]
+        entries = [
+            {
+                "Id": str(i),
+                "MessageBody": json.dumps({"user_id": user_id, "email": email}),
+            }
+            for i, (user_id, email) in enumerate(batch)
+        ]
+        try:
+            resp = sqs.send_message_batch(
+                QueueUrl=settings.AWS_PREMIUM_EXPIRED_QUEUE_URL,
+                Entries=entries,
+            )
+        except Exception as e:
+            logger.warning("SQS batch of %d failed: %s", len(entries), e)
+            continue
+
+        for ok in resp.get("Successful", []):
+            sent.add(batch[int(ok["Id"])][0])
+        for failed in resp.get("Failed", []):
+            logger.warning(
+                "SQS rejected expiry mail for %s: %s",
+                batch[int(failed["Id"])][0],
+                failed.get("Message") or failed.get("Code"),
+            )
+
+    return sent
+
+
+def notify_expired(sqs, user_ids):
+    """
+    Queue the expiry mail for already downgraded ``user_ids`` and stamp
+    ``premium_expiry_notified_at`` on the ones that are done (sent, or no
+    email on record). Returns ``(notified, deferred)``.
+    """
+    user_ids = [str(user_id) for user_id in user_ids]
+    emails = resolve_emails(user_ids)
+
+    recipients = [(uid, emails[uid]) for uid in user_ids if uid in emails]
+    sent = send_expiry_notifications(sqs, recipients)
+
+    # no email on record: nothing to notify
+    done = sent | {uid for uid in user_ids if uid not in emails}
+    if done:
+        UserProfile.objects.filter(user_id__in=done).update(
+            premium_expiry_notified_at=timezone.now()
+        )
+
+    return len(sent), [uid for uid in user_ids if uid not in done]
+
+
+def downgrade_profiles(sqs, rows):
+    """
+    Downgrade one chunk of ``[(profile_pk, user_id)]`` and revoke its
+    entitlements, then notify. Users whose notification could not be
+    queued are returned in ``deferred``; they are downgraded all the same
+    and ``notify_pending_expiries`` retries their mail.
+    """
+    user_ids = [str(user_id) for _, user_id in rows]
+
+    downgraded = UserProfile.objects.filter(
+        id__in=[pk for pk, _ in rows], is_premium=True
+    ).update(is_premium=False)
+    revoke_entitlements(user_ids)
+
+    notified, deferred = notify_expired(sqs, user_ids)
+
+    return {
+        "downgraded": downgraded,
+        "notified": notified,
+        "deferred": deferred,
+    }
+
+
+def notify_pending_expiries(sqs, chunk_size=CHUNK_SIZE):
+    """
+    Retry the expiry mail for profiles downgraded within NOTIFY_WINDOW
+    whose current expiry has not been notified yet. Returns
+    ``(notified, deferred_count)``.
+    """
+    now = timezone.now()
+    qs = (
+        UserProfile.objects.filter(
+            NOTIFICATION_PENDING,
+            premium_expires_at__lt=now,
+            premium_expires_at__gte=now - NOTIFY_WINDOW,
+        )
+        .order_by("id")
+    )
+
+    notified = deferred = 0
+    after = None
+    while True:
+        page = qs.filter(id__gt=after) if after else qs
+        rows = list(page.values_list("id", "user_id")[:chunk_size])
+        if not rows:
+            break
+
+        sent, pending = notify_expired(sqs, [user_id for _, user_id in rows])
+        notified += sent
+        deferred += len(pending)
+        after = rows[-1][0]
+
+    return notified, deferred
+
+
+def expire_premium_users(chunk_size=CHUNK_SIZE):
+    """
+    Downgrade every profile whose premium expired before the run started,
+    then retry the notifications still pending (this run's and earlier
+    ones). Returns a stats dict.
+    """
+    cursor = _load_cursor()
+    if cursor:
+        run_started = parse_datetime(cursor["run_started"])
+        after = cursor["after"]
+        logger.info("Resuming premium expiry run from %s", after)
+    else:
+        run_started = timezone.now()
+        after = None
+
+    sqs = boto3.client("sqs", region_name=settings.AWS_REGION)
+
+    stats = {"chunks": 0, "downgraded": 0, "notified": 0, "skipped": 0}
+    started = time.monotonic()
+
+    while True:
+        qs = UserProfile.objects.filter(
+            is_premium=True,
+            premium_expires_at__lt=run_started,
+        ).order_by("id")
+        if after:
+            qs = qs.filter(id__gt=after)
+
+        rows = list(qs.values_list("id", "user_id")[:chunk_size])
+        if not rows:
+            break
+
+        result = downgrade_profiles(sqs, rows)
+
+        stats["chunks"] += 1
+        stats["downgraded"] += result["downgraded"]
+        stats["notified"] += result["notified"]
+
+        after = str(rows[-1][0])
+        _save_cursor({"run_started": run_started.isoformat(), "after": after})
+
+    _clear_cursor()
+
+    # ``notified`` counts every mail queued; ``skipped`` what is still pending
+    retried, stats["skipped"] = notify_pending_expiries(sqs, chunk_size)
+    stats["notified"] += retried
+
+    elapsed = time.monotonic() - started
+    stats["elapsed_s"] = round(elapsed, 2)
+    stats["per_second"] = round(stats["downgraded"] / elapsed, 1) if elapsed else 0.0
+    logger.info("Premium expiry run finished: %s", stats)
+    return stats
@@ -0,0 +1,99 @@
+import uuid
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from ..models import UserDirectory
+
+DIRECTORY_FIELDS = ("name", "email", "role", "is_active")
+
+
+def apply_directory_event(payload):
+    """
+    Upsert one user snapshot from a user.created / trainer.registered /
+    user.updated event. A snapshot older than the stored one is ignored,
+    so events may arrive in any order.
+
+    Returns True if a row was created or changed.
+    Raises ValueError for a missing or malformed user_id.
+    """
+    raw_user_id = payload.get("user_id")
+    if not raw_user_id:
+        raise ValueError("user_id missing")
+    user_id = uuid.UUID(str(raw_user_id))
+
+    values = {k: payload[k] for k in DIRECTORY_FIELDS if k in payload}
+
+    qs = UserDirectory.objects.filter(user_id=user_id)
+
+    occurred_at = parse_datetime(payload.get("occurred_at") or "")
+    if occurred_at is not None:
+        values["source_updated_at"] = occurred_at
+        qs = qs.filter(_newer_than(occurred_at))
+
+    if qs.update(**values):
+        return True
+
+    _, created = UserDirectory.objects.get_or_create(user_id=user_id, defaults=values)
+    return created
+
+
+def _newer_than(occurred_at):
+    """Rows an ``occurred_at`` snapshot may overwrite."""
+    return Q(source_updated_at__isnull=True) | Q(source_updated_at__lte=occurred_at)
+
+
+def sync_directory_page(rows):
+    """
+    Bulk upsert a page of auth_service users (backfill). One query for the
+    lookup and one bulk insert; rows that differ are updated one by one,
+    and only where no newer event has been applied. Returns
+    ``(created, updated)``.
+    """
+    by_id = {uuid.UUID(str(r["user_id"])): r for r in rows}
+    if not by_id:
+        return 0, 0
+
+    existing = {
+        entry.user_id: entry
+        for entry in UserDirectory.objects.filter(user_id__in=by_id.keys())
+    }
+
+    to_create = []
+    updated = 0
+    for user_id, row in by_id.items():
+        values = {k: row[k] for k in DIRECTORY_FIELDS if k in row}
+        occurred_at = parse_datetime(row.get("occurred_at") or "")
+        if occurred_at is not None:
+            values["source_updated_at"] = occurred_at
+
+        entry = existing.get(user_id)
+        if entry is None:
+            to_create.append(UserDirectory(user_id=user_id, **values))
+            continue
+
+        if all(
+            getattr(entry, field) == row[field]
+            for field in DIRECTORY_FIELDS
+            if field in row
+        ):
+            continue
+        qs = UserDirectory.objects.filter(user_id=user_id)
+        if occurred_at is not None:
+            qs = qs.filter(_newer_than(occurred_at))
+        if qs.update(**values):
+            updated += 1
+
+    UserDirectory.objects.bulk_create(to_create, ignore_conflicts=True)
+    return len(to_create), updated
+
+
+def lookup_names(user_ids):
+    """
+    ``{str(user_id): display name}`` for the ids known locally, in one
+    ``id__in`` query. Ids missing from the result are not synced yet.
+    """
+    rows = UserDirectory.objects.filter(user_id__in=user_ids).values_list(
+        "user_id", "name", "email"
+    )
+    return {str(user_id): name or email for user_id, name, email in rows}
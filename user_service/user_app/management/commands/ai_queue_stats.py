@@ -0,0 +1,16 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from user_app.helper.ai_dispatch import dedup_snapshot, queue_wait_snapshot
+
+
+class Command(BaseCommand):
+    help = "Print AI queue wait-time metrics and suppressed duplicate jobs"
+
+    def handle(self, *args, **options):
+        stats = {
+            "queue_wait": queue_wait_snapshot(),
+            "dedup_suppressed": dedup_snapshot(),
+        }
+        self.stdout.write(json.dumps(stats, indent=2))
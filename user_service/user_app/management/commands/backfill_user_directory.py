@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from user_service.common.http_client import get_upstream, internal_headers
+
+from user_app.helper.user_directory import sync_directory_page
+
+DIRECTORY_PATH = "/api/v1/auth/internal/users/directory/"
+
+
+class Command(BaseCommand):
+    help = (
+        "Backfill the local user directory from auth_service "
+        "(keyset-paginated, one bulk upsert per page)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-size", type=int, default=500)
+        parser.add_argument("--role", default=None, help="only sync this role")
+
+    def handle(self, *args, **options):
+        client = get_upstream("auth")
+        after = None
+        pages = created = updated = 0
+        started = time.monotonic()
+
+        while True:
+            params = {"limit": options["page_size"]}
+            if after:
+                params["after"] = after
+            if options["role"]:
+                params["role"] = options["role"]
+
+            resp = client.get(
+                DIRECTORY_PATH,
+                params=params,
+                headers=internal_headers(),
+                timeout=(2, 30),
+            )
+            if resp.status_code != 200:
+                raise CommandError(
+                    f"auth_service returned {resp.status_code}: {resp.text[:200]}"
+                )
+
+            data = resp.json()
+            page_created, page_updated = sync_directory_page(data["results"])
+
+            pages += 1
+            created += page_created
+            updated += page_updated
+
+            after = data.get("next_after")
+            if not after:
+                break
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Directory backfill done: pages={pages} created={created} "
+                f"updated={updated} in {time.monotonic() - started:.1f}s"
+            )
+        )
@@ -0,0 +1,61 @@
+import statistics
+import time
+
+import redis
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from user_app.bench_tasks import BENCH_RESULTS_KEY, bench_io_task, bench_ping_task
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure user_tasks (booking) latency while the AI queue is saturated. "
+        "Needs both celery_worker and celery_ai_worker running with "
+        "CELERY_BENCH_TASKS=1."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ai-tasks", type=int, default=200)
+        parser.add_argument("--ai-seconds", type=float, default=30.0)
+        parser.add_argument("--pings", type=int, default=50)
+        parser.add_argument("--interval", type=float, default=0.2)
+        parser.add_argument("--wait", type=float, default=60.0)
+
+    def handle(self, *args, **options):
+        client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+        client.delete(BENCH_RESULTS_KEY)
+
+        self.stdout.write(
+            f"Enqueuing {options['ai_tasks']} x {options['ai_seconds']}s AI tasks..."
+        )
+        for _ in range(options["ai_tasks"]):
+            bench_io_task.apply_async(
+                args=[options["ai_seconds"]], queue=settings.AI_TASK_QUEUE
+            )
+
+        self.stdout.write(f"Sending {options['pings']} booking-queue pings...")
+        for _ in range(options["pings"]):
+            bench_ping_task.delay(time.time())
+            time.sleep(options["interval"])
+
+        deadline = time.monotonic() + options["wait"]
+        while (
+            client.llen(BENCH_RESULTS_KEY) < options["pings"]
+            and time.monotonic() < deadline
+        ):
+            time.sleep(0.5)
+
+        samples = sorted(float(v) * 1000 for v in client.lrange(BENCH_RESULTS_KEY, 0, -1))
+        if not samples:
+            self.stderr.write("No pings completed; is the user_tasks worker running?")
+            return
+
+        p95 = samples[max(0, int(len(samples) * 0.95) - 1)]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"booking-queue latency over {len(samples)}/{options['pings']} pings: "
+                f"p50={statistics.median(samples):.1f}ms p95={p95:.1f}ms "
+                f"max={samples[-1]:.1f}ms"
+            )
+        )
@@ -0,0 +1,118 @@
+import json
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from user_app.management.commands.run_rabbit_consumer import (
+    create_profile_if_missing,
+    create_profiles,
+    parse_user_id,
+)
+from user_app.models import UserProfile
+from user_service.common.consumer_runtime import Delivery
+
+
+class StandInChannel:
+    """Local broker stand-in: records acks/nacks instead of talking AMQP."""
+
+    def __init__(self):
+        self.acked = 0
+        self.nacked = 0
+
+    def basic_ack(self, delivery_tag):
+        self.acked += 1
+
+    def basic_nack(self, delivery_tag, requeue=True):
+        self.nacked += 1
+
+
+def as_delivery(tag, body):
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        payload = None
+    return Delivery(
+        routing_key="user.created",
+        payload=payload,
+        body=body,
+        message_id=None,
+        delivery_tag=tag,
+        redelivered=False,
+        headers={},
+    )
+
+
+def make_bodies(count, poison_every):
+    bodies = []
+    for i in range(count):
+        if poison_every and i % poison_every == poison_every - 1:
+            bodies.append(b"{not json")
+        else:
+            bodies.append(json.dumps({"user_id": str(uuid.uuid4())}).encode())
+    return bodies
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark user.created handling per message vs batched, against the "
+        "configured DB and an in-process broker stand-in. Rows are deleted after."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=2000)
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument("--poison-every", type=int, default=500)
+
+    def _report(self, label, count, elapsed, channel):
+        self.stdout.write(
+            f"{label:<12} {count} msgs in {elapsed:.2f}s "
+            f"= {count / elapsed:,.0f} msg/s (acked={channel.acked} "
+            f"nacked={channel.nacked})"
+        )
+
+    def handle(self, *args, **options):
+        count = options["messages"]
+        created_ids = []
+
+        # per message: what the consumer does with CONSUMER_BATCH_SIZE=1
+        bodies = make_bodies(count, options["poison_every"])
+        channel = StandInChannel()
+        started = time.perf_counter()
+        for tag, body in enumerate(bodies, start=1):
+            try:
+                user_id = parse_user_id(body)
+            except ValueError:
+                channel.basic_ack(tag)
+                continue
+            with transaction.atomic():
+                create_profile_if_missing(user_id)
+            created_ids.append(user_id)
+            channel.basic_ack(tag)
+        self._report("per-message", count, time.perf_counter() - started, channel)
+
+        # batched: the runtime's batch handler, settled per delivery
+        bodies = make_bodies(count, options["poison_every"])
+        deliveries = [as_delivery(tag, b) for tag, b in enumerate(bodies, start=1)]
+        channel = StandInChannel()
+        batch_size = options["batch_size"]
+        started = time.perf_counter()
+        for start in range(0, count, batch_size):
+            batch = deliveries[start : start + batch_size]
+            retry = {d.delivery_tag for d in create_profiles(batch)}
+            for delivery in batch:
+                if delivery.delivery_tag in retry:
+                    channel.basic_nack(delivery.delivery_tag)
+                else:
+                    channel.basic_ack(delivery.delivery_tag)
+        self._report("batched", count, time.perf_counter() - started, channel)
+
+        for body in bodies:
+            try:
+                created_ids.append(parse_user_id(body))
+            except ValueError:
+                pass
+
+        deleted, _ = UserProfile.objects.filter(user_id__in=created_ids).delete()
+        self.stdout.write(f"cleaned up {deleted} benchmark profiles")
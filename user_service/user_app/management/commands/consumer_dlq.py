@@ -0,0 +1,128 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+try:
+    import pika
+except Exception:
+    pika = None
+
+from user_service.common.consumer_runtime import (
+    LAST_ERROR_HEADER,
+    ORIGINAL_ROUTING_KEY_HEADER,
+    RABBIT_URL,
+    RETRY_ATTEMPT_HEADER,
+    dlq_name,
+    retry_attempts,
+)
+
+# stripped on replay so the message starts over with a fresh retry budget
+RESET_HEADERS = ("x-death", RETRY_ATTEMPT_HEADER, LAST_ERROR_HEADER)
+
+
+class Command(BaseCommand):
+    help = "Inspect, replay or purge a consumer's dead-letter queue (<queue>.dlq)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "queue", help="Main consumer queue, e.g. user_service.user_created"
+        )
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument(
+            "--replay",
+            action="store_true",
+            help="Move messages back onto the main queue",
+        )
+        parser.add_argument(
+            "--message-id",
+            action="append",
+            default=[],
+            help="Only replay these message ids (repeatable)",
+        )
+        parser.add_argument(
+            "--purge", action="store_true", help="Delete every DLQ message"
+        )
+
+    def handle(self, *args, **options):
+        if pika is None:
+            raise CommandError("pika not installed")
+
+        queue = options["queue"]
+        dlq = dlq_name(queue)
+
+        conn = pika.BlockingConnection(pika.URLParameters(RABBIT_URL))
+        try:
+            ch = conn.channel()
+            try:
+                depth = ch.queue_declare(queue=dlq, passive=True).method.message_count
+            except pika.exceptions.ChannelClosedByBroker:
+                raise CommandError(f"{dlq} does not exist")
+
+            if options["purge"]:
+                purged = ch.queue_purge(queue=dlq).method.message_count
+                self.stdout.write(f"purged {purged} messages from {dlq}")
+                return
+
+            self.stdout.write(f"{dlq}: {depth} messages")
+            if options["replay"]:
+                ch.confirm_delivery()
+                self._replay(ch, queue, dlq, depth, options)
+            else:
+                self._inspect(ch, queue, dlq, min(depth, options["limit"]))
+        finally:
+            # unacked gets go back to the DLQ when the connection closes
+            if conn.is_open:
+                conn.close()
+
+    def _inspect(self, ch, queue, dlq, count):
+        for _ in range(count):
+            method, props, body = ch.basic_get(queue=dlq, auto_ack=False)
+            if method is None:
+                break
+            headers = props.headers or {}
+            self.stdout.write(
+                json.dumps(
+                    {
+                        "message_id": props.message_id,
+                        "routing_key": headers.get(ORIGINAL_ROUTING_KEY_HEADER),
+                        "attempts": retry_attempts(queue, headers),
+                        "last_error": headers.get(LAST_ERROR_HEADER),
+                        "body": body.decode("utf-8", errors="replace")[:500],
+                    },
+                    default=str,
+                )
+            )
+
+    def _replay(self, ch, queue, dlq, depth, options):
+        wanted = set(options["message_id"])
+        replayed = 0
+
+        # bounded by the depth we saw, so skipped messages are not fetched twice
+        for _ in range(depth):
+            if replayed >= options["limit"]:
+                break
+            method, props, body = ch.basic_get(queue=dlq, auto_ack=False)
+            if method is None:
+                break
+            if wanted and props.message_id not in wanted:
+                continue  # left unacked, returns to the DLQ on close
+
+            headers = {
+                k: v for k, v in (props.headers or {}).items() if k not in RESET_HEADERS
+            }
+            ch.basic_publish(
+                exchange="",
+                routing_key=queue,
+                body=body,
+                properties=pika.BasicProperties(
+                    content_type=props.content_type or "application/json",
+                    delivery_mode=2,
+                    message_id=props.message_id,
+                    timestamp=props.timestamp,
+                    headers=headers,
+                ),
+            )
+            ch.basic_ack(delivery_tag=method.delivery_tag)
+            replayed += 1
+
+        self.stdout.write(f"replayed {replayed} messages from {dlq} to {queue}")
@@ -0,0 +1,42 @@
+# user_app/management/commands/run_booking_consumer.py
+import logging
+import os
+
+import django
+from django.core.management.base import BaseCommand
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "user_service.settings")
+django.setup()
+
+from user_app.helper.bookings import (
+    BOOKING_DECIDED,
+    BOOKING_EXCHANGE,
+    apply_booking_decision,
+)
+from user_service.common.consumer_runtime import ConsumerRuntime
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+QUEUE = os.getenv("RABBIT_QUEUE_BOOKING", "user_service.booking_decided")
+PREFETCH = int(os.getenv("BOOKING_PREFETCH_COUNT", "10"))
+
+runtime = ConsumerRuntime(QUEUE, exchange=BOOKING_EXCHANGE, prefetch=PREFETCH)
+
+
+@runtime.handler(BOOKING_DECIDED)
+def on_booking_decided(delivery):
+    new_status = apply_booking_decision(delivery.payload)
+    logger.info(
+        "booking.decided booking_id=%s action=%s -> %s",
+        delivery.payload.get("booking_id"),
+        delivery.payload.get("action"),
+        new_status or "unchanged",
+    )
+
+
+class Command(BaseCommand):
+    help = "RabbitMQ consumer: applies trainer booking decisions (booking.decided)"
+
+    def handle(self, *args, **options):
+        runtime.run()
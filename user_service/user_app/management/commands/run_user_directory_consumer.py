@@ -0,0 +1,43 @@
+# user_app/management/commands/run_user_directory_consumer.py
+import logging
+import os
+
+import django
+from django.core.management.base import BaseCommand
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "user_service.settings")
+django.setup()
+
+from user_app.helper.user_directory import apply_directory_event
+from user_service.common.consumer_runtime import ConsumerRuntime, Reject
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+QUEUE = os.getenv("RABBIT_QUEUE_DIRECTORY", "user_service.user_directory")
+ROUTING_KEYS = ("user.created", "trainer.registered", "user.updated")
+PREFETCH = int(os.getenv("DIRECTORY_PREFETCH_COUNT", "50"))
+
+runtime = ConsumerRuntime(QUEUE, prefetch=PREFETCH)
+
+
+@runtime.handler(*ROUTING_KEYS)
+def on_directory_event(delivery):
+    try:
+        changed = apply_directory_event(delivery.payload)
+    except (TypeError, AttributeError) as exc:
+        raise Reject(f"invalid directory event: {exc}")
+
+    logger.debug(
+        "Directory event %s user_id=%s changed=%s",
+        delivery.routing_key,
+        delivery.payload.get("user_id"),
+        changed,
+    )
+
+
+class Command(BaseCommand):
+    help = "RabbitMQ consumer: keeps the local user directory in sync with auth_service"
+
+    def handle(self, *args, **options):
+        runtime.run()
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from user_app.helper.expiry_scheduler import schedule_all
+
+
+class Command(BaseCommand):
+    help = "Seed the premium expiry sorted set from current premium profiles"
+
+    def handle(self, *args, **options):
+        total = schedule_all()
+        self.stdout.write(self.style.SUCCESS(f"Scheduled {total} premium expiries"))
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-19 16:40
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_past_expiries_notified(apps, schema_editor):
+    # profiles downgraded before this field existed were handled by the old job
+    UserProfile = apps.get_model("user_app", "UserProfile")
+    UserProfile.objects.filter(
+        is_premium=False, premium_expires_at__isnull=False
+    ).update(premium_expiry_notified_at=F("premium_expires_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user_app", "0018_userdirectory"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprofile",
+            name="premium_expiry_notified_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="userprofile",
+            index=models.Index(
+                fields=["premium_expires_at"], name="user_profile_expires_idx"
+            ),
+        ),
+        migrations.RunPython(
+            mark_past_expiries_notified, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-19 17:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user_app", "0020_outboxevent"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="trainerbooking",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="trainerbooking",
+            name="version",
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddIndex(
+            model_name="trainerbooking",
+            index=models.Index(
+                fields=["updated_at"], name="trainer_booking_updated_idx"
+            ),
+        ),
+    ]
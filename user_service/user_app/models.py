@@ -3,6 +3,7 @@ import uuid
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.db.models import Q
+from django.utils import timezone
 
 # ---------- choices ----------
 GENDER_CHOICES = [
@@ -90,6 +91,8 @@ class UserProfile(models.Model):
 
     is_premium = models.BooleanField(default=False)
     premium_expires_at = models.DateTimeField(null=True, blank=True)
+    # set once the expiry mail for the current premium_expires_at is queued
+    premium_expiry_notified_at = models.DateTimeField(null=True, blank=True)
     profile_completed = models.BooleanField(default=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
@@ -102,6 +105,9 @@ class UserProfile(models.Model):
             models.Index(fields=["user_id"]),
             models.Index(fields=["goal"]),
             models.Index(fields=["is_premium"]),
+            models.Index(
+                fields=["premium_expires_at"], name="user_profile_expires_idx"
+            ),
         ]
 
     def __str__(self):
@@ -165,11 +171,17 @@ class TrainerBooking(models.Model):
     )
 
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # bumped on every status change; trainer_service's roster applies a
+    # snapshot only if it is newer than the one it has
+    version = models.PositiveIntegerField(default=1)
 
     class Meta:
         indexes = [
             models.Index(fields=["trainer_user_id"]),
             models.Index(fields=["user_id"]),
+            # trainer_service's periodic roster reconcile
+            models.Index(fields=["updated_at"], name="trainer_booking_updated_idx"),
         ]
 
     def __str__(self):
@@ -324,3 +336,62 @@ class WorkoutLog(models.Model):
     class Meta:
         unique_together = ("user_id", "date", "exercise_name")
         db_table = "workout_log"
+
+
+# Local read model of auth_service users, fed by user.created /
+# trainer.registered / user.updated events (see helper/user_directory.py)
+
+
+class UserDirectory(models.Model):
+    user_id = models.UUIDField(primary_key=True)
+    name = models.CharField(max_length=150, blank=True)
+    email = models.EmailField(max_length=254, blank=True)
+    role = models.CharField(max_length=20, blank=True)
+    is_active = models.BooleanField(default=True)
+
+    # auth-side time of the snapshot; older events never overwrite newer ones
+    source_updated_at = models.DateTimeField(null=True, blank=True)
+    synced_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "user_directory"
+
+    def __str__(self):
+        return f"UserDirectory({self.user_id}, {self.role})"
+
+    @property
+    def display_name(self):
+        return self.name or self.email
+
+
+# Domain events written in the same transaction as the change they describe
+# (see helper/outbox.py); ``relay_outbox`` publishes pending rows
+
+
+class OutboxEvent(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    message_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    routing_key = models.CharField(max_length=100)
+    payload = models.JSONField()
+    created_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(blank=True, null=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    # set once the row failed OUTBOX_RELAY_MAX_ATTEMPTS times
+    failed_at = models.DateTimeField(blank=True, null=True)
+    # a relay is publishing the row until then
+    locked_until = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # the relay only ever scans pending rows in id order
+            models.Index(
+                fields=["id"],
+                name="outbox_pending_idx",
+                condition=models.Q(sent_at__isnull=True, failed_at__isnull=True),
+            ),
+            models.Index(fields=["sent_at"], name="outbox_sent_at_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.routing_key} {self.message_id}"
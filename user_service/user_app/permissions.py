@@ -1,3 +1,6 @@
+import hmac
+
+from django.conf import settings
 from rest_framework.permissions import BasePermission
 
 
@@ -18,9 +21,20 @@ class IsAdmin(BasePermission):
         )
 
 
+class IsInternalService(BasePermission):
+    """
+    Service-to-service calls that have no end-user token (backfills,
+    reconciliation jobs) authenticate with the shared X-Internal-Token.
+    """
+
+    def has_permission(self, request, view):
+        expected = getattr(settings, "INTERNAL_SERVICE_TOKEN", "")
+        provided = request.headers.get("X-Internal-Token", "")
+        return bool(expected) and hmac.compare_digest(provided, expected)
+
+
 from rest_framework.permissions import BasePermission
-from django.utils import timezone
-from .models import UserProfile
+from .helper.entitlements import is_premium_user
 
 
 class IsPremiumUser(BasePermission):
@@ -30,8 +44,5 @@ class IsPremiumUser(BasePermission):
         if not request.user or not request.user.is_authenticated:
             return False
 
-        return UserProfile.objects.filter(
-            user_id=request.user.id,
-            is_premium=True,
-            premium_expires_at__gt=timezone.now(),
-        ).exists()
\ No newline at end of file
+        # entitlement store (memory -> Redis), DB only on a cold miss
+        return is_premium_user(request.user.id)
@@ -2,10 +2,13 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 import razorpay
+from .helper.entitlements import set_entitlement
+from .helper.expiry_scheduler import schedule_expiry
 from .models import PremiumPlan, UserProfile
 from .permissions import IsAdmin
 from rest_framework import status
 from django.conf import settings
+from django.db import transaction
 from datetime import timedelta
 from django.utils import timezone
 
@@ -168,4 +171,11 @@ class VerifyPremiumPaymentView(APIView):
         profile.is_premium = True
         profile.save()
 
+        transaction.on_commit(
+            lambda: set_entitlement(profile.user_id, profile.premium_expires_at)
+        )
+        transaction.on_commit(
+            lambda: schedule_expiry(profile.user_id, profile.premium_expires_at)
+        )
+
         return Response({"status": "premium_activated"})
\ No newline at end of file
@@ -1,19 +1,28 @@
 # user_app/tasks.py
 from celery import shared_task
-from chat.models import ChatRoom
+from chat.ws_notify import notify_user_event
 
+# registers the queue-wait / fairness signal handlers in the worker
+from .helper import ai_dispatch  # noqa: F401
 from .helper.ai_client import estimate_nutrition
-from .models import MealLog, TrainerBooking
+from .helper.bookings import apply_booking_decision
+from .models import MealLog
 
 
 # ----------------------------
 # nutrition task below(extra meal, custom meal)
 # ----------------------------
+def is_final_attempt(task, exc, retry_on=(Exception,)):
+    """True when Celery will not retry ``exc`` again (autoretry exhausted)."""
+    return not isinstance(exc, retry_on) or task.request.retries >= task.max_retries
+
+
 @shared_task(
     bind=True,
     autoretry_for=(Exception,),
     retry_backoff=10,
-    retry_kwargs={"max_retries": 3},
+    max_retries=3,
+    acks_late=True,  # idempotent: skips meals already estimated
 )
 def estimate_nutrition_task(self, meal_log_id):
     meal = MealLog.objects.get(id=meal_log_id)
@@ -22,7 +31,15 @@ def estimate_nutrition_task(self, meal_log_id):
     if meal.calories > 0:
         return
 
-    result = estimate_nutrition(", ".join(meal.items))
+    try:
+        result = estimate_nutrition(", ".join(meal.items))
+    except Exception as e:
+        if is_final_attempt(self, e):
+            notify_user_event(
+                meal.user_id, "NUTRITION_ESTIMATE_FAILED", meal_log_id=meal.id
+            )
+        raise
+
     total = result["total"]
 
     meal.calories = total.get("calories", 0)
@@ -31,6 +48,18 @@ def estimate_nutrition_task(self, meal_log_id):
     meal.fat = total.get("fat", 0)
     meal.save()
 
+    notify_user_event(
+        meal.user_id,
+        "NUTRITION_ESTIMATED",
+        meal_log_id=meal.id,
+        date=meal.date.isoformat(),
+        meal_type=meal.meal_type,
+        calories=meal.calories,
+        protein=meal.protein,
+        carbs=meal.carbs,
+        fat=meal.fat,
+    )
+
 
 # ----------------------------
 # workout task below
@@ -64,7 +93,8 @@ def normalize_durations(exercises, min_minutes, max_minutes):
 @shared_task(
     bind=True,
     autoretry_for=(ConnectionError, Timeout),
-    retry_kwargs={"max_retries": 3},
+    max_retries=3,
+    acks_late=True,  # a rerun regenerates the same week's plan
 )
 def generate_weekly_workout_task(self, user_id, workout_type):
     week_start, week_end = get_week_range(date.today())
@@ -142,6 +172,13 @@ def generate_weekly_workout_task(self, user_id, workout_type):
             status="ready",
         )
 
+        notify_user_event(
+            user_id,
+            "WORKOUT_PLAN_READY",
+            plan_id=str(plan.id),
+            week_start=week_start.isoformat(),
+        )
+
         return "created"
 
     except Exception as e:
@@ -153,6 +190,14 @@ def generate_weekly_workout_task(self, user_id, workout_type):
             week_start=week_start,
         ).update(status="failed")
 
+        if is_final_attempt(self, e, retry_on=(ConnectionError, Timeout)):
+            notify_user_event(
+                user_id,
+                "WORKOUT_PLAN_FAILED",
+                plan_id=str(plan.id),
+                week_start=week_start.isoformat(),
+            )
+
         raise e
 
 
@@ -161,70 +206,15 @@ def generate_weekly_workout_task(self, user_id, workout_type):
     autoretry_for=(Exception,),
     retry_backoff=3,
     retry_kwargs={"max_retries": 5},
+    acks_late=True,  # idempotent: only pending bookings change
 )
 def handle_booking_decision(self, payload):
+    # booking.decided now arrives through run_booking_consumer; this task
+    # only drains decisions queued on user_tasks before the switch
     if payload.get("event") != "BOOKING_DECIDED":
         return
 
-    booking_id = payload.get("booking_id")
-    trainer_user_id = payload.get("trainer_user_id")
-    user_id = payload.get("user_id")
-    action = payload.get("action", "").lower()
-
-    if not booking_id or not trainer_user_id or not user_id:
-        raise ValueError("Invalid booking decision payload")
-
-    if action not in ("approve", "reject"):
-        return
-
-    with transaction.atomic():
-        booking = (
-            TrainerBooking.objects
-            .select_for_update()
-            .filter(
-                id=booking_id,
-                trainer_user_id=trainer_user_id,
-            )
-            .first()
-        )
-
-        if not booking:
-            return
-
-        if booking.status != TrainerBooking.STATUS_PENDING:
-            return
-
-        if action == "approve":
-            booking.status = TrainerBooking.STATUS_APPROVED
-            booking.save(update_fields=["status"])
-
-            # 🔒 Ensure only one active room
-            ChatRoom.objects.filter(
-                user_id=user_id,
-                trainer_user_id=trainer_user_id,
-                is_active=True,
-            ).update(is_active=False)
-
-            room = ChatRoom.objects.filter(
-                user_id=user_id,
-                trainer_user_id=trainer_user_id,
-                is_active=False,
-            ).first()
-
-            if room:
-                room.is_active = True
-                room.save(update_fields=["is_active"])
-            else:
-                ChatRoom.objects.create(
-                    user_id=user_id,
-                    trainer_user_id=trainer_user_id,
-                    is_active=True,
-                )
-
-        elif action == "reject":
-            booking.status = TrainerBooking.STATUS_REJECTED
-            booking.save(update_fields=["status"])
-
+    apply_booking_decision(payload)
 
 
 from .helper.ai_client import generate_diet_plan, AIServiceError
@@ -236,7 +226,8 @@ from .models import DietPlan, UserProfile
     bind=True,
     autoretry_for=(AIServiceError, Exception),
     retry_backoff=10,
-    retry_kwargs={"max_retries": 3},
+    max_retries=3,
+    acks_late=True,  # idempotent: only pending plans are generated
 )
 def generate_diet_plan_task(self, plan_id):
     plan = DietPlan.objects.select_for_update().get(id=plan_id)
@@ -245,10 +236,23 @@ def generate_diet_plan_task(self, plan_id):
     if plan.status != "pending":
         return
 
-    profile = UserProfile.objects.get(user_id=plan.user_id)
-    payload = build_payload_from_profile(profile)
+    try:
+        profile = UserProfile.objects.get(user_id=plan.user_id)
+        payload = build_payload_from_profile(profile)
 
-    ai_response = generate_diet_plan(payload)
+        ai_response = generate_diet_plan(payload)
+    except Exception as e:
+        if is_final_attempt(self, e):
+            DietPlan.objects.filter(id=plan.id, status="pending").update(
+                status="failed"
+            )
+            notify_user_event(
+                plan.user_id,
+                "DIET_PLAN_FAILED",
+                plan_id=str(plan.id),
+                week_start=plan.week_start.isoformat(),
+            )
+        raise
 
     plan.daily_calories = ai_response["daily_calories"]
     plan.macros = ai_response["macros"]
@@ -257,49 +261,47 @@ def generate_diet_plan_task(self, plan_id):
     plan.status = "ready"
     plan.save()
 
+    notify_user_event(
+        plan.user_id,
+        "DIET_PLAN_READY",
+        plan_id=str(plan.id),
+        week_start=plan.week_start.isoformat(),
+    )
+
 
 
-import json
-import boto3
 from celery import shared_task
-from django.utils import timezone
-from django.conf import settings
 
-from .models import UserProfile
+from .helper.entitlements import reconcile_entitlements
+from .helper.expiry_scheduler import expire_due
+from .helper.premium_expiry import expire_premium_users
+
+
+@shared_task(ignore_result=True)
+def expire_due_premium_users():
+    # claims only due members of the expiry sorted set; runs every few seconds
+    claimed, downgraded = expire_due()
+    if claimed:
+        return f"{claimed} due, {downgraded} downgraded"
 
 
 @shared_task(bind=True, max_retries=3)
 def handle_expired_premium_users(self):
-    now = timezone.now()
-
-    expired_profiles = UserProfile.objects.filter(
-        is_premium=True,
-        premium_expires_at__lt=now,
-    )
+    # daily safety-net sweep behind the sorted-set scheduler
+    # chunked + resumable; see helper/premium_expiry.py
+    stats = expire_premium_users()
 
-    if not expired_profiles.exists():
+    if not stats["chunks"]:
         return "No expired premium users"
 
-    sqs = boto3.client(
-        "sqs",
-        region_name=settings.AWS_REGION,
+    return (
+        f"{stats['downgraded']} users downgraded, {stats['notified']} notified, "
+        f"{stats['skipped']} deferred in {stats['elapsed_s']}s "
+        f"({stats['per_second']}/s)"
     )
 
-    processed = 0
-
-    for profile in expired_profiles:
-        # 1️⃣ Downgrade user (SOURCE OF TRUTH)
-        profile.is_premium = False
-        profile.save(update_fields=["is_premium"])
-
-        # 2️⃣ Send email job
-        sqs.send_message(
-            QueueUrl=settings.AWS_PREMIUM_EXPIRED_QUEUE_URL,
-            MessageBody=json.dumps({
-                "email": profile.user.email,
-            }),
-        )
-
-        processed += 1
 
-    return f"{processed} users downgraded & notified"
\ No newline at end of file
+@shared_task
+def reconcile_premium_entitlements():
+    checked, corrected = reconcile_entitlements()
+    return f"{checked} entitlements checked, {corrected} corrected"
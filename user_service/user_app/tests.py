@@ -1,3 +1,300 @@
-from django.test import TestCase
+import time
+import uuid
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from .helper import ai_dispatch, expiry_scheduler
+from .models import UserDirectory, UserProfile
+
+
+class StandInSQS:
+    """Accepts (or fails) every send_message_batch and records the bodies."""
+
+    def __init__(self):
+        self.fail = False
+        self.sent = []
+
+    def send_message_batch(self, QueueUrl, Entries):
+        if self.fail:
+            raise ConnectionError("SQS unavailable")
+        self.sent += [entry["MessageBody"] for entry in Entries]
+        return {"Successful": [{"Id": entry["Id"]} for entry in Entries]}
+
+
+class ExpirySchedulerTests(TestCase):
+    """Runs against the service's Redis (``REDIS_URL``) on per-test keys."""
+
+    def setUp(self):
+        suffix = uuid.uuid4().hex
+        self.due_key = f"test:premium_expiry:due:{suffix}"
+        self.attempts_key = f"test:premium_expiry:attempts:{suffix}"
+        self.now = time.time()
+        self.clock = mock.Mock()
+        self.clock.time.return_value = self.now
+        self.sqs = StandInSQS()
+
+        for target, value in (
+            ("DUE_KEY", self.due_key),
+            ("ATTEMPTS_KEY", self.attempts_key),
+            ("time", self.clock),
+        ):
+            patcher = mock.patch.object(expiry_scheduler, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(
+            expiry_scheduler.boto3, "client", return_value=self.sqs
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(
+            expiry_scheduler.redis_client.delete, self.due_key, self.attempts_key
+        )
+
+    def make_premium(self, expires_in):
+        profile = UserProfile.objects.create(
+            user_id=uuid.uuid4(),
+            is_premium=True,
+            premium_expires_at=timezone.now() + expires_in,
+        )
+        UserDirectory.objects.create(
+            user_id=profile.user_id, email=f"{profile.user_id}@example.com"
+        )
+        expiry_scheduler.schedule_expiry(profile.user_id, profile.premium_expires_at)
+        return profile
+
+    def score(self, profile):
+        return expiry_scheduler.redis_client.zscore(self.due_key, str(profile.user_id))
+
+    def advance(self, seconds):
+        self.clock.time.return_value += seconds
+
+    def test_expired_user_is_downgraded_notified_and_removed(self):
+        profile = self.make_premium(expires_in=timedelta(minutes=-1))
+        self.make_premium(expires_in=timedelta(days=3))
+
+        self.assertEqual(expiry_scheduler.expire_due(), (1, 1))
+
+        profile.refresh_from_db()
+        self.assertFalse(profile.is_premium)
+        self.assertIsNotNone(profile.premium_expiry_notified_at)
+        self.assertEqual(len(self.sqs.sent), 1)
+        self.assertIsNone(self.score(profile))
+
+    def test_user_who_renews_after_the_claim_is_skipped(self):
+        profile = self.make_premium(expires_in=timedelta(minutes=-1))
+        renewed_until = timezone.now() + timedelta(days=30)
+        claim = expiry_scheduler._CLAIM_DUE
+
+        def claim_then_renew(**kwargs):
+            claimed = claim(**kwargs)
+            # the payment lands between the claim and the DB re-check
+            UserProfile.objects.filter(id=profile.id).update(
+                premium_expires_at=renewed_until
+            )
+            expiry_scheduler.schedule_expiry(profile.user_id, renewed_until)
+            return claimed
+
+        with mock.patch.object(
+            expiry_scheduler, "_CLAIM_DUE", side_effect=claim_then_renew
+        ):
+            self.assertEqual(expiry_scheduler.expire_due(), (1, 0))
+
+        profile.refresh_from_db()
+        self.assertTrue(profile.is_premium)
+        self.assertEqual(self.sqs.sent, [])
+        # the renewal's score survives the settle
+        self.assertEqual(self.score(profile), renewed_until.timestamp())
+
+    def test_claim_of_a_dead_worker_comes_due_after_the_lease(self):
+        profile = self.make_premium(expires_in=timedelta(minutes=-1))
+        expiry_scheduler._CLAIM_DUE(
+            keys=[self.due_key, self.attempts_key],
+            args=[self.now, 10, int(self.now) + expiry_scheduler.CLAIM_LEASE, 5],
+        )
+
+        self.assertEqual(expiry_scheduler.expire_due(), (0, 0))
+        self.advance(expiry_scheduler.CLAIM_LEASE + 1)
+        self.assertEqual(expiry_scheduler.expire_due(), (1, 1))
+
+        profile.refresh_from_db()
+        self.assertFalse(profile.is_premium)
+
+    def test_deferred_mail_comes_due_again_after_the_retry_delay(self):
+        profile = self.make_premium(expires_in=timedelta(minutes=-1))
+        self.sqs.fail = True
+
+        self.assertEqual(expiry_scheduler.expire_due(), (1, 1))
+        profile.refresh_from_db()
+        # downgraded all the same, only the mail is pending
+        self.assertFalse(profile.is_premium)
+        self.assertIsNone(profile.premium_expiry_notified_at)
+        self.assertEqual(
+            self.score(profile), int(self.now) + expiry_scheduler.RETRY_DELAY
+        )
+
+        self.assertEqual(expiry_scheduler.expire_due(), (0, 0))
+
+        self.sqs.fail = False
+        self.advance(expiry_scheduler.RETRY_DELAY + 1)
+        self.assertEqual(expiry_scheduler.expire_due(), (1, 0))
+
+        profile.refresh_from_db()
+        self.assertIsNotNone(profile.premium_expiry_notified_at)
+        self.assertEqual(len(self.sqs.sent), 1)
+        self.assertIsNone(self.score(profile))
+        self.assertFalse(
+            expiry_scheduler.redis_client.hexists(
+                self.attempts_key, str(profile.user_id)
+            )
+        )
+
+    def test_member_is_given_up_after_max_attempts(self):
+        profile = self.make_premium(expires_in=timedelta(minutes=-1))
+        self.sqs.fail = True
+
+        for _ in range(expiry_scheduler.MAX_ATTEMPTS):
+            self.assertEqual(expiry_scheduler.expire_due()[0], 1)
+            self.advance(expiry_scheduler.RETRY_DELAY + 1)
+
+        self.assertEqual(expiry_scheduler.expire_due(), (0, 0))
+        self.assertIsNone(self.score(profile))
+        self.assertFalse(
+            expiry_scheduler.redis_client.hexists(
+                self.attempts_key, str(profile.user_id)
+            )
+        )
+        # still downgraded; the daily sweep owns the mail from here
+        profile.refresh_from_db()
+        self.assertFalse(profile.is_premium)
+
+
+class StandInTask:
+    """Records apply_async calls instead of publishing to the broker."""
+
+    name = "user_app.tasks.generate_diet_plan_task"
+
+    def __init__(self):
+        self.calls = []
+
+    def apply_async(self, **kwargs):
+        self.calls.append(kwargs)
+        return self.AsyncResult(kwargs["task_id"])
+
+    def AsyncResult(self, task_id):
+        return SimpleNamespace(id=task_id)
+
+
+class AIJobLeaseTests(SimpleTestCase):
+    """Runs against the service's Redis (``REDIS_URL``)."""
+
+    week = "2026-10-19"
+
+    def setUp(self):
+        self.user_id = str(uuid.uuid4())
+        self.task = StandInTask()
+        patcher = mock.patch.object(ai_dispatch, "is_premium_user", return_value=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        redis_client = ai_dispatch.redis_client
+        keys = list(redis_client.scan_iter(match=f"ai_job:*:{self.user_id}:*"))
+        redis_client.delete(ai_dispatch._inflight_key(self.user_id), *keys)
+
+    def dispatch(self, args=(1,), inputs=(70, "lose")):
+        return ai_dispatch.dispatch_ai_task(
+            self.task,
+            list(args),
+            user_id=self.user_id,
+            dedup=("diet", self.week, inputs),
+        )
+
+    def request(self, result, **extra):
+        (call,) = [c for c in self.task.calls if c["task_id"] == result.id]
+        return SimpleNamespace(
+            id=result.id, retries=1, headers=call["headers"], **extra
+        )
+
+    def lease_key(self, result):
+        return self.request(result).headers["ai_lease_key"]
+
+    def run_signal(self, handler, result, **kwargs):
+        task = SimpleNamespace(name=self.task.name, request=self.request(result))
+        handler(task=task, **kwargs)
+
+    def test_lease_key_carries_the_inputs_hash(self):
+        result = self.dispatch()
+
+        prefix = f"ai_job:diet:{self.user_id}:{self.week}:"
+        key = self.lease_key(result)
+        self.assertTrue(key.startswith(prefix))
+        self.assertEqual(len(key[len(prefix) :]), 16)
+        self.assertEqual(ai_dispatch.redis_client.get(key), result.id)
+
+    def test_same_inputs_join_the_job_holding_the_lease(self):
+        first = self.dispatch()
+        second = self.dispatch()
+
+        self.assertEqual(second.id, first.id)
+        self.assertEqual(len(self.task.calls), 1)
+
+    def test_different_inputs_get_their_own_job(self):
+        first = self.dispatch()
+        changed_profile = self.dispatch(inputs=(68, "lose"))
+        changed_args = self.dispatch(args=(2,))
+
+        self.assertEqual(len({first.id, changed_profile.id, changed_args.id}), 3)
+        self.assertEqual(len(self.task.calls), 3)
+
+    def test_prerun_renews_the_lease_on_every_attempt(self):
+        result = self.dispatch()
+        key = self.lease_key(result)
+        ai_dispatch.redis_client.expire(key, 5)
+
+        self.run_signal(ai_dispatch._on_ai_task_start, result)
+
+        self.assertGreater(ai_dispatch.redis_client.ttl(key), 5)
+
+    def test_prerun_does_not_renew_another_jobs_lease(self):
+        result = self.dispatch()
+        key = self.lease_key(result)
+        ai_dispatch.redis_client.set(key, "another-task", ex=5)
+
+        self.run_signal(ai_dispatch._on_ai_task_start, result)
+
+        self.assertLessEqual(ai_dispatch.redis_client.ttl(key), 5)
+
+    def test_postrun_releases_the_lease_unless_the_job_retries(self):
+        result = self.dispatch()
+        key = self.lease_key(result)
+
+        self.run_signal(ai_dispatch._on_ai_task_done, result, state="RETRY")
+        self.assertEqual(ai_dispatch.redis_client.get(key), result.id)
+
+        self.run_signal(ai_dispatch._on_ai_task_done, result, state="SUCCESS")
+        self.assertIsNone(ai_dispatch.redis_client.get(key))
+        self.assertIsNone(
+            ai_dispatch.redis_client.get(ai_dispatch._inflight_key(self.user_id))
+        )
+        # the next request starts a new job
+        self.assertNotEqual(self.dispatch().id, result.id)
+
+    def test_revoked_job_releases_its_lease(self):
+        result = self.dispatch()
+        key = self.lease_key(result)
+        request = self.request(result)
+
+        ai_dispatch._on_ai_task_revoked(
+            request=SimpleNamespace(
+                id=result.id, task_name=self.task.name, request_dict=request.headers
+            )
+        )
+
+        self.assertIsNone(ai_dispatch.redis_client.get(key))
+        self.assertIsNone(
+            ai_dispatch.redis_client.get(ai_dispatch._inflight_key(self.user_id))
+        )
@@ -20,6 +20,7 @@ from .user_trainer_view import (
     ApprovedUsersForTrainerView,
     PendingClientsTrainer,
     BookingDetailView,
+    BookingPageView,
 )
 from .user_workout_view import (
     GenerateWorkoutView,
@@ -52,6 +53,8 @@ urlpatterns = [
     path("training/pending/", PendingClientsTrainer.as_view()),
     path("training/bookings/approved/", ApprovedUsersForTrainerView.as_view()),
     path("training/bookings/<uuid:booking_id>/", BookingDetailView.as_view(),),
+    # service url for trainer roster backfills (X-Internal-Token)
+    path("internal/bookings/", BookingPageView.as_view()),
     # urls for ai diet plan follow
 
     path("diet/generate/", GenerateDietPlanView.as_view()),
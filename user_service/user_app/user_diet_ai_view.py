@@ -8,6 +8,7 @@ from rest_framework.views import APIView
 from user_app.helper.ai_client import AIServiceError
 
 from .helper.ai_client import estimate_nutrition, generate_diet_plan
+from .helper.ai_dispatch import dispatch_ai_task
 from .helper.ai_payload import build_payload_from_profile
 from .helper.meals import meal_already_logged
 from .models import DietPlan, MealLog, UserProfile, WeightLog
@@ -75,7 +76,12 @@ class GenerateDietPlanView(APIView):
         )
 
         # 6️⃣ Enqueue async generation
-        generate_diet_plan_task.delay(plan.id)
+        dispatch_ai_task(
+            generate_diet_plan_task,
+            [plan.id],
+            user_id=request.user.id,
+            dedup=("diet", plan.week_start, (profile.weight_kg, profile.goal)),
+        )
 
         # 7️⃣ Immediate response
         return Response(
@@ -245,7 +251,9 @@ class LogCustomMealWithAIView(APIView):
         )
 
         # 🔥 ASYNC
-        estimate_nutrition_task.delay(meal.id)
+        dispatch_ai_task(
+            estimate_nutrition_task, [meal.id], user_id=request.user.id
+        )
 
         return Response(
             {"detail": "Custom meal logged. Nutrition estimation in progress."},
@@ -306,7 +314,9 @@ class LogExtraMealView(APIView):
         )
 
         # 🔥 ASYNC
-        estimate_nutrition_task.delay(meal.id)
+        dispatch_ai_task(
+            estimate_nutrition_task, [meal.id], user_id=request.user.id
+        )
 
         return Response(
             {"detail": "Extra meal logged. Nutrition estimation in progress."},
@@ -440,7 +450,16 @@ class UpdateWeightView(APIView):
         if created or plan.status != "pending":
             plan.status = "pending"
             plan.save(update_fields=["status"])
-            generate_diet_plan_task.delay(plan.id)
+            dispatch_ai_task(
+                generate_diet_plan_task,
+                [plan.id],
+                user_id=request.user.id,
+                dedup=(
+                    "diet",
+                    plan.week_start,
+                    (profile.weight_kg, profile.goal),
+                ),
+            )
 
         # ---------------------------
         # 9️⃣ Response
@@ -1,16 +1,42 @@
+import uuid
 from uuid import UUID
 
-import requests
-from django.conf import settings
+from django.utils.dateparse import parse_datetime
+from requests.exceptions import RequestException
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from user_service.common.fanout import fan_out
+from user_service.common.http_client import get_upstream
 
+from .helper.bookings import booking_payloads
 from .models import TrainerBooking, UserProfile
-from .permissions import IsTrainer
+from .permissions import IsInternalService, IsTrainer
 from django.shortcuts import get_object_or_404
 from .permissions import IsPremiumUser
 
+TRAINER_PROFILE_CHUNK = 500
+
+
+def _profiles_by_user_ids(user_ids, headers):
+    """``{user_id: profile}`` from trainer_service, in chunks of ids."""
+    profiles = {}
+    for start in range(0, len(user_ids), TRAINER_PROFILE_CHUNK):
+        try:
+            resp = get_upstream("trainer").post(
+                "/api/v1/trainer/internal/trainers/by-user-ids/",
+                json={"user_ids": user_ids[start : start + TRAINER_PROFILE_CHUNK]},
+                headers=headers,
+                timeout=(2, 5),
+                idempotent=True,
+            )
+        except RequestException:
+            continue
+        if resp.ok:
+            profiles.update({str(p["user_id"]): p for p in resp.json()})
+    return profiles
+
+
 #user side approved trainers list
 class ApprovedTrainerListView(APIView):
     permission_classes = [IsAuthenticated,IsPremiumUser]
@@ -23,40 +49,53 @@ class ApprovedTrainerListView(APIView):
 
         headers = {"Authorization": auth_header}
 
-        # 1. Get approved trainers with name from auth_service
-        auth_resp = requests.get(
-            f"{settings.AUTH_SERVICE_URL}/api/v1/auth/internal/trainers/approved/",
-            headers=headers,
-            timeout=10,
+        # 1. Approved trainers (auth_service) and trainer profiles
+        #    (trainer_service) are independent, so fetch them concurrently
+        results = fan_out(
+            {
+                "trainers": (
+                    lambda: get_upstream("auth").get(
+                        "/api/v1/auth/internal/trainers/approved/",
+                        headers=headers,
+                        timeout=(2, 5),
+                    ),
+                    6,
+                ),
+                "profiles": (
+                    lambda: get_upstream("trainer").get(
+                        "/api/v1/trainer/internal/trainers/",
+                        headers=headers,
+                        timeout=(2, 5),
+                    ),
+                    6,
+                ),
+            }
         )
 
-        if not auth_resp.ok:
+        auth_result = results["trainers"]
+        if not auth_result.ok or not auth_result.value.ok:
             return Response({"detail": "Auth service error"}, status=502)
 
+        trainer_result = results["profiles"]
+        if not trainer_result.ok or not trainer_result.value.ok:
+            return Response({"detail": "Trainer service error"}, status=502)
+
         # expected: [{ user_id, name }]
-        approved_trainers = auth_resp.json()
+        approved_trainers = auth_result.value.json()
 
         if not approved_trainers:
             return Response([])
 
-        user_ids = [t["user_id"] for t in approved_trainers]
-
-        # 2. Get trainer profiles from trainer_service
-        trainer_resp = requests.post(
-            f"{settings.TRAINER_SERVICE_URL}/api/v1/trainer/internal/trainers/by-user-ids/",
-            json={"user_ids": user_ids},
-            headers=headers,
-            timeout=5,
-        )
+        profile_map = {p["user_id"]: p for p in trainer_result.value.json()}
 
-        if not trainer_resp.ok:
-            return Response({"detail": "Trainer service error"}, status=502)
-
-        profiles = trainer_resp.json()
-
-        profile_map = {p["user_id"]: p for p in profiles}
+        # the profile list is capped: fetch the approved trainers it left out
+        missing = [
+            t["user_id"] for t in approved_trainers if t["user_id"] not in profile_map
+        ]
+        if missing and trainer_result.value.headers.get("X-Truncated"):
+            profile_map.update(_profiles_by_user_ids(missing, headers))
 
-        # 3. Merge response
+        # 2. Merge response
         result = []
         for trainer in approved_trainers:
             profile = profile_map.get(trainer["user_id"])
@@ -152,6 +191,51 @@ class BookingDetailView(APIView):
                 "trainer_user_id": str(booking.trainer_user_id),
                 "status": booking.status,
                 "created_at": booking.created_at,
+                "version": booking.version,
             },
             status=200,
         )
+
+
+BOOKING_PAGE_MAX = 1000
+
+
+# keyset-paginated booking dump for trainer_service's roster backfill / reconcile
+class BookingPageView(APIView):
+    authentication_classes = []
+    permission_classes = [IsInternalService]
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get("limit", 500))
+        except ValueError:
+            return Response({"detail": "limit must be an integer"}, status=400)
+
+        limit = max(1, min(limit, BOOKING_PAGE_MAX))
+
+        qs = TrainerBooking.objects.order_by("id")
+
+        after = request.query_params.get("after")
+        if after:
+            try:
+                qs = qs.filter(id__gt=uuid.UUID(after))
+            except ValueError:
+                return Response({"detail": "after must be a UUID"}, status=400)
+
+        updated_after = request.query_params.get("updated_after")
+        if updated_after:
+            since = parse_datetime(updated_after)
+            if since is None:
+                return Response(
+                    {"detail": "updated_after must be an ISO datetime"}, status=400
+                )
+            qs = qs.filter(updated_at__gte=since)
+
+        status_filter = request.query_params.get("status")
+        if status_filter:
+            qs = qs.filter(status__in=status_filter.split(","))
+
+        results = booking_payloads(list(qs[:limit]))
+        next_after = results[-1]["booking_id"] if len(results) == limit else None
+
+        return Response({"results": results, "next_after": next_after})
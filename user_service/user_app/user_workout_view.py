@@ -5,6 +5,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .helper.ai_dispatch import dispatch_ai_task
 from .helper.calories import calculate_calories
 from .helper.week_date_helper import get_week_range
 from .models import UserProfile, WorkoutLog, WorkoutPlan
@@ -61,9 +62,11 @@ class GenerateWorkoutView(APIView):
             plan.status = "pending"
             plan.save(update_fields=["status"])
 
-        generate_weekly_workout_task.delay(
-            str(request.user.id),
-            workout_type,
+        dispatch_ai_task(
+            generate_weekly_workout_task,
+            [str(request.user.id), workout_type],
+            user_id=request.user.id,
+            dedup=("workout", week_start),
         )
 
         return Response(
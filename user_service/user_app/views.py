@@ -1,12 +1,14 @@
 # user_app/views.py
-import requests
 from chat.models import ChatRoom
-from django.conf import settings
 from django.db import transaction
 from rest_framework import permissions, status
 from rest_framework.response import Response
+from requests.exceptions import RequestException
 from rest_framework.views import APIView
+from user_service.common.http_client import get_upstream
 
+from .helper.bookings import BOOKING_CANCELLED, BOOKING_CREATED, publish_booking_event
+from .helper.user_directory import lookup_names
 from .models import TrainerBooking, UserProfile
 from .serializers import UserProfileSerializer
 from .permissions import IsPremiumUser
@@ -78,10 +80,12 @@ class BookTrainerView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        booking = TrainerBooking.objects.create(
-            user_id=user_id,
-            trainer_user_id=trainer_user_id,
-        )
+        with transaction.atomic():
+            booking = TrainerBooking.objects.create(
+                user_id=user_id,
+                trainer_user_id=trainer_user_id,
+            )
+            publish_booking_event(BOOKING_CREATED, booking)
 
         return Response(
             {
@@ -113,29 +117,33 @@ class MyTrainersView(APIView):
 
         trainer_user_ids = list({str(b.trainer_user_id) for b in bookings})
 
-        # 🔹 Call auth service ONCE
-        auth_resp = requests.post(
-            f"{settings.AUTH_SERVICE_URL}/api/v1/auth/internal/users/by-ids/",
-            json={"user_ids": trainer_user_ids},
-            headers=headers,
-            timeout=5,
-        )
-
-        if not auth_resp.ok:
-            return Response({"detail": "Auth service error"}, status=502)
-
-        users = auth_resp.json()
-        user_map = {u["user_id"]: u for u in users}
+        # 🔹 Names from the local directory; auth only for ids not synced yet
+        name_map = lookup_names(trainer_user_ids)
+        missing = [uid for uid in trainer_user_ids if uid not in name_map]
+
+        if missing:
+            try:
+                auth_resp = get_upstream("auth").post(
+                    "/api/v1/auth/internal/users/by-ids/",
+                    json={"user_ids": missing},
+                    headers=headers,
+                    timeout=5,
+                    idempotent=True,
+                )
+            except RequestException:
+                auth_resp = None
+
+            if auth_resp is not None and auth_resp.ok:
+                for u in auth_resp.json():
+                    name_map[u["user_id"]] = u["name"]
 
         data = []
         for b in bookings:
-            trainer = user_map.get(str(b.trainer_user_id))
-
             data.append(
                 {
                     "booking_id": str(b.id),
                     "trainer_user_id": str(b.trainer_user_id),
-                    "trainer_name": trainer["name"] if trainer else None,
+                    "trainer_name": name_map.get(str(b.trainer_user_id)),
                     "status": b.status,
                     "created_at": b.created_at,
                     "is_active": b.status == TrainerBooking.STATUS_APPROVED,
@@ -149,26 +157,28 @@ class RemoveTrainerView(APIView):
     permission_classes = [permissions.IsAuthenticated,IsPremiumUser]
 
     def delete(self, request):
-        booking = (
-            TrainerBooking.objects.filter(
-                user_id=request.user.id,
-                status__in=["pending", "approved"],
+        with transaction.atomic():
+            booking = (
+                TrainerBooking.objects.filter(
+                    user_id=request.user.id,
+                    status__in=["pending", "approved"],
+                )
+                .select_for_update()
+                .first()
             )
-            .select_for_update()
-            .first()
-        )
 
-        if not booking:
-            return Response(
-                {"detail": "No active trainer found"},
-                status=status.HTTP_404_NOT_FOUND,
-            )
+            if not booking:
+                return Response(
+                    {"detail": "No active trainer found"},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
 
-        trainer_user_id = booking.trainer_user_id
+            trainer_user_id = booking.trainer_user_id
 
-        with transaction.atomic():
             booking.status = TrainerBooking.STATUS_CANCELLED
-            booking.save(update_fields=["status"])
+            booking.version += 1
+            booking.save(update_fields=["status", "version", "updated_at"])
+            publish_booking_event(BOOKING_CANCELLED, booking)
 
             ChatRoom.objects.filter(
                 user_id=request.user.id,
@@ -0,0 +1,234 @@
+"""
+Consumer-side idempotency keyed by the AMQP ``message_id``.
+
+Processed ids live in Redis sets bucketed by time window
+(``dedupe:<consumer>:<bucket>``, each expiring after two windows), so an
+id is remembered for between one and two windows. Redis is the only
+authority: ``claim`` checks both live sets and takes a short
+``SET NX`` claim (``dedupe:<consumer>:claim:<id>``) in one script, so
+two replicas never run the same id at once. The claim is dropped by
+``mark`` on success and by ``release`` when the handler fails.
+
+Each consumer also keeps one Bloom filter per live bucket of the ids it
+marked itself. It is only a positive shortcut: a Bloom hit is confirmed
+with a read-only ``SISMEMBER`` (no claim written for a duplicate), and a
+miss still goes to Redis, since another replica may have processed it.
+
+    dedupe = MessageDedupe("user_service.user_created")
+    state = dedupe.claim(properties.message_id)
+    if state == DUPLICATE:
+        channel.basic_ack(tag)
+        return
+    if state == BUSY:
+        ...retry later: another replica is handling it...
+    try:
+        ...handle...
+    except Exception:
+        dedupe.release(properties.message_id)
+        raise
+    dedupe.mark(properties.message_id)
+"""
+
+import hashlib
+import logging
+import math
+import threading
+import time
+
+import redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEDUPE_WINDOW_SECONDS = getattr(settings, "DEDUPE_WINDOW_SECONDS", 24 * 3600)
+DEDUPE_BLOOM_CAPACITY = getattr(settings, "DEDUPE_BLOOM_CAPACITY", 100_000)
+DEDUPE_BLOOM_ERROR_RATE = getattr(settings, "DEDUPE_BLOOM_ERROR_RATE", 0.001)
+# longest a handler may hold an id before another replica may take it
+DEDUPE_CLAIM_SECONDS = getattr(settings, "DEDUPE_CLAIM_SECONDS", 300)
+
+NEW, DUPLICATE, BUSY = "new", "duplicate", "busy"
+
+redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+# KEYS: current set, previous set, claim key; ARGV: message_id, claim ttl
+_CLAIM = redis_client.register_script(
+    """
+    if redis.call('SISMEMBER', KEYS[1], ARGV[1]) == 1
+        or redis.call('SISMEMBER', KEYS[2], ARGV[1]) == 1 then
+        return 'duplicate'
+    end
+    if redis.call('SET', KEYS[3], '1', 'NX', 'EX', ARGV[2]) then
+        return 'new'
+    end
+    return 'busy'
+    """
+)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (blake2b double hashing)."""
+
+    def __init__(self, capacity, error_rate):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, value):
+        for pos in self._positions(value):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, value):
+        return all(
+            self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(value)
+        )
+
+
+class MessageDedupe:
+    def __init__(
+        self,
+        consumer,
+        window=DEDUPE_WINDOW_SECONDS,
+        capacity=DEDUPE_BLOOM_CAPACITY,
+        error_rate=DEDUPE_BLOOM_ERROR_RATE,
+        claim_ttl=DEDUPE_CLAIM_SECONDS,
+    ):
+        self.consumer = consumer
+        self.window = window
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.claim_ttl = claim_ttl
+        self._lock = threading.Lock()
+        self._bucket = None
+        self._filters = {}  # bucket -> BloomFilter, current and previous only
+        self.stats = {
+            "checked": 0,
+            "duplicates": 0,
+            "bloom_false_positives": 0,
+            "busy": 0,
+            "marked": 0,
+        }
+
+    def _key(self, bucket):
+        return f"dedupe:{self.consumer}:{bucket}"
+
+    def _claim_key(self, message_id):
+        return f"dedupe:{self.consumer}:claim:{message_id}"
+
+    def _count(self, name, amount=1):
+        # called from the consumer's worker threads
+        with self._lock:
+            self.stats[name] += amount
+
+    def _live(self):
+        """
+        ``[(bucket, filter)]`` for the current and previous window,
+        rotating the filters when the window moves on.
+        """
+        bucket = int(time.time() // self.window)
+        with self._lock:
+            if bucket != self._bucket:
+                self._filters = {
+                    b: self._filters.get(b)
+                    or BloomFilter(self.capacity, self.error_rate)
+                    for b in (bucket, bucket - 1)
+                }
+                self._bucket = bucket
+            return list(self._filters.items())
+
+    def warm(self):
+        """Load the ids Redis already holds for this consumer into the filters."""
+        loaded = 0
+        for bucket, bloom in self._live():
+            try:
+                for message_id in redis_client.sscan_iter(
+                    self._key(bucket), count=1000
+                ):
+                    bloom.add(message_id)
+                    loaded += 1
+            except redis.exceptions.RedisError as e:
+                logger.warning("Redis error warming dedupe filter: %s", e)
+                break
+        logger.info("Dedupe %s warmed with %d ids", self.consumer, loaded)
+        return loaded
+
+    def claim(self, message_id):
+        """
+        ``NEW`` (the caller now holds the id), ``DUPLICATE`` (already
+        processed) or ``BUSY`` (another consumer holds it right now).
+        Ids without a message_id, and any Redis error, count as ``NEW``:
+        the handlers are idempotent on their own.
+        """
+        if not message_id:
+            return NEW
+        self._count("checked")
+
+        live = self._live()
+        keys = [self._key(bucket) for bucket, _ in live]
+        try:
+            if any(message_id in bloom for _, bloom in live):
+                pipe = redis_client.pipeline(transaction=False)
+                for key in keys:
+                    pipe.sismember(key, message_id)
+                if any(pipe.execute()):
+                    self._count("duplicates")
+                    return DUPLICATE
+                self._count("bloom_false_positives")
+
+            state = _CLAIM(
+                keys=[*keys, self._claim_key(message_id)],
+                args=[message_id, self.claim_ttl],
+            )
+        except redis.exceptions.RedisError as e:
+            logger.warning("Redis error checking dedupe for %s: %s", message_id, e)
+            return NEW
+
+        if state == DUPLICATE:
+            self._count("duplicates")
+        elif state == BUSY:
+            self._count("busy")
+        return state
+
+    def release(self, message_id):
+        self.release_many([message_id])
+
+    def release_many(self, message_ids):
+        """Drop the claims of ids that failed, so a retry can take them."""
+        message_ids = [m for m in message_ids if m]
+        if not message_ids:
+            return
+        try:
+            redis_client.delete(*[self._claim_key(m) for m in message_ids])
+        except redis.exceptions.RedisError as e:
+            logger.warning("Redis error releasing %d claims: %s", len(message_ids), e)
+
+    def mark(self, message_id):
+        self.mark_many([message_id])
+
+    def mark_many(self, message_ids):
+        message_ids = [m for m in message_ids if m]
+        if not message_ids:
+            return
+
+        current, bloom = self._live()[0]
+        for message_id in message_ids:
+            bloom.add(message_id)
+
+        key = self._key(current)
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.sadd(key, *message_ids)
+            pipe.expire(key, self.window * 2)
+            pipe.delete(*[self._claim_key(m) for m in message_ids])
+            pipe.execute()
+        except redis.exceptions.RedisError as e:
+            logger.warning(
+                "Redis error marking %d ids processed: %s", len(message_ids), e
+            )
+            return
+        self._count("marked", len(message_ids))
@@ -0,0 +1,64 @@
+"""
+Run independent upstream calls concurrently on a bounded thread pool.
+
+    results = fan_out({
+        "trainers": (lambda: auth.get(...), 6),
+        "profiles": (lambda: trainer.get(...), 6),
+    })
+    if results["trainers"].ok: ...
+
+Each branch has its own deadline; a branch that raises or misses its
+deadline comes back with ``ok=False`` instead of failing the whole call,
+so views can decide which branches are critical.
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+FANOUT_MAX_WORKERS = int(os.getenv("FANOUT_MAX_WORKERS", "16"))
+
+# shared across requests so concurrency stays bounded per process
+_executor = ThreadPoolExecutor(
+    max_workers=FANOUT_MAX_WORKERS,
+    thread_name_prefix="fanout",
+)
+
+
+class BranchResult(NamedTuple):
+    ok: bool
+    value: Any = None
+    error: Exception | None = None
+
+
+def fan_out(branches):
+    """
+    ``branches`` maps a name to ``(callable, timeout_seconds)``.
+    Returns ``{name: BranchResult}``; total wall time is bounded by the
+    slowest branch deadline, not the sum.
+    """
+    started = time.monotonic()
+    futures = {
+        name: (_executor.submit(fn), timeout)
+        for name, (fn, timeout) in branches.items()
+    }
+
+    results = {}
+    for name, (future, timeout) in futures.items():
+        remaining = max(0.0, timeout - (time.monotonic() - started))
+        try:
+            results[name] = BranchResult(ok=True, value=future.result(remaining))
+        except FutureTimeout as exc:
+            future.cancel()
+            logger.warning("fan-out branch %s timed out after %.1fs", name, timeout)
+            results[name] = BranchResult(ok=False, error=exc)
+        except Exception as exc:
+            logger.warning("fan-out branch %s failed: %s", name, exc)
+            results[name] = BranchResult(ok=False, error=exc)
+
+    return results
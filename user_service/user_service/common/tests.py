@@ -0,0 +1,618 @@
+import asyncio
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+import pika
+from django.test import SimpleTestCase
+from user_app.management.commands import consumer_dlq
+
+from . import dedupe
+from .consumer_runtime import (
+    LAST_ERROR_HEADER,
+    ORIGINAL_ROUTING_KEY_HEADER,
+    RETRY_ATTEMPT_HEADER,
+    ConsumerRuntime,
+    Reject,
+    Retry,
+    retry_attempts,
+)
+from .dedupe import BUSY, DUPLICATE, NEW, MessageDedupe
+
+QUEUE = "test.queue"
+
+
+class StandInChannel:
+    """
+    Broker stand-in for the runtime: records acks, nacks, cancels and
+    publishes in order, and confirms (or nacks) every publish on the next
+    loop iteration like a confirm-mode channel.
+    """
+
+    def __init__(self, runtime, confirm=True):
+        self.runtime = runtime
+        self.confirm = confirm
+        self.is_open = True
+        self.events = []
+        self.published = []
+        self._seq = 0
+
+    def basic_ack(self, delivery_tag, multiple=False):
+        self.events.append(("ack", delivery_tag, multiple))
+
+    def basic_nack(self, delivery_tag, requeue=True):
+        self.events.append(("nack", delivery_tag, requeue))
+
+    def basic_cancel(self, consumer_tag, callback=None):
+        self.events.append(("cancel", consumer_tag))
+        callback(None)
+
+    def basic_publish(self, exchange, routing_key, body, properties):
+        self._seq += 1
+        self.events.append(("publish", routing_key))
+        self.published.append((routing_key, body, properties))
+        method = pika.spec.Basic.Ack if self.confirm else pika.spec.Basic.Nack
+        asyncio.get_running_loop().call_soon(
+            self.runtime._on_confirm,
+            SimpleNamespace(method=method(delivery_tag=self._seq)),
+        )
+
+    def acked_tags(self):
+        return [event[1] for event in self.events if event[0] == "ack"]
+
+
+def make_runtime(**kwargs):
+    kwargs = {"dedupe": False, "concurrency": 2, "metrics_port": 0, **kwargs}
+    return ConsumerRuntime(QUEUE, **kwargs)
+
+
+def start(runtime, confirm=True):
+    """What ``_main`` / ``_connect`` set up, minus the broker."""
+    runtime._executor = ThreadPoolExecutor(max_workers=runtime.concurrency)
+    runtime._slots = asyncio.Semaphore(runtime.concurrency)
+    runtime._stop = asyncio.Event()
+    runtime._lost = asyncio.Event()
+    runtime._channel = StandInChannel(runtime, confirm=confirm)
+    return runtime._channel
+
+
+def deliver(
+    runtime,
+    tag,
+    routing_key="user.created",
+    payload=None,
+    headers=None,
+    message_id=None,
+):
+    method = SimpleNamespace(
+        delivery_tag=tag, routing_key=routing_key, redelivered=False
+    )
+    properties = SimpleNamespace(
+        headers=headers or {},
+        message_id=message_id,
+        content_type="application/json",
+        timestamp=None,
+    )
+    body = json.dumps(payload if payload is not None else {"n": tag}).encode()
+    runtime._on_message(runtime._channel, method, properties, body)
+
+
+async def settle(runtime):
+    """Wait until every spawned dispatch / handler task has finished."""
+    while runtime._inflight:
+        await asyncio.wait(set(runtime._inflight))
+
+
+async def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        await asyncio.sleep(0.005)
+
+
+class ConsumerRuntimeTests(SimpleTestCase):
+    def setUp(self):
+        self.runtime = make_runtime()
+
+    def tearDown(self):
+        if self.runtime._executor is not None:
+            self.runtime._executor.shutdown(wait=True)
+
+    async def test_acks_each_message_once_its_handler_returns(self):
+        handled = []
+
+        @self.runtime.handler("user.created")
+        def on_created(delivery):
+            handled.append(delivery.payload["n"])
+
+        channel = start(self.runtime)
+        for tag in (1, 2, 3):
+            deliver(self.runtime, tag)
+        await settle(self.runtime)
+
+        self.assertEqual(sorted(handled), [1, 2, 3])
+        self.assertCountEqual(
+            channel.events, [("ack", 1, False), ("ack", 2, False), ("ack", 3, False)]
+        )
+        self.assertEqual(self.runtime.stats["acked"], 3)
+        self.assertEqual(self.runtime._unacked, set())
+
+    async def test_at_most_concurrency_handlers_run_at_once(self):
+        lock = threading.Lock()
+        running = {"now": 0, "max": 0}
+
+        @self.runtime.handler("user.created")
+        def on_created(delivery):
+            with lock:
+                running["now"] += 1
+                running["max"] = max(running["max"], running["now"])
+            time.sleep(0.02)
+            with lock:
+                running["now"] -= 1
+
+        channel = start(self.runtime)
+        for tag in range(1, 7):
+            deliver(self.runtime, tag)
+        await settle(self.runtime)
+
+        self.assertEqual(running["max"], 2)
+        self.assertCountEqual(channel.acked_tags(), range(1, 7))
+
+    def test_prefetch_covers_concurrency_and_batch_size(self):
+        @self.runtime.handler("user.created")
+        def on_created(delivery):
+            pass
+
+        self.assertEqual(self.runtime._prefetch(), 2)
+
+        @self.runtime.batch_handler("user.updated", size=50)
+        def on_updated(deliveries):
+            return []
+
+        self.assertEqual(self.runtime._prefetch(), 50)
+        self.runtime.prefetch = 100
+        self.assertEqual(self.runtime._prefetch(), 100)
+
+    async def test_batch_is_acked_with_one_multiple_ack(self):
+        batches = []
+
+        @self.runtime.batch_handler("user.created", size=3)
+        def on_created(deliveries):
+            batches.append([d.delivery_tag for d in deliveries])
+            return []
+
+        channel = start(self.runtime)
+        for tag in (1, 2, 3):
+            deliver(self.runtime, tag)
+        await settle(self.runtime)
+
+        self.assertEqual(batches, [[1, 2, 3]])
+        self.assertEqual(channel.events, [("ack", 3, True)])
+        self.assertEqual(self.runtime.stats["acked"], 3)
+        self.assertEqual(self.runtime._unacked, set())
+
+    async def test_batch_acks_one_by_one_while_a_lower_tag_is_unacked(self):
+        gate = threading.Event()
+
+        @self.runtime.handler("user.slow")
+        def on_slow(delivery):
+            gate.wait(2)
+
+        @self.runtime.batch_handler("user.created", size=3)
+        def on_created(deliveries):
+            return []
+
+        channel = start(self.runtime)
+        deliver(self.runtime, 1, routing_key="user.slow")
+        for tag in (2, 3, 4):
+            deliver(self.runtime, tag)
+        await wait_for(lambda: len(channel.acked_tags()) == 3)
+
+        # a multiple ack up to 4 would also ack tag 1, still being handled
+        self.assertEqual(
+            channel.events, [("ack", 2, False), ("ack", 3, False), ("ack", 4, False)]
+        )
+
+        gate.set()
+        await settle(self.runtime)
+        self.assertEqual(channel.events[-1], ("ack", 1, False))
+
+    async def test_batch_retries_only_the_deliveries_it_returns(self):
+        @self.runtime.batch_handler("user.created", size=3)
+        def on_created(deliveries):
+            return [d for d in deliveries if d.payload["n"] == 2]
+
+        channel = start(self.runtime)
+        for tag in (1, 2, 3):
+            deliver(self.runtime, tag)
+        await settle(self.runtime)
+
+        self.assertEqual(
+            channel.events,
+            [
+                ("ack", 1, False),
+                ("ack", 3, False),
+                # parked in the delay queue before the original is acked
+                ("publish", f"{QUEUE}.retry.5s"),
+                ("ack", 2, False),
+            ],
+        )
+
+    async def test_rejected_message_is_acked_and_counted_as_dropped(self):
+        @self.runtime.handler("user.created")
+        def on_created(delivery):
+            raise Reject("bad payload")
+
+        channel = start(self.runtime)
+        deliver(self.runtime, 1)
+        await settle(self.runtime)
+
+        self.assertEqual(channel.events, [("ack", 1, False)])
+        self.assertEqual(self.runtime.metrics.dropped, {"rejected": 1})
+
+    async def test_unexpected_error_is_retried_not_dropped(self):
+        @self.runtime.handler("user.created")
+        def on_created(delivery):
+            raise RuntimeError("handler bug")
+
+        channel = start(self.runtime)
+        deliver(self.runtime, 1)
+        await settle(self.runtime)
+
+        self.assertEqual(
+            channel.events, [("publish", f"{QUEUE}.retry.5s"), ("ack", 1, False)]
+        )
+        self.assertEqual(self.runtime.stats["retried"], 1)
+        self.assertEqual(self.runtime.stats["dropped"], 0)
+
+    async def test_invalid_payload_is_dropped_without_a_handler_call(self):
+        calls = []
+
+        @self.runtime.handler("user.created")
+        def on_created(delivery):
+            calls.append(delivery)
+
+        channel = start(self.runtime)
+        deliver(self.runtime, 1, payload=["not", "an", "object"])
+        await settle(self.runtime)
+
+        self.assertEqual(calls, [])
+        self.assertEqual(channel.events, [("ack", 1, False)])
+        self.assertEqual(self.runtime.metrics.dropped, {"invalid_payload": 1})
+
+    async def test_closed_channel_leaves_the_delivery_for_redelivery(self):
+        @self.runtime.handler("user.created")
+        def on_created(delivery):
+            delivery.channel.is_open = False
+
+        channel = start(self.runtime)
+        deliver(self.runtime, 1)
+        await settle(self.runtime)
+
+        self.assertEqual(channel.events, [])
+
+    async def test_drain_cancels_flushes_partial_batches_and_waits(self):
+        gate = threading.Event()
+        batches = []
+
+        @self.runtime.handler("user.slow")
+        def on_slow(delivery):
+            gate.wait(2)
+
+        @self.runtime.batch_handler("user.created", size=10, max_wait=60)
+        def on_created(deliveries):
+            batches.append([d.delivery_tag for d in deliveries])
+            return []
+
+        channel = start(self.runtime)
+        deliver(self.runtime, 1, routing_key="user.slow")
+        deliver(self.runtime, 2)
+        deliver(self.runtime, 3)
+        asyncio.get_running_loop().call_later(0.05, gate.set)
+
+        await self.runtime._drain(channel, "ctag")
+
+        self.assertEqual(channel.events[0], ("cancel", "ctag"))
+        self.assertEqual(batches, [[2, 3]])
+        self.assertCountEqual(channel.acked_tags(), [1, 2, 3])
+        self.assertEqual(self.runtime._inflight, set())
+
+    async def test_drain_gives_up_after_the_timeout(self):
+        self.runtime.drain_timeout = 0.05
+        gate = threading.Event()
+
+        @self.runtime.handler("user.created")
+        def on_created(delivery):
+            gate.wait(2)
+
+        channel = start(self.runtime)
+        deliver(self.runtime, 1)
+
+        started = time.monotonic()
+        await self.runtime._drain(channel, "ctag")
+        self.assertLess(time.monotonic() - started, 1)
+        # still running: left unacked, the broker redelivers it
+        self.assertEqual(channel.events, [("cancel", "ctag")])
+
+        gate.set()
+        await settle(self.runtime)
+
+
+class StandInBlockingChannel:
+    """What ``consumer_dlq`` needs from a pika BlockingChannel."""
+
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self.published = []
+        self.acked = []
+
+    def basic_get(self, queue, auto_ack=False):
+        return self.messages.pop(0) if self.messages else (None, None, None)
+
+    def basic_publish(self, exchange, routing_key, body, properties):
+        self.published.append((exchange, routing_key, body, properties))
+
+    def basic_ack(self, delivery_tag):
+        self.acked.append(delivery_tag)
+
+
+class RetryTopologyTests(SimpleTestCase):
+    def setUp(self):
+        self.runtime = make_runtime(retry_delays=(5, 30), max_retries=3)
+
+        @self.runtime.handler("user.created")
+        def on_created(delivery):
+            raise Retry("db busy")
+
+    def tearDown(self):
+        if self.runtime._executor is not None:
+            self.runtime._executor.shutdown(wait=True)
+
+    def test_retry_attempts_reads_x_death_and_our_header(self):
+        deaths = [
+            {"queue": f"{QUEUE}.retry.5s", "count": 2},
+            {"queue": f"{QUEUE}.retry.30s", "count": 1},
+            # another consumer's delay queue does not count
+            {"queue": "other.queue.retry.5s", "count": 7},
+        ]
+        self.assertEqual(retry_attempts(QUEUE, {}), 0)
+        self.assertEqual(retry_attempts(QUEUE, {"x-death": deaths}), 3)
+        self.assertEqual(
+            retry_attempts(QUEUE, {"x-death": deaths, RETRY_ATTEMPT_HEADER: 5}), 5
+        )
+        self.assertEqual(retry_attempts(QUEUE, {RETRY_ATTEMPT_HEADER: "2"}), 2)
+
+    async def test_delay_is_picked_per_attempt(self):
+        channel = start(self.runtime)
+        # the last level repeats once the list runs out
+        for tag, attempts in enumerate((0, 1, 2), start=1):
+            deliver(self.runtime, tag, headers={RETRY_ATTEMPT_HEADER: attempts})
+            await settle(self.runtime)
+
+        self.assertEqual(
+            [routing_key for routing_key, _, _ in channel.published],
+            [f"{QUEUE}.retry.5s", f"{QUEUE}.retry.30s", f"{QUEUE}.retry.30s"],
+        )
+        headers = channel.published[0][2].headers
+        self.assertEqual(headers[RETRY_ATTEMPT_HEADER], 1)
+        self.assertEqual(headers[ORIGINAL_ROUTING_KEY_HEADER], "user.created")
+        self.assertIn("db busy", headers[LAST_ERROR_HEADER])
+        self.assertEqual(self.runtime.stats["retried"], 3)
+
+    async def test_dead_letters_once_attempts_reach_max_retries(self):
+        channel = start(self.runtime)
+        deaths = [{"queue": f"{QUEUE}.retry.30s", "count": 3}]
+        deliver(self.runtime, 1, headers={"x-death": deaths})
+        await settle(self.runtime)
+
+        self.assertEqual(
+            channel.events, [("publish", f"{QUEUE}.dlq"), ("ack", 1, False)]
+        )
+        self.assertEqual(self.runtime.stats["dead_lettered"], 1)
+        self.assertEqual(self.runtime.stats["retried"], 0)
+
+    async def test_unconfirmed_republish_falls_back_to_a_requeue(self):
+        channel = start(self.runtime, confirm=False)
+        deliver(self.runtime, 1)
+        await settle(self.runtime)
+
+        self.assertEqual(
+            channel.events, [("publish", f"{QUEUE}.retry.5s"), ("nack", 1, True)]
+        )
+
+    async def test_message_back_from_a_delay_queue_keeps_its_route(self):
+        handled = []
+
+        @self.runtime.handler("user.created")
+        def on_created(delivery):
+            handled.append(delivery.routing_key)
+
+        channel = start(self.runtime)
+        # delay queues dead-letter through the default exchange: the
+        # routing key is now the queue name
+        deliver(
+            self.runtime,
+            1,
+            routing_key=QUEUE,
+            headers={ORIGINAL_ROUTING_KEY_HEADER: "user.created"},
+        )
+        await settle(self.runtime)
+
+        self.assertEqual(handled, ["user.created"])
+        self.assertEqual(channel.events, [("ack", 1, False)])
+
+    async def test_dlq_replay_restores_the_original_routing_key(self):
+        parked = pika.BasicProperties(
+            content_type="application/json",
+            message_id="m-1",
+            headers={
+                "x-death": [{"queue": f"{QUEUE}.retry.30s", "count": 3}],
+                RETRY_ATTEMPT_HEADER: 4,
+                LAST_ERROR_HEADER: "Retry: db busy",
+                ORIGINAL_ROUTING_KEY_HEADER: "user.created",
+            },
+        )
+        dlq = StandInBlockingChannel(
+            [(SimpleNamespace(delivery_tag=7), parked, b'{"n": 1}')]
+        )
+        command = consumer_dlq.Command(stdout=StringIO())
+        command._replay(dlq, QUEUE, f"{QUEUE}.dlq", 1, {"message_id": [], "limit": 20})
+
+        ((exchange, routing_key, body, properties),) = dlq.published
+        self.assertEqual((exchange, routing_key), ("", QUEUE))
+        self.assertEqual(properties.message_id, "m-1")
+        # a fresh retry budget, but still routed to the original handler
+        self.assertEqual(
+            properties.headers, {ORIGINAL_ROUTING_KEY_HEADER: "user.created"}
+        )
+        self.assertEqual(dlq.acked, [7])
+
+        handled = []
+
+        @self.runtime.handler("user.created")
+        def on_created(delivery):
+            handled.append(retry_attempts(QUEUE, delivery.headers))
+
+        start(self.runtime)
+        deliver(self.runtime, 1, routing_key=QUEUE, headers=properties.headers)
+        await settle(self.runtime)
+        self.assertEqual(handled, [0])
+
+
+class MessageDedupeTests(SimpleTestCase):
+    """Runs against the service's Redis (``REDIS_URL``)."""
+
+    def setUp(self):
+        self.consumer = f"test.dedupe.{uuid.uuid4().hex}"
+        self.dedupe = MessageDedupe(self.consumer, window=60)
+
+    def tearDown(self):
+        keys = list(dedupe.redis_client.scan_iter(match=f"dedupe:{self.consumer}:*"))
+        if keys:
+            dedupe.redis_client.delete(*keys)
+
+    def test_claim_states(self):
+        self.assertEqual(self.dedupe.claim("m-1"), NEW)
+        # held by the first claim until it is marked or released
+        self.assertEqual(self.dedupe.claim("m-1"), BUSY)
+
+        self.dedupe.release("m-1")
+        self.assertEqual(self.dedupe.claim("m-1"), NEW)
+
+        self.dedupe.mark("m-1")
+        self.assertEqual(self.dedupe.claim("m-1"), DUPLICATE)
+        self.assertFalse(dedupe.redis_client.exists(self.dedupe._claim_key("m-1")))
+
+        self.assertEqual(self.dedupe.stats["checked"], 4)
+        self.assertEqual(self.dedupe.stats["busy"], 1)
+        self.assertEqual(self.dedupe.stats["duplicates"], 1)
+
+    def test_message_without_id_is_always_new(self):
+        self.assertEqual(self.dedupe.claim(None), NEW)
+        self.assertEqual(self.dedupe.claim(None), NEW)
+        self.assertEqual(self.dedupe.stats["checked"], 0)
+
+    def test_id_processed_by_another_replica_is_a_duplicate(self):
+        MessageDedupe(self.consumer, window=60).mark_many(["m-1", "m-2"])
+
+        # not in this process's Bloom filter, but Redis has it
+        self.assertEqual(self.dedupe.claim("m-1"), DUPLICATE)
+        self.assertEqual(self.dedupe.claim("m-2"), DUPLICATE)
+        self.assertEqual(self.dedupe.claim("m-3"), NEW)
+
+    def test_bloom_false_positive_falls_through_to_the_claim(self):
+        _, bloom = self.dedupe._live()[0]
+        bloom.add("m-1")
+
+        self.assertEqual(self.dedupe.claim("m-1"), NEW)
+        self.assertEqual(self.dedupe.stats["bloom_false_positives"], 1)
+        self.assertEqual(self.dedupe.stats["duplicates"], 0)
+
+    def test_ids_are_remembered_for_one_to_two_windows(self):
+        clock = mock.Mock()
+        with mock.patch.object(dedupe, "time", clock):
+            clock.time.return_value = 600  # bucket 10
+            self.dedupe.mark("m-1")
+            _, first = self.dedupe._live()[0]
+
+            clock.time.return_value = 660  # bucket 11: bucket 10 is the previous one
+            live = self.dedupe._live()
+            self.assertEqual([bucket for bucket, _ in live], [11, 10])
+            self.assertIs(live[1][1], first)
+            self.assertEqual(self.dedupe.claim("m-1"), DUPLICATE)
+
+            clock.time.return_value = 720  # bucket 12: bucket 10 is gone
+            self.assertEqual([b for b, _ in self.dedupe._live()], [12, 11])
+            self.assertNotIn("m-1", self.dedupe._live()[1][1])
+            self.assertEqual(self.dedupe.claim("m-1"), NEW)
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = dedupe.BloomFilter(capacity=1000, error_rate=0.01)
+        ids = [str(uuid.uuid4()) for _ in range(1000)]
+        for message_id in ids:
+            bloom.add(message_id)
+
+        self.assertTrue(all(message_id in bloom for message_id in ids))
+        others = sum(str(uuid.uuid4()) in bloom for _ in range(1000))
+        self.assertLess(others, 50)
+
+
+class ConsumerDedupeTests(SimpleTestCase):
+    """The runtime's use of claims: ack duplicates, retry busy ids, release on failure."""
+
+    def setUp(self):
+        self.queue = f"test.dedupe.{uuid.uuid4().hex}"
+        self.runtime = ConsumerRuntime(self.queue, concurrency=2, metrics_port=0)
+        self.calls = []
+        self.fail = True
+
+        @self.runtime.handler("user.created")
+        def on_created(delivery):
+            self.calls.append(delivery.delivery_tag)
+            if self.fail:
+                raise Retry("db busy")
+
+    def tearDown(self):
+        if self.runtime._executor is not None:
+            self.runtime._executor.shutdown(wait=True)
+        keys = list(dedupe.redis_client.scan_iter(match=f"dedupe:{self.queue}:*"))
+        if keys:
+            dedupe.redis_client.delete(*keys)
+
+    async def test_failed_handler_releases_its_claim(self):
+        channel = start(self.runtime)
+        claims = self.runtime.dedupe
+
+        deliver(self.runtime, 1, message_id="m-1")
+        await settle(self.runtime)
+        self.assertEqual(channel.published[0][0], f"{self.queue}.retry.5s")
+        self.assertFalse(dedupe.redis_client.exists(claims._claim_key("m-1")))
+
+        # the retried copy is handled, and a later redelivery is a duplicate
+        self.fail = False
+        deliver(self.runtime, 2, message_id="m-1")
+        await settle(self.runtime)
+        deliver(self.runtime, 3, message_id="m-1")
+        await settle(self.runtime)
+
+        self.assertEqual(self.calls, [1, 2])
+        self.assertEqual(channel.acked_tags(), [1, 2, 3])
+        self.assertEqual(self.runtime.stats["duplicates"], 1)
+
+    async def test_id_held_by_another_consumer_goes_to_a_delay_queue(self):
+        channel = start(self.runtime)
+        self.assertEqual(MessageDedupe(self.queue).claim("m-1"), NEW)
+
+        deliver(self.runtime, 1, message_id="m-1")
+        await settle(self.runtime)
+
+        self.assertEqual(self.calls, [])
+        self.assertEqual(
+            channel.events, [("publish", f"{self.queue}.retry.5s"), ("ack", 1, False)]
+        )
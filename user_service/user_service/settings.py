@@ -116,15 +116,49 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 AUTH_SERVICE_URL = os.getenv("AUTH_SERVICE_URL")
 USER_SERVICE_URL = os.getenv("USER_SERVICE_URL")
 TRAINER_SERVICE_URL = os.getenv("TRAINER_SERVICE_URL")
+INTERNAL_SERVICE_TOKEN = os.getenv("INTERNAL_SERVICE_TOKEN", "")
 AI_SERVICE_BASE_URL = os.getenv("AI_SERVICE_BASE_URL")
 
 CELERY_BROKER_URL = os.getenv("RABBIT_URL")
 
 # CELERY CONF
 
+# user_tasks: short DB / booking work (prefork worker)
+# user_ai_p:  LLM-bound tasks that mostly wait on the AI service (thread pool)
 CELERY_TASK_DEFAULT_QUEUE = "user_tasks"
+# a RabbitMQ queue's arguments can't change once declared, so the priority
+# queue has a new name; the AI worker still drains the old plain ``user_ai``
+# queue (see entrypoint.sh), which can be deleted once it is empty
+AI_TASK_QUEUE = "user_ai_p"
+LEGACY_AI_TASK_QUEUE = "user_ai"
+
+AI_QUEUE_MAX_PRIORITY = 10
+
+CELERY_TASK_QUEUES = (
+    Queue("user_tasks"),
+    # priority queue: premium / interactive jobs jump ahead (helper/ai_dispatch.py)
+    Queue(AI_TASK_QUEUE, queue_arguments={"x-max-priority": AI_QUEUE_MAX_PRIORITY}),
+    Queue(LEGACY_AI_TASK_QUEUE),
+)
+
+CELERY_TASK_ROUTES = {
+    "user_app.tasks.generate_diet_plan_task": {"queue": AI_TASK_QUEUE},
+    "user_app.tasks.generate_weekly_workout_task": {"queue": AI_TASK_QUEUE},
+    "user_app.tasks.estimate_nutrition_task": {"queue": AI_TASK_QUEUE},
+}
+
+# queue latency benchmark tasks (manage.py bench_task_latency): only
+# registered on workers started with CELERY_BENCH_TASKS=1
+if os.getenv("CELERY_BENCH_TASKS") == "1":
+    CELERY_IMPORTS = ("user_app.bench_tasks",)
+
+# a worker only reserves what it is about to run, so a slow AI task can't
+# sit on prefetched booking messages. acks_late is set per task, only on
+# the idempotent ones (user_app/tasks.py)
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
 
-CELERY_TASK_QUEUES = (Queue("user_tasks"),)
+# per-user cap on queued/running AI jobs before extra ones are demoted
+AI_MAX_INFLIGHT_PER_USER = int(os.getenv("AI_MAX_INFLIGHT_PER_USER", "3"))
 
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
@@ -136,6 +170,12 @@ CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
 WSGI_APPLICATION = "user_service.wsgi.application"
 ASGI_APPLICATION = "user_service.asgi.application"
 
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+
+# consumer message_id dedupe (common/dedupe.py)
+DEDUPE_WINDOW_SECONDS = int(os.getenv("DEDUPE_WINDOW_SECONDS", str(24 * 3600)))
+DEDUPE_BLOOM_CAPACITY = int(os.getenv("DEDUPE_BLOOM_CAPACITY", "100000"))
+
 CHANNEL_LAYERS = {
     "default": {
         "BACKEND": "channels_redis.core.RedisChannelLayer",
@@ -150,15 +190,34 @@ RAZORPAY_KEY_ID = os.getenv("RAZORPAY_KEY_ID")
 RAZORPAY_KEY_SECRET = os.getenv("RAZORPAY_KEY_SECRET")
 
 
+PREMIUM_EXPIRY_TICK_SECONDS = int(os.getenv("PREMIUM_EXPIRY_TICK_SECONDS", "10"))
+
 CELERY_BEAT_SCHEDULE = {
+    "expire-due-premium-users": {
+        "task": "user_app.tasks.expire_due_premium_users",
+        "schedule": timedelta(seconds=PREMIUM_EXPIRY_TICK_SECONDS),
+        # a tick nobody picked up is superseded by the next one
+        "options": {"expires": PREMIUM_EXPIRY_TICK_SECONDS},
+    },
     "expire-premium-users-daily": {
-        "task": "user.tasks.handle_expired_premium_users",
+        "task": "user_app.tasks.handle_expired_premium_users",
         "schedule": crontab(hour=0, minute=5),  # daily
     },
+    "reconcile-premium-entitlements": {
+        "task": "user_app.tasks.reconcile_premium_entitlements",
+        "schedule": crontab(minute="*/15"),
+    },
 }
 
+# premium entitlement store (Redis + in-process layer)
+ENTITLEMENT_LOCAL_TTL = int(os.getenv("ENTITLEMENT_LOCAL_TTL", "30"))
+# "not premium" is kept in-process only briefly so a payment shows up everywhere
+ENTITLEMENT_LOCAL_NEGATIVE_TTL = float(os.getenv("ENTITLEMENT_LOCAL_NEGATIVE_TTL", "1"))
+ENTITLEMENT_NEGATIVE_TTL = int(os.getenv("ENTITLEMENT_NEGATIVE_TTL", "600"))
+
 AWS_REGION = os.getenv("AWS_REGION")
 AWS_PREMIUM_EXPIRED_QUEUE_URL = os.getenv("AWS_PREMIUM_EXPIRED_QUEUE_URL")
+PREMIUM_EXPIRY_CHUNK_SIZE = int(os.getenv("PREMIUM_EXPIRY_CHUNK_SIZE", "500"))
 
 AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY= os.getenv("AWS_SECRET_ACCESS_KEY")
\ No newline at end of file